@@ -0,0 +1,117 @@
+"""Multi-instance polling benchmark against several simulated Winamps.
+
+Starts ``--instances`` simulated Winamp instances (each in its own install
+directory, so each gets its own topic namespace), optionally freezes one of
+them, and runs MultiInstanceBridge's main loop for ``--duration`` seconds
+with each worker-pool size given. Per instance it reports completed polls,
+mean poll time and whether the bridge reported it hung; with a frozen
+instance the others should keep polling at their normal rate:
+
+    python benchmarks/bench_multi_instance.py
+    python benchmarks/bench_multi_instance.py --instances 8 --workers 1 2 8 --hang -1
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import winamp_mqtt_bridge as bridge  # noqa: E402
+
+
+class CountingClient:
+    """Stands in for the shared MQTT client and counts publishes per topic."""
+
+    def __init__(self):
+        self.messages = {}
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.messages[topic] = self.messages.get(topic, 0) + 1
+
+    def subscribe(self, topic):
+        pass
+
+
+def timed(instance, stats):
+    poll = instance.poll_once
+
+    def poll_once(slow):
+        started = time.perf_counter()
+        poll(slow)
+        stats.append(time.perf_counter() - started)
+
+    return poll_once
+
+
+def run(args, workers):
+    backend = bridge.SimulatedBackend(latency=args.latency)
+    bridge.set_backend(backend)
+    winamps = []
+    for number in range(args.instances):
+        exe = os.path.join(os.sep, "Zone %d" % (number + 1), "winamp.exe")
+        winamp = backend.start(tracks=args.tracks, exe_path=exe)
+        winamp.status = 1
+        winamps.append(winamp)
+
+    multi = bridge.MultiInstanceBridge(
+        client=CountingClient(), workers=workers, hung_after=args.hung_after
+    )
+    multi.scan()
+    stats = {}
+    for name, instance in multi.snapshot():
+        stats[name] = []
+        instance.poll_once = timed(instance, stats[name])
+        instance.scheduler.fast_interval = args.interval
+        instance.scheduler.boost_interval = args.interval
+
+    if 0 <= args.hang < len(winamps):
+        winamps[args.hang].hung = True
+
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        multi.wake.wait(min(multi.step(), max(0.0, deadline - time.monotonic())))
+        multi.wake.clear()
+    hung = set(multi.hung)
+
+    for winamp in winamps:
+        winamp.hung = False
+    multi.pool.shutdown(wait=True)
+    for _, instance in multi.snapshot():
+        instance.closed.set()
+
+    print("%d workers, %d instances, %.1fs" % (workers, args.instances, args.duration))
+    for name, polls in sorted(stats.items()):
+        mean = sum(polls) / len(polls) * 1000 if polls else float("nan")
+        print("  %-10s polls %5d   mean %8.2f ms%s"
+              % (name, len(polls), mean, "   reported hung" if name in hung else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--tracks", type=int, default=500)
+    parser.add_argument("--workers", type=int, nargs="+", default=(1, 4))
+    parser.add_argument("--hang", type=int, default=0,
+                        help="index of the instance to freeze (-1 for none)")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--interval", type=float, default=0.05,
+                        help="poll interval per instance, seconds")
+    parser.add_argument("--latency", type=float, default=0.0005,
+                        help="delay added to every simulated Win32 call, seconds")
+    parser.add_argument("--hung-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    # Keep the frozen instance's messages from blocking for the default 2s.
+    bridge.SEND_MESSAGE_TIMEOUT_MS = 500
+    bridge.ARTWORK_HTTP_PORT = None
+    bridge.STATE_SNAPSHOT_PATH = None
+    logging.getLogger().setLevel(logging.ERROR)
+    for workers in args.workers:
+        run(args, workers)
+
+
+if __name__ == "__main__":
+    main()
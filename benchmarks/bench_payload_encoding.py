@@ -0,0 +1,100 @@
+"""Bytes on the wire and encode/decode CPU of the bridge's payload encodings.
+
+Encodes a state document with an inline playlist and a single playlist page
+(PLAYLIST_PAGE_SIZE entries) with encode_payload from the bridge, in every
+encoding, and decodes them with custom_components/winhamp/codec.py, the
+decoder Home Assistant uses. That module has no Home Assistant imports:
+
+    python benchmarks/bench_payload_encoding.py
+    python benchmarks/bench_payload_encoding.py --sizes 500 100000 --folders 50
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import winamp_mqtt_bridge as bridge  # noqa: E402
+
+DEFAULT_SIZES = (500, 10_000, 100_000)
+REPEAT = 5
+
+
+def load_codec_module():
+    path = os.path.join(ROOT, "custom_components", "winhamp", "codec.py")
+    spec = importlib.util.spec_from_file_location("winhamp_codec", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_playlist(size, folders):
+    """Paths shaped like a real library: artist\\album\\NN - Title.ext."""
+    items = []
+    for index in range(size):
+        album = index // 12 % folders
+        items.append(
+            "D:\\Music\\Library\\Artist %03d\\Album %03d (%d)\\%02d - Song Title %d.%s"
+            % (album // 4, album, 1970 + album % 50, index % 12 + 1, index,
+               "flac" if album % 3 else "mp3")
+        )
+    return items
+
+
+def make_state(playlist):
+    return {
+        "available": True,
+        "status": "playing",
+        "title": "Artist 001 - Song Title 7",
+        "volume": 60,
+        "position": len(playlist) // 2,
+        "playlist": playlist,
+        "elapsed": 42.0,
+        "duration": 215.0,
+        "elapsed_at": 1760000000.0,
+        "tags": {"title": "Song Title 7", "artist": "Artist 001", "album": "Album 004",
+                 "track": 7, "duration": 215.0},
+        "art": None,
+    }
+
+
+def best_ms(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def run_payload(label, obj, decode):
+    print("  %s" % label)
+    for encoding in bridge.PAYLOAD_ENCODINGS:
+        payload = bridge.encode_payload(obj, encoding)
+        assert decode(payload) == obj, encoding
+        size = len(payload.encode("utf-8") if isinstance(payload, str) else payload)
+        print("    %-7s %10d bytes   encode %8.3f ms   decode %8.3f ms" % (
+            encoding,
+            size,
+            best_ms(lambda: bridge.encode_payload(obj, encoding)),
+            best_ms(lambda: decode(payload)),
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--folders", type=int, default=400,
+                        help="number of album folders the tracks are spread over")
+    args = parser.parse_args()
+
+    decode = load_codec_module().decode_payload
+    for size in args.sizes:
+        playlist = make_playlist(size, args.folders)
+        print("playlist of %d entries" % size)
+        run_payload("state (inline playlist)", make_state(playlist), decode)
+        page = playlist[:bridge.PLAYLIST_PAGE_SIZE]
+        run_payload("page of %d" % len(page), {"page": 0, "start": 0, "items": page}, decode)
+
+
+if __name__ == "__main__":
+    main()
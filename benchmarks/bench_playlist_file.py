@@ -0,0 +1,102 @@
+"""Playlist-file benchmark for read_playlist_from_disk.
+
+Writes Winamp-style M3U8 playlists (with #EXTINF lines) of various sizes to
+a temporary directory and compares the line-by-line reader the bridge used
+before with PlaylistFileReader on a cold parse and on a repeated poll of an
+unchanged file:
+
+    python benchmarks/bench_playlist_file.py
+    python benchmarks/bench_playlist_file.py --sizes 1000 100000
+
+MAX_PLAYLIST_ITEMS is lifted above the playlist size so every entry is
+parsed; pass --keep-limit to measure with the bridge's own limit.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import winamp_mqtt_bridge as bridge  # noqa: E402
+
+DEFAULT_SIZES = (500, 10_000, 100_000)
+REPEAT = 5
+
+
+def legacy_read_playlist(path, limit):
+    """The previous implementation: decode and scan the whole file each poll."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as fh:
+        items = []
+        for line in fh:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            items.append(line)
+            if len(items) >= limit:
+                break
+        return items
+
+
+def write_playlist(directory, size):
+    path = os.path.join(directory, "Winamp.m3u8")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("#EXTM3U\n")
+        for index in range(size):
+            artist = "Artist %03d" % (index % 300)
+            fh.write("#EXTINF:%d,%s - Track %d\n" % (120 + index % 240, artist, index))
+            fh.write("C:\\Music\\%s\\Album %02d\\%05d - Track %d.mp3\n"
+                     % (artist, index % 20, index, index))
+    return path
+
+
+def best_ms(func):
+    return min(timeit.repeat(func, number=1, repeat=REPEAT)) * 1000
+
+
+def run_size(directory, size, keep_limit):
+    path = write_playlist(directory, size)
+    bridge.PLAYLIST_PATH = path
+    if not keep_limit:
+        bridge.MAX_PLAYLIST_ITEMS = max(bridge.MAX_PLAYLIST_ITEMS, size)
+    limit = bridge.MAX_PLAYLIST_ITEMS
+
+    def cold():
+        return bridge.PlaylistFileReader().read(size)
+
+    reader = bridge.PlaylistFileReader()
+    reader.read(size)
+
+    def cached():
+        return reader.read(size)
+
+    assert cold() == cached() == legacy_read_playlist(path, limit)
+
+    print("playlist of %d entries (%d KiB)" % (size, os.path.getsize(path) // 1024))
+    for label, ms in (
+        ("legacy", best_ms(lambda: legacy_read_playlist(path, limit))),
+        ("cold parse", best_ms(cold)),
+        ("unchanged", best_ms(cached)),
+    ):
+        print("  %-12s %9.3f ms" % (label, ms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--keep-limit", action="store_true")
+    args = parser.parse_args()
+
+    # No Winamp here; the simulated backend just reports no executable path.
+    bridge.set_backend(bridge.SimulatedBackend())
+    limit = bridge.MAX_PLAYLIST_ITEMS
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            bridge.MAX_PLAYLIST_ITEMS = limit
+            run_size(directory, size, args.keep_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Memory and per-message CPU of the media player's playlist storage.
+
+Compares the list the media player used to rebuild on every state message
+(``[str(item) for item in playlist]`` plus ``list.index`` lookups) with
+PlaylistStore from custom_components/winhamp/playlist.py. That module has
+no Home Assistant imports, so this runs without Home Assistant installed.
+The "delta msg" row compares rebuilding the store for a playlist delta (the
+list column) with editing it in place:
+
+    python benchmarks/bench_playlist_store.py
+    python benchmarks/bench_playlist_store.py --sizes 500 100000
+"""
+
+import argparse
+import gc
+import importlib.util
+import itertools
+import json
+import os
+import timeit
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_SIZES = (500, 10_000, 100_000)
+REPEAT = 5
+
+
+def load_playlist_module():
+    path = os.path.join(ROOT, "custom_components", "winhamp", "playlist.py")
+    spec = importlib.util.spec_from_file_location("winhamp_playlist", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_playlist(size):
+    return [
+        "C:\\Music\\Artist %03d\\Album %02d\\%05d - Track %d.mp3"
+        % (index % 300, index % 20, index, index)
+        for index in range(size)
+    ]
+
+
+def retained_bytes(build):
+    """Bytes still allocated after ``build()`` returns its result."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def best_ms(func, number=1):
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number * 1000
+
+
+def packed(store_cls, entries):
+    store = store_cls(entries)
+    store.pack()
+    return store
+
+
+def run_size(store_cls, size):
+    payload = json.dumps(make_playlist(size))
+
+    # Each state message is decoded into fresh strings, as in HA.
+    def decoded():
+        return json.loads(payload)
+
+    legacy_memory = retained_bytes(lambda: [str(item) for item in decoded()])
+    store_memory = retained_bytes(lambda: packed(store_cls, decoded()))
+
+    middle = size // 2
+
+    def message(change=False):
+        entries = decoded()
+        if change:
+            entries[middle] = "C:\\Music\\changed.mp3"
+        return entries
+
+    items = message()
+    store = store_cls(message())
+    legacy = [str(item) for item in items]
+    changed = message(change=True)
+    # Every message differs from the one before.
+    messages = itertools.cycle((changed, items))
+    changed_again = message(change=True)
+    target = items[-1]
+
+    # A one-entry delta: what the media player did before editing in place
+    # (copy out, apply, repack), and what it does now.
+    def delta_rebuild():
+        entries = store.to_list()
+        entries[middle] = "C:\\Music\\delta.mp3"
+        store.replace(entries)
+        store.pack()
+
+    def delta_in_place():
+        store.edit()[middle] = "C:\\Music\\delta.mp3"
+
+    print("playlist of %d entries" % size)
+    print("  memory     list %10d bytes   store %10d bytes (packed)"
+          % (legacy_memory, store_memory))
+    # In order: a changed playlist stays unpacked until a lookup packs it.
+    rows = (
+        ("unchanged msg",
+         lambda: [str(item) for item in items],
+         lambda: store.replace(items)),
+        ("changed msg",
+         lambda: [str(item) for item in changed],
+         lambda: store.replace(next(messages))),
+        ("lookup (last)",
+         lambda: legacy.index(target),
+         lambda: store.indices(target)),
+        ("unchanged, packed",
+         lambda: [str(item) for item in items],
+         lambda: store.replace(changed_again)),
+        ("delta msg", delta_rebuild, delta_in_place),
+    )
+    for label, old, new in rows:
+        print("  %-17s list %9.3f ms   store %9.3f ms" % (label, best_ms(old), best_ms(new)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    args = parser.parse_args()
+
+    store_cls = load_playlist_module().PlaylistStore
+    for size in args.sizes:
+        run_size(store_cls, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Poll-cycle benchmark against the simulated Winamp backend.
+
+Runs WinampMqttBridge.poll_state against a SimulatedBackend holding
+playlists of various sizes and reports, per scenario, the cycle latency,
+the number of IPC messages and memory reads, the bytes read from the
+simulated process and the bytes handed to MQTT:
+
+    python benchmarks/bench_poll_cycle.py
+    python benchmarks/bench_poll_cycle.py --sizes 500 10000 --latency 0.00001
+    python benchmarks/bench_poll_cycle.py --playlist-mode paged
+
+MAX_PLAYLIST_ITEMS is lifted above the playlist size so the larger cases read
+every entry; pass --keep-limit to measure with the bridge's own limit.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import winamp_mqtt_bridge as bridge  # noqa: E402
+
+DEFAULT_SIZES = (100, 500, 10_000, 100_000)
+
+
+class CountingClient:
+    """Stands in for the MQTT client and counts what would be published."""
+
+    def __init__(self):
+        self.messages = 0
+        self.payload_bytes = 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.messages += 1
+        if payload is not None:
+            self.payload_bytes += len(payload.encode() if isinstance(payload, str) else payload)
+
+    def reset(self):
+        self.messages = 0
+        self.payload_bytes = 0
+
+
+def measure(backend, client, action):
+    backend.reset_counters()
+    client.reset()
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    return {
+        "ms": elapsed * 1000,
+        "ipc": backend.calls.get("send_message", 0),
+        "reads": backend.calls.get("read_memory", 0),
+        "bytes_read": backend.bytes_read,
+        "published": client.payload_bytes,
+    }
+
+
+def run_size(size, latency, keep_limit):
+    backend = bridge.SimulatedBackend(tracks=size, latency=latency)
+    bridge.set_backend(backend)
+    instance = backend.start()
+    instance.status = 1
+    if not keep_limit:
+        bridge.MAX_PLAYLIST_ITEMS = max(bridge.MAX_PLAYLIST_ITEMS, size * 2)
+
+    winamp_bridge = bridge.WinampMqttBridge()
+    client = winamp_bridge.client = CountingClient()
+
+    backend.script([
+        lambda wa: wa.add_tracks(1),
+        lambda wa: wa.handle_message(bridge.WM_COMMAND, bridge.WA_NEXT, 0),
+        lambda wa: wa.move_track(0, len(wa.playlist) - 1),
+    ])
+
+    scenarios = [
+        ("cold poll", lambda: winamp_bridge.poll_state(True)),
+        ("steady, slow tier", lambda: winamp_bridge.poll_state(True)),
+        ("steady, fast tier", lambda: winamp_bridge.poll_state(False)),
+        ("track appended", lambda: (backend.advance(), winamp_bridge.poll_state(False))),
+        ("track change", lambda: (backend.advance(), winamp_bridge.poll_state(False))),
+        ("track moved", lambda: (backend.advance(), winamp_bridge.poll_state(True))),
+    ]
+
+    print("playlist of %d entries" % size)
+    for label, action in scenarios:
+        result = measure(backend, client, action)
+        print(
+            "  %-18s %9.2f ms  %7d ipc  %7d reads  %10d bytes read  %10d bytes published"
+            % (
+                label,
+                result["ms"],
+                result["ipc"],
+                result["reads"],
+                result["bytes_read"],
+                result["published"],
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--latency", type=float, default=0.0,
+        help="seconds added to every simulated backend call",
+    )
+    parser.add_argument("--keep-limit", action="store_true")
+    parser.add_argument(
+        "--playlist-mode", choices=("inline", "delta", "paged"), default=bridge.PLAYLIST_MODE,
+    )
+    args = parser.parse_args()
+
+    bridge.PLAYLIST_MODE = args.playlist_mode
+    # Every run starts cold; see bench_warm_start.py for the snapshot.
+    bridge.STATE_SNAPSHOT_PATH = None
+
+    limit = bridge.MAX_PLAYLIST_ITEMS
+    for size in args.sizes:
+        bridge.MAX_PLAYLIST_ITEMS = limit
+        run_size(size, args.latency, args.keep_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Bridge restart with and without the warm-start snapshot.
+
+Polls a SimulatedBackend playlist once with a fresh WinampMqttBridge to
+write the snapshot, then restarts the bridge (a new WinampMqttBridge
+against the same still-running Winamp) and reports the snapshot's size
+and write time, the time until the restored state was published and the
+first poll's latency, IPC calls and bytes published, cold and warm:
+
+    python benchmarks/bench_warm_start.py
+    python benchmarks/bench_warm_start.py --sizes 500 100000 --latency 0.00001
+
+MAX_PLAYLIST_ITEMS is lifted above the playlist size so every entry counts.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import winamp_mqtt_bridge as bridge  # noqa: E402
+
+DEFAULT_SIZES = (500, 10_000, 100_000)
+
+
+class CountingClient:
+    """Stands in for the MQTT client and counts what would be published."""
+
+    def __init__(self):
+        self.payload_bytes = 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        if payload is not None:
+            self.payload_bytes += len(payload.encode() if isinstance(payload, str) else payload)
+
+
+def restart(backend, warm):
+    """Start a bridge, publish what it restored and run its first poll."""
+    bridge.handles.invalidate()
+    client = CountingClient()
+    started = time.perf_counter()
+    winamp_bridge = bridge.WinampMqttBridge(client=client)
+    winamp_bridge.publish_restored_state()
+    restored = time.perf_counter() - started if warm else None
+
+    backend.reset_counters()
+    started = time.perf_counter()
+    winamp_bridge.poll_state(True)
+    return winamp_bridge, {
+        "restored": restored,
+        "poll": time.perf_counter() - started,
+        "ipc": backend.calls.get("send_message", 0),
+        "published": client.payload_bytes,
+    }
+
+
+def run_size(size, latency, path):
+    backend = bridge.SimulatedBackend(tracks=size, latency=latency)
+    bridge.set_backend(backend)
+    backend.start().status = 1
+    bridge.MAX_PLAYLIST_ITEMS = max(bridge.MAX_PLAYLIST_ITEMS, size * 2)
+    if os.path.exists(path):
+        os.remove(path)
+
+    bridge.STATE_SNAPSHOT_PATH = None
+    winamp_bridge, cold = restart(backend, warm=False)
+
+    bridge.STATE_SNAPSHOT_PATH = path
+    store = winamp_bridge.warm_start = bridge.WarmStartFile(path)
+    write = store.write
+    written = []
+
+    def timed_write(document):
+        started = time.perf_counter()
+        write(document)
+        written.append(time.perf_counter() - started)
+
+    store.write = timed_write
+    winamp_bridge.poll_state(True)
+    _, warm = restart(backend, warm=True)
+
+    print("playlist of %d entries: snapshot %d bytes, written in %.2f ms"
+          % (size, os.path.getsize(path), written[0] * 1000))
+    for label, result in (("cold start", cold), ("warm start", warm)):
+        restored = ("%9.2f ms" % (result["restored"] * 1000)
+                    if result["restored"] is not None else "%12s" % "-")
+        print("  %-10s restored %s   first poll %9.2f ms  %7d ipc  %10d bytes published"
+              % (label, restored, result["poll"] * 1000, result["ipc"], result["published"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--latency", type=float, default=0.0,
+        help="seconds added to every simulated backend call",
+    )
+    args = parser.parse_args()
+
+    bridge.ARTWORK_HTTP_PORT = None
+    bridge.TAG_CACHE_PATH = None
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "winamp_state.json")
+        for size in args.sizes:
+            run_size(size, args.latency, path)
+
+
+if __name__ == "__main__":
+    main()
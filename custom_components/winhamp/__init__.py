@@ -4,19 +4,46 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import Platform
 
-from .const import DOMAIN
+from .const import (
+    CONF_AVAILABILITY_TOPIC,
+    CONF_BASE_TOPIC,
+    CONF_COMMAND_TOPIC,
+    CONF_STATE_TOPIC,
+    DEFAULT_AVAILABILITY_TOPIC,
+    DEFAULT_BASE_TOPIC,
+    DEFAULT_COMMAND_TOPIC,
+    DEFAULT_STATE_TOPIC,
+    DOMAIN,
+)
+from .coordinator import WinampCoordinator
 
 PLATFORMS = [Platform.MEDIA_PLAYER, Platform.SENSOR]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {}
+    data = {**entry.data, **entry.options}
+    coordinator = WinampCoordinator(
+        hass,
+        data.get(CONF_BASE_TOPIC, DEFAULT_BASE_TOPIC).rstrip("/"),
+        data.get(CONF_STATE_TOPIC, DEFAULT_STATE_TOPIC).strip("/"),
+        data.get(CONF_AVAILABILITY_TOPIC, DEFAULT_AVAILABILITY_TOPIC).strip("/"),
+        data.get(CONF_COMMAND_TOPIC, DEFAULT_COMMAND_TOPIC).strip("/"),
+    )
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+        "coordinator": coordinator,
+        "payload_log": coordinator.payload_log,
+    }
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    # Subscribe once the entities are listening, so retained messages reach
+    # them straight away.
+    await coordinator.async_start()
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id, None)
+        data = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if data:
+            data["coordinator"].async_stop()
     return unload_ok
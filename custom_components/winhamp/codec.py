@@ -0,0 +1,73 @@
+"""Decoding of the bridge's state and playlist payloads.
+
+The bridge publishes plain JSON by default and, when configured or asked to
+on ``<base>/cmnd/encoding``, zlib-compressed JSON (``b"\\0Z"`` + body) or
+zlib-compressed JSON whose playlist paths are split into a directory table
+(``b"\\0P"`` + body). A JSON text never starts with a NUL byte, so every
+payload is recognised by its first bytes and plain JSON keeps working.
+
+Kept free of Home Assistant imports so it can be benchmarked on its own.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any
+
+# Encodings this integration understands, most compact first; sent to the
+# bridge as a comma-separated list.
+ACCEPTED_ENCODINGS = ("prefix", "zlib", "json")
+
+_MARKER = b"\0"
+_ZLIB = b"Z"
+_PREFIX = b"P"
+_PREFIX_KEY = "$paths"
+
+
+def is_encoded(payload: bytes | str) -> bool:
+    return isinstance(payload, bytes) and payload[:1] == _MARKER
+
+
+def _prefix_decode(value: Any) -> Any:
+    """Expand ``{"$paths": [dirs, refs, names]}`` back into a list of paths."""
+    if isinstance(value, dict) and len(value) == 1 and _PREFIX_KEY in value:
+        try:
+            dirs, refs, names = value[_PREFIX_KEY]
+            return [dirs[ref] + name for ref, name in zip(refs, names, strict=True)]
+        except (TypeError, ValueError, IndexError) as err:
+            raise ValueError("malformed path table") from err
+    return value
+
+
+def decode_payload(payload: bytes | str) -> Any:
+    """Parse a state or playlist payload in any of the bridge's encodings.
+
+    Raises ValueError when the payload cannot be decoded.
+    """
+    if not is_encoded(payload):
+        return json.loads(payload)
+
+    kind = payload[1:2]
+    if kind not in (_ZLIB, _PREFIX):
+        raise ValueError(f"unknown payload format {kind!r}")
+    try:
+        text = zlib.decompress(payload[2:])
+    except zlib.error as err:
+        raise ValueError(f"corrupt compressed payload: {err}") from err
+
+    obj = json.loads(text)
+    if kind == _PREFIX:
+        obj = _prefix_decode(obj)
+        if isinstance(obj, dict):
+            obj = {key: _prefix_decode(value) for key, value in obj.items()}
+    return obj
+
+
+def describe(payload: bytes | str) -> str:
+    """Readable form of ``payload`` for logs and diagnostics."""
+    if not is_encoded(payload):
+        return payload.decode(errors="replace") if isinstance(payload, bytes) else str(payload)
+    try:
+        return json.dumps(decode_payload(payload))
+    except ValueError:
+        return f"<undecodable {len(payload)} byte payload>"
@@ -12,12 +12,16 @@ from .const import (
     CONF_AVAILABILITY_TOPIC,
     CONF_BASE_TOPIC,
     CONF_COMMAND_TOPIC,
+    CONF_OPTIMISTIC,
+    CONF_OPTIMISTIC_TIMEOUT,
     CONF_STATE_TOPIC,
     CONF_VOLUME_STEP,
     DEFAULT_AVAILABILITY_TOPIC,
     DEFAULT_BASE_TOPIC,
     DEFAULT_COMMAND_TOPIC,
     DEFAULT_NAME,
+    DEFAULT_OPTIMISTIC,
+    DEFAULT_OPTIMISTIC_TIMEOUT,
     DEFAULT_STATE_TOPIC,
     DEFAULT_VOLUME_STEP,
     DOMAIN,
@@ -31,6 +35,8 @@ def _build_schema(
     command_topic: str,
     availability_topic: str,
     volume_step: int,
+    optimistic: bool,
+    optimistic_timeout: int,
 ) -> vol.Schema:
     return vol.Schema(
         {
@@ -42,6 +48,10 @@ def _build_schema(
             vol.Optional(
                 CONF_VOLUME_STEP, default=volume_step
             ): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+            vol.Optional(CONF_OPTIMISTIC, default=optimistic): bool,
+            vol.Optional(
+                CONF_OPTIMISTIC_TIMEOUT, default=optimistic_timeout
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
         }
     )
 
@@ -87,6 +97,8 @@ class WinampConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 DEFAULT_COMMAND_TOPIC,
                 DEFAULT_AVAILABILITY_TOPIC,
                 DEFAULT_VOLUME_STEP,
+                DEFAULT_OPTIMISTIC,
+                DEFAULT_OPTIMISTIC_TIMEOUT,
             ),
         )
 
@@ -131,6 +143,8 @@ class WinampOptionsFlowHandler(config_entries.OptionsFlow):
                 current.get(CONF_COMMAND_TOPIC, DEFAULT_COMMAND_TOPIC),
                 current.get(CONF_AVAILABILITY_TOPIC, DEFAULT_AVAILABILITY_TOPIC),
                 current.get(CONF_VOLUME_STEP, DEFAULT_VOLUME_STEP),
+                current.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC),
+                current.get(CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT),
             ),
         )
 
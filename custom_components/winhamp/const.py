@@ -6,8 +6,31 @@ CONF_STATE_TOPIC = "state_topic"
 CONF_COMMAND_TOPIC = "command_topic"
 CONF_AVAILABILITY_TOPIC = "availability_topic"
 CONF_VOLUME_STEP = "volume_step"
+CONF_OPTIMISTIC = "optimistic"
+CONF_OPTIMISTIC_TIMEOUT = "optimistic_timeout"
 
 DEFAULT_STATE_TOPIC = "state"
 DEFAULT_COMMAND_TOPIC = "cmnd"
 DEFAULT_AVAILABILITY_TOPIC = "availability"
 DEFAULT_VOLUME_STEP = 5
+DEFAULT_OPTIMISTIC = True
+DEFAULT_OPTIMISTIC_TIMEOUT = 5
+
+# Fields the bridge publishes, either inside the combined state document or
+# individually on <base>/<state>/<field> when it runs in split mode.
+STATE_FIELDS = (
+    "available", "status", "title", "volume", "position", "playlist",
+    "elapsed", "duration", "elapsed_at", "tags", "art",
+)
+
+# Topic segment (under the base topic) where the bridge announces the payload
+# encodings it supports.
+CAPABILITIES_TOPIC = "capabilities"
+
+# Topic segment (under the base topic) where the bridge echoes the correlation
+# ids of commands a published state reflects. Kept out of the state topic, so
+# it never sits among the split-mode field topics.
+ACKS_TOPIC = "acks"
+
+# Topic segment (under the base topic) for the playlist delta stream.
+PLAYLIST_TOPIC = "playlist"
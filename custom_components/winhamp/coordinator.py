@@ -0,0 +1,263 @@
+"""Per-entry MQTT coordinator for the Winamp bridge.
+
+One coordinator per config entry owns the state and availability
+subscriptions, parses every message once into a :class:`WinampSnapshot`
+and tells each registered entity which of the fields it cares about
+changed, so an entity updates (and writes its state) at most once per
+message and not at all when nothing it shows changed. Commands go out
+through the coordinator too, so their round trips can be timed against the
+ids the bridge echoes on ``<base>/acks``.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field as dataclass_field
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from homeassistant.components import mqtt
+from homeassistant.components.mqtt.models import ReceiveMessage
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .codec import ACCEPTED_ENCODINGS, decode_payload
+from .const import ACKS_TOPIC, CAPABILITIES_TOPIC, STATE_FIELDS
+from .diagnostics import PayloadLog
+from .latency import LatencyTracker
+
+# Pseudo-fields dispatched alongside the state fields.
+ONLINE = "online"              # bridge availability topic
+PARSE_ERROR = "parse_error"    # last state payload was not valid JSON
+LATENCY = "command_latency"    # command round-trip summary
+
+# Commands that are not player actions and are never timed.
+_UNTRACED_COMMANDS = ("playlist_resync",)
+
+_NUMBER = (int, float)
+
+
+def _typed(field: str, value: Any) -> Any:
+    """Return ``value`` if it has the JSON type ``field`` should have, else None."""
+    if field in ("status", "title"):
+        return value if isinstance(value, str) else None
+    if field == "available":
+        return value if isinstance(value, bool) else None
+    if field == "position":
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+    if field in ("volume", "elapsed", "duration", "elapsed_at"):
+        return value if isinstance(value, _NUMBER) and not isinstance(value, bool) else None
+    if field == "playlist":
+        return value if isinstance(value, list) else None
+    if field in ("tags", "art"):
+        return value if isinstance(value, dict) else None
+    return value
+
+
+@dataclass
+class WinampSnapshot:
+    """Latest state reported by the bridge, one attribute per field."""
+
+    available: bool | None = None
+    status: str | None = None
+    title: str | None = None
+    volume: float | None = None
+    position: int | None = None
+    playlist: list[Any] | None = None
+    elapsed: float | None = None
+    duration: float | None = None
+    elapsed_at: float | None = None
+    tags: dict[str, Any] | None = None
+    art: dict[str, Any] | None = None
+    online: bool = False
+    parse_error: bool = False
+    last_message: datetime | None = None
+    command_latency: dict[str, Any] | None = None
+    # Fields reported at least once, so late listeners can catch up.
+    received: set[str] = dataclass_field(default_factory=set)
+
+
+class WinampCoordinator:
+    """Owns the entry's MQTT subscriptions and fans out changed fields."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        base_topic: str,
+        state_topic: str,
+        availability_topic: str,
+        command_topic: str,
+    ) -> None:
+        self.hass = hass
+        self.base_topic = base_topic
+        self.state_topic = state_topic
+        self.availability_topic = availability_topic
+        self.command_topic = command_topic
+        self.snapshot = WinampSnapshot()
+        self.payload_log = PayloadLog()
+        self.latency = LatencyTracker()
+        # Last retained announcement from the bridge (encodings, correlation).
+        self.capabilities: dict[str, Any] = {}
+        self._listeners: list[tuple[Callable[[set[str]], None], frozenset[str]]] = []
+        self._unsubs: list[Callable[[], None]] = []
+
+    async def async_start(self) -> None:
+        self._unsubs = [
+            # Raw bytes: the bridge may send compressed payloads.
+            await mqtt.async_subscribe(
+                self.hass,
+                f"{self.base_topic}/{self.state_topic}",
+                self._handle_state,
+                encoding=None,
+            ),
+            await mqtt.async_subscribe(
+                self.hass,
+                f"{self.base_topic}/{self.state_topic}/+",
+                self._handle_field,
+                encoding=None,
+            ),
+            await mqtt.async_subscribe(
+                self.hass,
+                f"{self.base_topic}/{self.availability_topic}",
+                self._handle_availability,
+            ),
+            await mqtt.async_subscribe(
+                self.hass,
+                f"{self.base_topic}/{CAPABILITIES_TOPIC}",
+                self._handle_capabilities,
+            ),
+            await mqtt.async_subscribe(
+                self.hass,
+                f"{self.base_topic}/{ACKS_TOPIC}",
+                self._handle_acks,
+            ),
+        ]
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+        self._listeners = []
+
+    @callback
+    def async_add_listener(
+        self, update: Callable[[set[str]], None], fields: Iterable[str]
+    ) -> Callable[[], None]:
+        """Call ``update(changed)`` whenever any of ``fields`` changes.
+
+        Returns a callable that removes the listener.
+        """
+        entry = (update, frozenset(fields))
+        self._listeners.append(entry)
+
+        @callback
+        def _remove() -> None:
+            if entry in self._listeners:
+                self._listeners.remove(entry)
+
+        return _remove
+
+    async def async_publish_command(self, command: str, payload: str | None = None) -> None:
+        """Send a command; with a bridge that echoes ids, time its round trip."""
+        if self.capabilities.get("correlation") and command not in _UNTRACED_COMMANDS:
+            payload = json.dumps(
+                {"id": self.latency.start(command), "ts": time.time(), "value": payload or ""}
+            )
+        await mqtt.async_publish(
+            self.hass, f"{self.base_topic}/{self.command_topic}/{command}", payload or ""
+        )
+
+    @callback
+    def _handle_state(self, msg: ReceiveMessage) -> None:
+        started = time.perf_counter()
+        try:
+            payload = decode_payload(msg.payload)
+            if not isinstance(payload, dict):
+                raise ValueError("state is not an object")
+        except ValueError:
+            self.payload_log.record(msg.topic, msg.payload, None)
+            self._dispatch(self._update({PARSE_ERROR: True}))
+            return
+        self.payload_log.record(msg.topic, msg.payload, (time.perf_counter() - started) * 1000)
+
+        # A bridge streaming the playlist separately leaves it out of the
+        # state, so only fields that are present are updated.
+        values = {
+            field: _typed(field, payload[field]) for field in STATE_FIELDS if field in payload
+        }
+        values[PARSE_ERROR] = False
+        self._dispatch(self._update(values))
+
+    @callback
+    def _handle_field(self, msg: ReceiveMessage) -> None:
+        """Handle one field published on its own ``<state>/<field>`` topic."""
+        field = msg.topic.rsplit("/", 1)[-1]
+        if field not in STATE_FIELDS:
+            return
+
+        started = time.perf_counter()
+        try:
+            value = decode_payload(msg.payload)
+        except ValueError:
+            self.payload_log.record(msg.topic, msg.payload, None)
+            return
+        self.payload_log.record(msg.topic, msg.payload, (time.perf_counter() - started) * 1000)
+        self._dispatch(self._update({field: _typed(field, value)}))
+
+    @callback
+    def _handle_acks(self, msg: ReceiveMessage) -> None:
+        """Time the commands whose correlation ids the bridge acknowledged."""
+        try:
+            ids = json.loads(msg.payload)
+        except ValueError:
+            return
+        if isinstance(ids, list) and self.latency.acknowledge(ids):
+            self._dispatch(self._update({LATENCY: self.latency.summary()}))
+
+    @callback
+    def _handle_availability(self, msg: ReceiveMessage) -> None:
+        payload = msg.payload.decode() if isinstance(msg.payload, bytes) else str(msg.payload)
+        self._dispatch(self._update({ONLINE: payload.strip().lower() == "online"}))
+
+    @callback
+    def _handle_capabilities(self, msg: ReceiveMessage) -> None:
+        """Ask a negotiating bridge for the most compact encoding we share."""
+        try:
+            capabilities = json.loads(msg.payload)
+            offered = capabilities["encodings"]
+        except (ValueError, TypeError, KeyError):
+            return
+        self.capabilities = capabilities
+        if not capabilities.get("negotiable") or not isinstance(offered, list):
+            return
+        preferred = next((name for name in ACCEPTED_ENCODINGS if name in offered), None)
+        if preferred is None or capabilities.get("encoding") == preferred:
+            return
+        self.hass.async_create_task(
+            mqtt.async_publish(
+                self.hass,
+                f"{self.base_topic}/{self.command_topic}/encoding",
+                ",".join(ACCEPTED_ENCODINGS),
+            )
+        )
+
+    def _update(self, values: dict[str, Any]) -> set[str]:
+        """Store ``values`` in the snapshot; return the fields that changed."""
+        snapshot = self.snapshot
+        snapshot.last_message = dt_util.utcnow()
+        changed = set()
+        for field, value in values.items():
+            if field not in snapshot.received or getattr(snapshot, field) != value:
+                setattr(snapshot, field, value)
+                changed.add(field)
+        snapshot.received.update(values)
+        return changed
+
+    def _dispatch(self, changed: set[str]) -> None:
+        if not changed:
+            return
+        for update, fields in list(self._listeners):
+            relevant = changed & fields
+            if relevant:
+                update(relevant)
@@ -0,0 +1,103 @@
+"""Diagnostics for the Winamp MQTT integration.
+
+Recent raw payloads are kept in a bounded in-memory ring buffer instead of
+entity attributes, so they never reach the recorder or the frontend; they
+are only read when the user downloads the config entry diagnostics.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .codec import describe
+from .const import DOMAIN
+
+# Payloads kept per config entry, and how much of each one is stored.
+PAYLOAD_LOG_SIZE = 50
+PAYLOAD_LOG_MAX_CHARS = 16384
+
+# Window used for the message rate.
+_RATE_WINDOW = 60.0
+
+
+class PayloadLog:
+    """Ring buffer of recent MQTT payloads with their parse timings."""
+
+    def __init__(self, size: int = PAYLOAD_LOG_SIZE, max_chars: int = PAYLOAD_LOG_MAX_CHARS) -> None:
+        self._records: deque[dict[str, Any]] = deque(maxlen=size)
+        self._times: deque[float] = deque()
+        self._max_chars = max_chars
+        self.messages = 0
+        self.last_size: int | None = None
+        self.last_parse_ms: float | None = None
+
+    def record(self, topic: str, payload: str | bytes, parse_ms: float | None) -> None:
+        now = time.monotonic()
+
+        self.messages += 1
+        self.last_size = len(payload)
+        self.last_parse_ms = parse_ms
+        self._times.append(now)
+        while self._times and now - self._times[0] > _RATE_WINDOW:
+            self._times.popleft()
+
+        self._records.append(
+            {
+                "received": dt_util.utcnow().isoformat(),
+                "topic": topic,
+                "size": len(payload),
+                "parse_ms": parse_ms,
+                # Kept as received; compressed payloads are only expanded
+                # when the diagnostics are downloaded.
+                "payload": payload,
+            }
+        )
+
+    @property
+    def rate_per_minute(self) -> int:
+        """Messages received during the last minute."""
+        now = time.monotonic()
+        return sum(1 for stamp in self._times if now - stamp <= _RATE_WINDOW)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "messages_per_minute": self.rate_per_minute,
+            "last_payload_size": self.last_size,
+            "last_parse_ms": self.last_parse_ms,
+        }
+
+    def as_list(self) -> list[dict[str, Any]]:
+        records = []
+        for record in self._records:
+            text = describe(record["payload"])
+            records.append(
+                {
+                    **record,
+                    "payload": text[: self._max_chars],
+                    "truncated": len(text) > self._max_chars,
+                }
+            )
+        return records
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the entry's configuration and the recent payloads."""
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+    log: PayloadLog | None = data.get("payload_log")
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "summary": log.summary() if log else None,
+        "payloads": log.as_list() if log else [],
+    }
@@ -0,0 +1,105 @@
+"""Command round-trip tracking for the Winamp media player.
+
+Every command sent to a bridge that supports correlation carries an id;
+the bridge echoes the ids a state publish covers on ``<base>/acks``.
+The time between sending and seeing the id come back is the round trip a
+user experiences from pressing a button to Home Assistant showing the
+result.
+
+Kept free of Home Assistant imports, like playlist.py and codec.py.
+"""
+from __future__ import annotations
+
+import math
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Iterable
+
+# Round trips kept for the percentiles.
+LATENCY_WINDOW = 200
+# Commands not acknowledged within this many seconds count as lost.
+LATENCY_TIMEOUT = 60.0
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyTracker:
+    """Pending command ids and a window of recent round-trip times."""
+
+    def __init__(
+        self,
+        window: int = LATENCY_WINDOW,
+        timeout: float = LATENCY_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._pending: dict[str, tuple[str, float]] = {}
+        self._samples: deque[float] = deque(maxlen=window)
+        self._timeout = timeout
+        self._clock = clock
+        self.acknowledged = 0
+        self.lost = 0
+        self.last_ms: float | None = None
+        self.last_command: str | None = None
+
+    def start(self, command: str) -> str:
+        """Register a command about to be sent; return its correlation id."""
+        self._expire()
+        correlation_id = uuid.uuid4().hex[:12]
+        self._pending[correlation_id] = (command, self._clock())
+        return correlation_id
+
+    def acknowledge(self, ids: Iterable[Any]) -> bool:
+        """Record the round trip of every known id; True if any matched."""
+        now = self._clock()
+        matched = False
+        for correlation_id in ids:
+            if not isinstance(correlation_id, str):
+                continue
+            pending = self._pending.pop(correlation_id, None)
+            if pending is None:
+                # Someone else's command, or one already timed out.
+                continue
+            command, sent = pending
+            self.last_ms = (now - sent) * 1000
+            self.last_command = command
+            self._samples.append(self.last_ms)
+            self.acknowledged += 1
+            matched = True
+        return matched
+
+    def _expire(self) -> None:
+        deadline = self._clock() - self._timeout
+        for correlation_id, (_, sent) in list(self._pending.items()):
+            if sent < deadline:
+                del self._pending[correlation_id]
+                self.lost += 1
+
+    def percentile(self, percent: float) -> float | None:
+        """Nearest-rank percentile of the recent round trips, in ms."""
+        return _nearest_rank(sorted(self._samples), percent)
+
+    def summary(self) -> dict[str, Any]:
+        self._expire()
+        ordered = sorted(self._samples)
+        summary: dict[str, Any] = {}
+        for percent in PERCENTILES:
+            value = _nearest_rank(ordered, percent)
+            summary[f"p{percent}_ms"] = None if value is None else round(value, 1)
+        summary.update(
+            {
+                "samples": len(ordered),
+                "acknowledged": self.acknowledged,
+                "pending": len(self._pending),
+                "lost": self.lost,
+                "last_ms": None if self.last_ms is None else round(self.last_ms, 1),
+                "last_command": self.last_command,
+            }
+        )
+        return summary
+
+
+def _nearest_rank(ordered: list[float], percent: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
@@ -1,31 +1,65 @@
 from __future__ import annotations
 
-import json
-from typing import Callable
+import asyncio
+import hashlib
+import time
+from datetime import datetime
+from pathlib import PureWindowsPath
+from typing import Any, Callable, Iterable
 
 from homeassistant.components import mqtt
 from homeassistant.components.mqtt.models import ReceiveMessage
-from homeassistant.components.media_player import MediaPlayerEntity, MediaPlayerEntityFeature, MediaPlayerState
+from homeassistant.components.media_player import (
+    ATTR_INPUT_SOURCE,
+    ATTR_MEDIA_ALBUM_NAME,
+    ATTR_MEDIA_ARTIST,
+    ATTR_MEDIA_DURATION,
+    ATTR_MEDIA_POSITION,
+    ATTR_MEDIA_POSITION_UPDATED_AT,
+    ATTR_MEDIA_TITLE,
+    ATTR_MEDIA_TRACK,
+    ATTR_MEDIA_VOLUME_LEVEL,
+    BrowseMedia,
+    MediaClass,
+    MediaPlayerEntity,
+    MediaPlayerEntityFeature,
+    MediaPlayerState,
+    MediaType,
+)
+from homeassistant.components.media_player.errors import BrowseError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_NAME
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.util import dt as dt_util
 
 from .const import (
     CONF_AVAILABILITY_TOPIC,
     CONF_BASE_TOPIC,
     CONF_COMMAND_TOPIC,
+    CONF_OPTIMISTIC,
+    CONF_OPTIMISTIC_TIMEOUT,
     CONF_STATE_TOPIC,
     CONF_VOLUME_STEP,
     DEFAULT_AVAILABILITY_TOPIC,
     DEFAULT_BASE_TOPIC,
     DEFAULT_COMMAND_TOPIC,
     DEFAULT_NAME,
+    DEFAULT_OPTIMISTIC,
+    DEFAULT_OPTIMISTIC_TIMEOUT,
     DEFAULT_STATE_TOPIC,
     DEFAULT_VOLUME_STEP,
     DOMAIN,
+    PLAYLIST_TOPIC,
+    STATE_FIELDS,
 )
+from .codec import decode_payload
+from .coordinator import ONLINE, WinampCoordinator
+from .playlist import PlaylistStore
 
 
 async def async_setup_entry(
@@ -42,51 +76,116 @@ async def async_setup_entry(
         CONF_AVAILABILITY_TOPIC, DEFAULT_AVAILABILITY_TOPIC
     ).strip("/")
     volume_step: int = data.get(CONF_VOLUME_STEP, DEFAULT_VOLUME_STEP)
+    optimistic: bool = data.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC)
+    optimistic_timeout: int = data.get(CONF_OPTIMISTIC_TIMEOUT, DEFAULT_OPTIMISTIC_TIMEOUT)
+    coordinator: WinampCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
     async_add_entities(
         [
             WinampMqttMediaPlayer(
                 hass,
+                coordinator,
                 name,
                 base_topic,
                 state_topic,
                 command_topic,
                 availability_topic,
                 volume_step,
+                optimistic,
+                optimistic_timeout,
             )
         ]
     )
 
 
-class WinampMqttMediaPlayer(MediaPlayerEntity):
+# Entity attribute behind each field that supports optimistic updates.
+_OPTIMISTIC_ATTRS = {
+    "status": "_status",
+    "volume": "_volume",
+    "position": "_playlist_position",
+}
+
+# How long to wait for a retained playlist page after subscribing to it.
+_PAGE_FETCH_TIMEOUT = 10
+
+# Media browser layout: tracks are listed _BROWSE_LEAF_SIZE at a time, and
+# ranges are nested so no level has more than _BROWSE_FANOUT children.
+_BROWSE_LEAF_SIZE = 100
+_BROWSE_FANOUT = 50
+_BROWSE_ROOT = "winamp:playlist"
+_BROWSE_RANGE = "winamp:range:"
+_BROWSE_TRACK = "winamp:track:"
+
+# Volume goes through Winamp's 0-255 scale, so the confirmed level can be off
+# by a step from the one we asked for.
+_VOLUME_TOLERANCE = 0.015
+
+
+class WinampMqttMediaPlayer(MediaPlayerEntity, RestoreEntity):
     _attr_should_poll = False
 
     def __init__(
         self,
         hass: HomeAssistant,
+        coordinator: WinampCoordinator,
         name: str,
         base_topic: str,
         state_topic: str,
         command_topic: str,
         availability_topic: str,
         volume_step: int,
+        optimistic: bool = DEFAULT_OPTIMISTIC,
+        optimistic_timeout: int = DEFAULT_OPTIMISTIC_TIMEOUT,
     ) -> None:
         self.hass = hass
+        self._coordinator = coordinator
         self._attr_name = name
         self._base_topic = base_topic
         self._state_topic = state_topic
         self._command_topic = command_topic
         self._availability_topic = availability_topic
         self._volume_step = max(1, min(50, int(volume_step)))
+        self._optimistic = bool(optimistic)
+        self._optimistic_timeout = max(1, int(optimistic_timeout))
+        # field -> (optimistic value, monotonic expiry) for unconfirmed commands
+        self._pending: dict[str, tuple[Any, float]] = {}
+        # field -> last value reported by the bridge, restored on rollback
+        self._confirmed: dict[str, Any] = {}
+        self._expiry_unsub: Callable[[], None] | None = None
         self._status: MediaPlayerState | None = None
         self._title: str | None = None
         self._volume: float | None = None
-        self._playlist: list[str] | None = None
+        self._playlist: PlaylistStore | None = None
         self._playlist_position: int | None = None
+        # Playback clock as published by the bridge: elapsed seconds at the
+        # wall-clock time elapsed_at; HA interpolates from there.
+        self._elapsed: float | None = None
+        self._duration: float | None = None
+        self._elapsed_at: datetime | None = None
+        # Tags of the current track read from the file by the bridge.
+        self._tags: dict[str, Any] = {}
+        # Artwork served by the bridge; the URL embeds the image's hash.
+        self._art_url: str | None = None
+        self._art_hash: str | None = None
+        self._playlist_epoch: int | None = None
+        self._playlist_seq: int | None = None
+        self._resync_pending = False
+        # Paged playlist: the bridge's manifest and the pages loaded so far,
+        # each store's digest being the page hash from the manifest.
+        self._manifest: dict[str, Any] | None = None
+        self._pages: dict[int, PlaylistStore] = {}
+        self._page_task: asyncio.Task | None = None
+        self._page_lock = asyncio.Lock()
+        self._manifest_unsub: Callable[[], None] | None = None
         self._available_flag: bool | None = None
         self._availability_online = False
-        self._state_unsub: Callable[[], None] | None = None
-        self._availability_unsub: Callable[[], None] | None = None
+        # State restored from before a restart, shown (and marked stale) until
+        # the coordinator reports anything.
+        self._stale = False
+        self._restored_source: str | None = None
+        self._coordinator_unsub: Callable[[], None] | None = None
+        self._snapshot_unsub: Callable[[], None] | None = None
+        self._delta_unsub: Callable[[], None] | None = None
         self._attr_supported_features = (
             MediaPlayerEntityFeature.PLAY
             | MediaPlayerEntityFeature.PAUSE
@@ -97,29 +196,63 @@ class WinampMqttMediaPlayer(MediaPlayerEntity):
             | MediaPlayerEntityFeature.VOLUME_STEP
             | MediaPlayerEntityFeature.TURN_ON
             | MediaPlayerEntityFeature.TURN_OFF
-            | MediaPlayerEntityFeature.SELECT_SOURCE
+            | MediaPlayerEntityFeature.SEEK
+            | MediaPlayerEntityFeature.BROWSE_MEDIA
+            | MediaPlayerEntityFeature.PLAY_MEDIA
         )
 
     async def async_added_to_hass(self) -> None:
-        self._state_unsub = await mqtt.async_subscribe(
+        # State and availability come parsed from the entry's coordinator;
+        # the playlist streams are only used here and stay subscribed
+        # directly.
+        fields = (*STATE_FIELDS, ONLINE)
+        if not self._coordinator.snapshot.received.intersection(fields):
+            last_state = await self.async_get_last_state()
+            if last_state is not None:
+                self._restore(last_state)
+        self._coordinator_unsub = self._coordinator.async_add_listener(
+            self._handle_coordinator_update, fields
+        )
+        received = self._coordinator.snapshot.received.intersection(fields)
+        if received:
+            self._handle_coordinator_update(received)
+        self._snapshot_unsub = await mqtt.async_subscribe(
             self.hass,
-            f"{self._base_topic}/{self._state_topic}",
-            self._handle_state_message,
+            f"{self._base_topic}/{PLAYLIST_TOPIC}/snapshot",
+            self._handle_playlist_snapshot,
+            encoding=None,
         )
-        self._availability_unsub = await mqtt.async_subscribe(
+        self._delta_unsub = await mqtt.async_subscribe(
             self.hass,
-            f"{self._base_topic}/{self._availability_topic}",
-            self._handle_availability,
+            f"{self._base_topic}/{PLAYLIST_TOPIC}/delta",
+            self._handle_playlist_delta,
+            encoding=None,
+        )
+        self._manifest_unsub = await mqtt.async_subscribe(
+            self.hass,
+            f"{self._base_topic}/{PLAYLIST_TOPIC}/manifest",
+            self._handle_playlist_manifest,
+            encoding=None,
         )
 
     async def async_will_remove_from_hass(self) -> None:
-        if self._state_unsub:
-            self._state_unsub()
-        if self._availability_unsub:
-            self._availability_unsub()
+        if self._page_task:
+            self._page_task.cancel()
+        if self._manifest_unsub:
+            self._manifest_unsub()
+        if self._coordinator_unsub:
+            self._coordinator_unsub()
+        if self._snapshot_unsub:
+            self._snapshot_unsub()
+        if self._delta_unsub:
+            self._delta_unsub()
+        if self._expiry_unsub:
+            self._expiry_unsub()
 
     @property
     def available(self) -> bool:
+        if self._stale:
+            return True
         if self._available_flag is None:
             return self._availability_online
         return self._availability_online and self._available_flag
@@ -130,23 +263,63 @@ class WinampMqttMediaPlayer(MediaPlayerEntity):
 
     @property
     def media_title(self) -> str | None:
-        return self._title
+        return self._tags.get("title") or self._title
 
     @property
-    def volume_level(self) -> float | None:
-        return self._volume
+    def media_artist(self) -> str | None:
+        return self._tags.get("artist")
 
     @property
-    def source_list(self) -> list[str] | None:
-        return self._playlist
+    def media_album_name(self) -> str | None:
+        return self._tags.get("album")
+
+    @property
+    def media_track(self) -> int | None:
+        return self._tags.get("track")
+
+    @property
+    def media_image_url(self) -> str | None:
+        return self._art_url
+
+    @property
+    def media_image_hash(self) -> str | None:
+        # HA keys its image cache on this, so the image is only fetched again
+        # when the artwork itself changes, not on every track change.
+        return self._art_hash
+
+    @property
+    def media_position(self) -> float | None:
+        return self._elapsed
+
+    @property
+    def media_duration(self) -> float | None:
+        # Winamp reports the length once a track is playing; fall back to the
+        # tags while it is stopped.
+        if self._duration is not None:
+            return self._duration
+        return self._tags.get("duration")
+
+    @property
+    def media_position_updated_at(self) -> datetime | None:
+        return self._elapsed_at
+
+    @property
+    def volume_level(self) -> float | None:
+        return self._volume
 
     @property
     def source(self) -> str | None:
-        if self._playlist is None or self._playlist_position is None:
+        # The playlist itself is only offered through the media browser; as a
+        # state attribute it would be written on every update.
+        if self._stale:
+            return self._restored_source
+        if self._playlist_position is None:
             return None
-        if 0 <= self._playlist_position < len(self._playlist):
-            return self._playlist[self._playlist_position]
-        return None
+        return self._playlist_entry(self._playlist_position)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return {"stale": True} if self._stale else None
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -158,62 +331,382 @@ class WinampMqttMediaPlayer(MediaPlayerEntity):
         )
 
     @callback
-    def _handle_state_message(self, msg: ReceiveMessage) -> None:
+    def _handle_coordinator_update(self, changed: set[str]) -> None:
+        """Apply the fields the coordinator reports as changed, then write once."""
+        snapshot = self._coordinator.snapshot
+        self._stale = False
+        for field in changed:
+            if field == ONLINE:
+                self._availability_online = snapshot.online
+            else:
+                self._apply_field(field, getattr(snapshot, field))
+        self.async_write_ha_state()
+
+    def _apply_field(self, field: str, value: Any) -> None:
+        if field == "status":
+            if value == "playing":
+                self._set_confirmed(field, MediaPlayerState.PLAYING)
+            elif value == "paused":
+                self._set_confirmed(field, MediaPlayerState.PAUSED)
+            elif value in ("idle", "off"):
+                self._set_confirmed(field, MediaPlayerState.IDLE)
+            else:
+                self._set_confirmed(field, None)
+        elif field == "title":
+            self._title = value or None
+        elif field == "volume":
+            if isinstance(value, (int, float)):
+                self._set_confirmed(field, max(0.0, min(1.0, float(value) / 100.0)))
+            else:
+                self._set_confirmed(field, None)
+        elif field == "available":
+            if isinstance(value, bool):
+                self._available_flag = value
+        elif field == "playlist":
+            if isinstance(value, list):
+                self._replace_playlist(value)
+            else:
+                self._playlist = None
+        elif field == "position":
+            self._set_confirmed(field, value if isinstance(value, int) else None)
+            self._load_current_page()
+        elif field == "elapsed":
+            self._elapsed = float(value) if isinstance(value, (int, float)) else None
+        elif field == "duration":
+            self._duration = float(value) if isinstance(value, (int, float)) else None
+        elif field == "tags":
+            self._tags = _parse_tags(value)
+        elif field == "art":
+            if isinstance(value, dict) and value.get("url") and value.get("hash"):
+                self._art_url = str(value["url"])
+                self._art_hash = str(value["hash"])
+            else:
+                self._art_url = None
+                self._art_hash = None
+        elif field == "elapsed_at":
+            if isinstance(value, (int, float)):
+                self._elapsed_at = dt_util.utc_from_timestamp(value)
+            else:
+                self._elapsed_at = None
+
+    @callback
+    def _restore(self, last_state: State) -> None:
+        """Show the state saved before Home Assistant restarted, marked stale."""
         try:
-            payload = json.loads(msg.payload)
-        except json.JSONDecodeError:
+            status = MediaPlayerState(last_state.state)
+        except ValueError:
+            # unavailable or unknown: nothing worth showing.
             return
+        attrs = last_state.attributes
+        self._status = status
+        volume = attrs.get(ATTR_MEDIA_VOLUME_LEVEL)
+        if isinstance(volume, (int, float)):
+            self._volume = float(volume)
+        self._tags = _parse_tags(
+            {
+                "title": attrs.get(ATTR_MEDIA_TITLE),
+                "artist": attrs.get(ATTR_MEDIA_ARTIST),
+                "album": attrs.get(ATTR_MEDIA_ALBUM_NAME),
+                "track": attrs.get(ATTR_MEDIA_TRACK),
+                "duration": attrs.get(ATTR_MEDIA_DURATION),
+            }
+        )
+        self._duration = self._tags.get("duration")
+        position = attrs.get(ATTR_MEDIA_POSITION)
+        updated_at = attrs.get(ATTR_MEDIA_POSITION_UPDATED_AT)
+        if isinstance(updated_at, str):
+            updated_at = dt_util.parse_datetime(updated_at)
+        if isinstance(position, (int, float)) and isinstance(updated_at, datetime):
+            self._elapsed = float(position)
+            self._elapsed_at = updated_at
+        source = attrs.get(ATTR_INPUT_SOURCE)
+        self._restored_source = source if isinstance(source, str) else None
+        self._stale = True
 
-        status = payload.get("status")
-        if status == "playing":
-            self._status = MediaPlayerState.PLAYING
-        elif status == "paused":
-            self._status = MediaPlayerState.PAUSED
-        elif status in ("idle", "off"):
-            self._status = MediaPlayerState.IDLE
-        else:
-            self._status = None
+    @callback
+    def _replace_playlist(self, items: list[Any]) -> None:
+        """Replace the playlist.
+
+        Cheap even for the retained playlist arriving while Home Assistant
+        starts: the store keeps the list as it is and only packs it when a
+        lookup needs it.
+        """
+        if self._playlist is None:
+            self._playlist = PlaylistStore()
+        self._manifest = None
+        # Usually the same playlist as last time; the store notices and
+        # leaves itself alone.
+        self._playlist.replace(items)
+
+    def _set_confirmed(self, field: str, value: Any) -> None:
+        """Store a value reported by the bridge, reconciling optimistic ones.
+
+        While a command is unconfirmed and not yet expired, reports that
+        disagree with it are treated as stale and do not replace the
+        optimistic value; a matching report confirms it.
+        """
+        self._confirmed[field] = value
+        pending = self._pending.get(field)
+        if pending is not None:
+            expected, expiry = pending
+            if _same_value(field, value, expected):
+                del self._pending[field]
+            elif time.monotonic() < expiry:
+                return
+            else:
+                del self._pending[field]
+        setattr(self, _OPTIMISTIC_ATTRS[field], value)
 
-        self._title = payload.get("title") or None
+    @callback
+    def _set_optimistic(self, field: str, value: Any) -> None:
+        """Show the expected result of a command before the bridge confirms it."""
+        if not self._optimistic:
+            return
 
-        volume = payload.get("volume")
-        if isinstance(volume, (int, float)):
-            self._volume = max(0.0, min(1.0, float(volume) / 100.0))
-        else:
-            self._volume = None
+        if field not in self._pending:
+            self._confirmed.setdefault(field, getattr(self, _OPTIMISTIC_ATTRS[field]))
+        self._pending[field] = (value, time.monotonic() + self._optimistic_timeout)
+        setattr(self, _OPTIMISTIC_ATTRS[field], value)
 
-        available_value = payload.get("available")
-        if isinstance(available_value, bool):
-            self._available_flag = available_value
+        if self._expiry_unsub:
+            self._expiry_unsub()
+        self._expiry_unsub = async_call_later(
+            self.hass, self._optimistic_timeout, self._async_expire_pending
+        )
+        self.async_write_ha_state()
 
-        playlist = payload.get("playlist")
-        if isinstance(playlist, list):
-            self._playlist = [str(item) for item in playlist]
-        else:
-            self._playlist = None
+    @callback
+    def _async_expire_pending(self, _now: datetime) -> None:
+        """Roll back optimistic values the bridge never confirmed."""
+        self._expiry_unsub = None
+        now = time.monotonic()
+        expired = [field for field, (_, expiry) in self._pending.items() if expiry <= now]
+        for field in expired:
+            del self._pending[field]
+            setattr(self, _OPTIMISTIC_ATTRS[field], self._confirmed.get(field))
+
+        if self._pending:
+            delay = min(expiry for _, expiry in self._pending.values()) - now
+            self._expiry_unsub = async_call_later(
+                self.hass, max(delay, 0.1), self._async_expire_pending
+            )
+        if expired:
+            self.async_write_ha_state()
 
-        position = payload.get("position")
-        if isinstance(position, int):
-            self._playlist_position = position
-        else:
-            self._playlist_position = None
+    @callback
+    def _handle_playlist_snapshot(self, msg: ReceiveMessage) -> None:
+        try:
+            payload = decode_payload(msg.payload)
+        except ValueError:
+            return
+        if not isinstance(payload, dict):
+            return
+
+        items = payload.get("items")
+        if not isinstance(items, list):
+            return
 
+        self._replace_playlist(items)
+        self._playlist_epoch = payload.get("epoch")
+        self._playlist_seq = payload.get("seq")
+        self._resync_pending = False
         self.async_write_ha_state()
 
     @callback
-    def _handle_availability(self, msg: ReceiveMessage) -> None:
-        payload = _payload_to_str(msg.payload)
-        self._availability_online = payload.strip().lower() == "online"
+    def _handle_playlist_delta(self, msg: ReceiveMessage) -> None:
+        try:
+            payload = decode_payload(msg.payload)
+        except ValueError:
+            return
+        if not isinstance(payload, dict):
+            return
+
+        seq = payload.get("seq")
+        if not isinstance(seq, int):
+            return
+
+        if (
+            self._playlist is not None
+            and isinstance(self._playlist_seq, int)
+            and payload.get("epoch") == self._playlist_epoch
+        ):
+            if seq <= self._playlist_seq:
+                # Already covered by the snapshot we hold.
+                return
+            # Edited in place, so a delta costs what its ops cost. Ops that
+            # do not fit leave it half-edited, but the resync below replaces
+            # it anyway.
+            if seq == self._playlist_seq + 1 and _apply_playlist_ops(
+                self._playlist.edit(), payload.get("ops"), payload.get("length")
+            ):
+                self._playlist_seq = seq
+                self.async_write_ha_state()
+                return
+
+        # Missed a delta, the bridge restarted or the ops did not fit our copy.
+        self._request_playlist_resync()
+
+    @callback
+    def _handle_playlist_manifest(self, msg: ReceiveMessage) -> None:
+        try:
+            manifest = decode_payload(msg.payload)
+        except ValueError:
+            return
+        if not isinstance(manifest, dict):
+            return
+
+        hashes = manifest.get("pages")
+        if not isinstance(hashes, list) or not isinstance(manifest.get("length"), int):
+            return
+
+        self._manifest = manifest
+        self._resync_pending = False
+        self._playlist = None
+        # Keep the pages whose hash still matches; the rest is fetched when
+        # the media browser (or the current track) needs it.
+        self._pages = {
+            number: page
+            for number, page in self._pages.items()
+            if number < len(hashes) and page.digest == hashes[number]
+        }
+        self._load_current_page()
         self.async_write_ha_state()
 
+    @callback
+    def _load_current_page(self) -> None:
+        """Fetch the page holding the current track, for ``source``."""
+        if self._manifest is None or self._playlist_position is None:
+            return
+        number = self._playlist_position // (self._manifest.get("page_size") or 1)
+        if number in self._pages or number >= len(self._manifest["pages"]):
+            return
+        if self._page_task is None or self._page_task.done():
+            self._page_task = self.hass.async_create_task(
+                self._async_load_pages([number], write_state=True)
+            )
+
+    async def _async_load_pages(self, numbers: Iterable[int], write_state: bool = False) -> None:
+        """Fetch the given pages that are not loaded yet, one at a time."""
+        async with self._page_lock:
+            for number in numbers:
+                if self._manifest is None:
+                    return
+                if number in self._pages or number >= len(self._manifest["pages"]):
+                    continue
+
+                page = await self._async_fetch_page(number)
+                hashes = self._manifest["pages"] if self._manifest else []
+                if page is None:
+                    # The retained page is missing; have the bridge republish.
+                    self._request_playlist_resync()
+                    return
+                if number >= len(hashes) or hashes[number] != page.digest:
+                    # The page is newer than our manifest; the bridge publishes
+                    # a manifest after the pages it covers.
+                    return
+                self._pages[number] = page
+
+        if write_state:
+            self.async_write_ha_state()
+
+    async def _async_fetch_page(self, number: int) -> PlaylistStore | None:
+        """Read one retained page by subscribing to it just long enough."""
+        received: asyncio.Future = self.hass.loop.create_future()
+
+        @callback
+        def _handle_page(msg: ReceiveMessage) -> None:
+            if not received.done():
+                received.set_result(msg.payload)
+
+        unsub = await mqtt.async_subscribe(
+            self.hass,
+            f"{self._base_topic}/{PLAYLIST_TOPIC}/page/{number}",
+            _handle_page,
+            encoding=None,
+        )
+        try:
+            payload = await asyncio.wait_for(received, _PAGE_FETCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            unsub()
+
+        raw = payload.encode("utf-8") if isinstance(payload, str) else payload
+        try:
+            items = decode_payload(raw).get("items")
+        except (ValueError, AttributeError):
+            return None
+        if not isinstance(items, list):
+            return None
+        page = PlaylistStore()
+        page.replace(items, hashlib.sha1(raw).hexdigest()[:16])
+        return page
+
+    def _playlist_length(self) -> int:
+        if self._manifest is not None:
+            return self._manifest["length"]
+        return len(self._playlist) if self._playlist is not None else 0
+
+    def _playlist_entry(self, index: int) -> str | None:
+        """Return a loaded playlist entry, or None if it is not loaded (yet)."""
+        if self._manifest is not None:
+            page_size = self._manifest.get("page_size") or 1
+            page = self._pages.get(index // page_size)
+            if page is None or not 0 <= index % page_size < len(page):
+                return None
+            return page[index % page_size]
+        if self._playlist is not None and 0 <= index < len(self._playlist):
+            return self._playlist[index]
+        return None
+
+    async def _async_playlist_slice(self, start: int, end: int) -> list[str | None]:
+        """Return entries ``start:end``, fetching the pages they live on."""
+        if self._manifest is None:
+            return self._playlist.slice(start, end) if self._playlist is not None else []
+        page_size = self._manifest.get("page_size") or 1
+        await self._async_load_pages(range(start // page_size, (end - 1) // page_size + 1))
+        return [self._playlist_entry(index) for index in range(start, end)]
+
+    def _find_entry(self, entry: str) -> int | None:
+        """Return the index of ``entry`` nearest the current track.
+
+        A paged playlist is only searched in the pages already loaded;
+        fetching every page to find one entry would undo the paging.
+        """
+        position = self._playlist_position
+        if self._manifest is None:
+            return self._playlist.nearest(entry, position) if self._playlist else None
+
+        page_size = self._manifest.get("page_size") or 1
+        found = [
+            number * page_size + index
+            for number, page in sorted(self._pages.items())
+            for index in page.indices(entry)
+        ]
+        if not found:
+            return None
+        if position is None:
+            return found[0]
+        return min(found, key=lambda index: (abs(index - position), index))
+
+    @callback
+    def _request_playlist_resync(self) -> None:
+        if self._resync_pending:
+            return
+        self._resync_pending = True
+        self.hass.async_create_task(self._publish_command("playlist_resync"))
+
     async def async_media_play(self) -> None:
         await self._publish_command("play")
+        self._set_optimistic("status", MediaPlayerState.PLAYING)
 
     async def async_media_pause(self) -> None:
         await self._publish_command("pause")
+        self._set_optimistic("status", MediaPlayerState.PAUSED)
 
     async def async_media_stop(self) -> None:
         await self._publish_command("stop")
+        self._set_optimistic("status", MediaPlayerState.IDLE)
 
     async def async_media_next_track(self) -> None:
         await self._publish_command("next")
@@ -226,9 +719,11 @@ class WinampMqttMediaPlayer(MediaPlayerEntity):
 
     async def async_turn_on(self) -> None:
         await self._publish_command("play")
+        self._set_optimistic("status", MediaPlayerState.PLAYING)
 
     async def async_turn_off(self) -> None:
         await self._publish_command("stop")
+        self._set_optimistic("status", MediaPlayerState.IDLE)
 
     async def async_volume_up(self) -> None:
         await self._publish_volume_delta(self._volume_step)
@@ -239,17 +734,107 @@ class WinampMqttMediaPlayer(MediaPlayerEntity):
     async def async_set_volume_level(self, volume: float) -> None:
         percent = max(0, min(100, int(volume * 100)))
         await self._publish_command("volume", str(percent))
+        self._set_optimistic("volume", percent / 100.0)
 
-    async def async_select_source(self, source: str) -> None:
-        if not self._playlist:
-            return
+    async def async_browse_media(
+        self,
+        media_content_type: MediaType | str | None = None,
+        media_content_id: str | None = None,
+    ) -> BrowseMedia:
+        length = self._playlist_length()
+        if not media_content_id or media_content_id == _BROWSE_ROOT:
+            return await self._async_browse_range(0, length, root=True)
+
+        if media_content_id.startswith(_BROWSE_RANGE):
+            try:
+                start, end = (int(part) for part in media_content_id[len(_BROWSE_RANGE):].split(":"))
+            except ValueError as err:
+                raise BrowseError(f"Invalid media id {media_content_id}") from err
+            if 0 <= start < end <= length:
+                return await self._async_browse_range(start, end)
+
+        raise BrowseError(f"Media not found: {media_content_id}")
+
+    async def _async_browse_range(self, start: int, end: int, root: bool = False) -> BrowseMedia:
+        """Browse entries ``start:end``: nested ranges, or tracks once small enough."""
+        span = _BROWSE_LEAF_SIZE
+        while (end - start) > span * _BROWSE_FANOUT:
+            span *= _BROWSE_FANOUT
+
+        if end - start <= _BROWSE_LEAF_SIZE:
+            entries = await self._async_playlist_slice(start, end)
+            children = [
+                BrowseMedia(
+                    media_class=MediaClass.TRACK,
+                    media_content_id=f"{_BROWSE_TRACK}{index}",
+                    media_content_type=MediaType.TRACK,
+                    title=f"{index + 1}. {_entry_title(entry)}",
+                    can_play=True,
+                    can_expand=False,
+                )
+                for index, entry in zip(range(start, end), entries)
+            ]
+        else:
+            children = [
+                BrowseMedia(
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_id=f"{_BROWSE_RANGE}{first}:{min(first + span, end)}",
+                    media_content_type=MediaType.PLAYLIST,
+                    title=f"{first + 1}–{min(first + span, end)}",
+                    can_play=False,
+                    can_expand=True,
+                )
+                for first in range(start, end, span)
+            ]
+
+        return BrowseMedia(
+            media_class=MediaClass.PLAYLIST if root else MediaClass.DIRECTORY,
+            media_content_id=_BROWSE_ROOT if root else f"{_BROWSE_RANGE}{start}:{end}",
+            media_content_type=MediaType.PLAYLIST,
+            title=self._attr_name if root else f"{start + 1}–{end}",
+            can_play=False,
+            can_expand=True,
+            children=children,
+            children_media_class=MediaClass.TRACK
+            if end - start <= _BROWSE_LEAF_SIZE
+            else MediaClass.DIRECTORY,
+        )
 
-        try:
-            index = self._playlist.index(source)
-        except ValueError:
+    async def async_play_media(
+        self, media_type: MediaType | str, media_id: str, **kwargs: Any
+    ) -> None:
+        if not media_id.startswith(_BROWSE_TRACK):
+            # An entry's path, as ``source`` reports it.
+            index = self._find_entry(media_id)
+            if index is None:
+                raise HomeAssistantError(f"{media_id} is not in the loaded playlist")
+            await self._async_play_index(index)
             return
+        try:
+            index = int(media_id[len(_BROWSE_TRACK):])
+        except ValueError as err:
+            raise HomeAssistantError(f"Invalid media id {media_id}") from err
+        if not 0 <= index < self._playlist_length():
+            raise HomeAssistantError(f"Playlist has no entry {index + 1}")
+
+        await self._async_play_index(index)
 
+    async def _async_play_index(self, index: int) -> None:
         await self._publish_command("play_index", str(index))
+        self._set_optimistic("position", index)
+        self._set_optimistic("status", MediaPlayerState.PLAYING)
+
+    async def async_media_seek(self, position: float) -> None:
+        position = max(0.0, float(position))
+        if self._duration is not None:
+            position = min(position, self._duration)
+        await self._publish_command("seek", f"{position:.1f}")
+        if self._optimistic:
+            # The bridge republishes the clock once the jump shows up in a
+            # poll; until then interpolate from the requested position.
+            self._elapsed = position
+            self._elapsed_at = dt_util.utcnow()
+            self.async_write_ha_state()
 
     async def _publish_volume_delta(self, delta: int) -> None:
         if self._volume is not None:
@@ -261,11 +846,76 @@ class WinampMqttMediaPlayer(MediaPlayerEntity):
         await self._publish_command("vol_up" if delta > 0 else "vol_down")
 
     async def _publish_command(self, command: str, payload: str | None = None) -> None:
-        topic = f"{self._base_topic}/{self._command_topic}/{command}"
-        await mqtt.async_publish(self.hass, topic, payload or "")
-
-
-def _payload_to_str(payload: bytes | str) -> str:
-    if isinstance(payload, bytes):
-        return payload.decode()
-    return str(payload)
+        await self._coordinator.async_publish_command(command, payload)
+
+
+def _same_value(field: str, reported: Any, expected: Any) -> bool:
+    if field == "volume" and reported is not None and expected is not None:
+        return abs(reported - expected) <= _VOLUME_TOLERANCE
+    return reported == expected
+
+
+def _apply_playlist_ops(playlist: list[str], ops: Any, length: Any) -> bool:
+    """Apply bridge playlist operations in place; False if they do not fit."""
+    if not isinstance(ops, list):
+        return False
+
+    for op in ops:
+        if not isinstance(op, dict):
+            return False
+        kind = op.get("op")
+        if kind == "move":
+            source, target = op.get("from"), op.get("to")
+            if not (
+                isinstance(source, int)
+                and isinstance(target, int)
+                and 0 <= source < len(playlist)
+                and 0 <= target < len(playlist)
+            ):
+                return False
+            playlist.insert(target, playlist.pop(source))
+            continue
+
+        index = op.get("index")
+        if not isinstance(index, int) or not 0 <= index <= len(playlist):
+            return False
+        count = op.get("count", 0)
+        if not isinstance(count, int) or count < 0 or index + count > len(playlist):
+            return False
+        items = op.get("items", [])
+        if not isinstance(items, list):
+            return False
+
+        if kind == "insert":
+            playlist[index:index] = [str(item) for item in items]
+        elif kind == "remove":
+            del playlist[index:index + count]
+        elif kind == "replace":
+            playlist[index:index + count] = [str(item) for item in items]
+        else:
+            return False
+
+    return not isinstance(length, int) or len(playlist) == length
+
+
+def _entry_title(entry: str | None) -> str:
+    """Short display name for a playlist entry: the file name without extension."""
+    if not entry:
+        return "…"
+    if "://" in entry:
+        return entry
+    return PureWindowsPath(entry).stem or entry
+
+
+def _parse_tags(value: Any) -> dict[str, Any]:
+    if not isinstance(value, dict):
+        return {}
+    tags: dict[str, Any] = {}
+    for key in ("title", "artist", "album"):
+        if isinstance(value.get(key), str) and value[key]:
+            tags[key] = value[key]
+    if isinstance(value.get("track"), int):
+        tags["track"] = value["track"]
+    if isinstance(value.get("duration"), (int, float)):
+        tags["duration"] = float(value["duration"])
+    return tags
@@ -0,0 +1,169 @@
+"""Compact playlist storage for the Winamp media player.
+
+Kept free of Home Assistant imports so it can be benchmarked on its own.
+"""
+from __future__ import annotations
+
+from array import array
+from itertools import accumulate
+from typing import Iterable
+
+# Never part of a file path or URL, so it can separate entries.
+_SEPARATOR = "\0"
+
+
+class PlaylistStore:
+    """Playlist entries, packed into one string plus an array of offsets.
+
+    A list of 100k paths costs a separate string object (and its header) per
+    entry; packed, they share one buffer and entries are sliced out on
+    demand. Packing costs a join and an offset pass, though, more than a
+    message that changes the playlist is worth, so new or edited entries are
+    kept as the plain list they came in (``edit`` hands it out for in-place
+    changes) and only packed when a lookup builds its index, or on ``pack``.
+    ``replace`` leaves everything untouched when the content is the same.
+    The lookup from entry to indices is keyed by the entry's hash, so it
+    does not keep a second copy of every string either.
+    """
+
+    __slots__ = ("_buffer", "_offsets", "_entries", "_index", "digest", "version")
+
+    def __init__(self, entries: Iterable[str] = ()) -> None:
+        self._buffer = ""
+        self._offsets = array("Q", [0])
+        # Unpacked entries; when set, they are the content and the buffer
+        # and offsets are stale.
+        self._entries: list[str] | None = None
+        self._index: dict[int, int | list[int]] | None = None
+        self.digest: str | None = None
+        self.version = 0
+        self.replace(entries)
+
+    def replace(self, entries: Iterable[str], digest: str | None = None) -> bool:
+        """Store ``entries``; return False when the content did not change.
+
+        When the caller already knows a content hash (the bridge's page or
+        manifest hash) pass it as ``digest`` to skip even the comparison.
+        """
+        if digest is not None and digest == self.digest:
+            return False
+
+        entries = entries if isinstance(entries, list) else list(entries)
+        if self._entries is not None:
+            unchanged = entries == self._entries
+        else:
+            unchanged = len(entries) == len(self) and self._packed_equals(entries)
+        self.digest = digest
+        if unchanged:
+            return False
+
+        self._entries = entries
+        self._index = None
+        self.version += 1
+        return True
+
+    def edit(self) -> list[str]:
+        """Return the entries as a list to change in place.
+
+        The first edit after packing unpacks them once; later ones reuse the
+        list. Call again for every change, so lookups see it.
+        """
+        if self._entries is None:
+            self._entries = self.to_list()
+        self._changed()
+        return self._entries
+
+    def pack(self) -> None:
+        """Pack the entries into the buffer; a no-op when packed."""
+        if self._entries is None:
+            return
+        entries, self._entries = self._entries, None
+        try:
+            buffer = _SEPARATOR.join(entries)
+        except TypeError:
+            entries = [str(entry) for entry in entries]
+            buffer = _SEPARATOR.join(entries)
+        self._buffer = buffer
+        # Cumulative lengths without separators; entry i starts at
+        # offsets[i] + i in the buffer.
+        self._offsets = array("Q", accumulate(map(len, entries), initial=0))
+
+    def _packed_equals(self, entries: list[str]) -> bool:
+        try:
+            return _SEPARATOR.join(entries) == self._buffer
+        except TypeError:
+            return False
+
+    def _changed(self) -> None:
+        self._index = None
+        self.digest = None
+        self.version += 1
+
+    def __len__(self) -> int:
+        if self._entries is not None:
+            return len(self._entries)
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if self._entries is not None:
+            return self._entries[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("playlist index out of range")
+        return self._buffer[self._offsets[index] + index:self._offsets[index + 1] + index]
+
+    def slice(self, start: int, end: int) -> list[str]:
+        """Return entries ``start:end`` (clamped to the playlist)."""
+        start = max(0, start)
+        end = min(end, len(self))
+        if start >= end:
+            return []
+        if self._entries is not None:
+            return self._entries[start:end]
+        chunk = self._buffer[self._offsets[start] + start:self._offsets[end] + end - 1]
+        return chunk.split(_SEPARATOR)
+
+    def to_list(self) -> list[str]:
+        return self.slice(0, len(self))
+
+    def indices(self, entry: str) -> list[int]:
+        """Return every index holding ``entry``, in playlist order."""
+        if self._index is None:
+            self._index = self._build_index()
+            # The store is being searched, not just shown; pack it now.
+            self.pack()
+
+        found = self._index.get(hash(entry))
+        if found is None:
+            return []
+        candidates = found if isinstance(found, list) else [found]
+        # Different entries can share a hash; check the text itself.
+        return [index for index in candidates if self[index] == entry]
+
+    def _build_index(self) -> dict[int, int | list[int]]:
+        index: dict[int, int | list[int]] = {}
+        entries = self._entries if self._entries is not None else self.to_list()
+        for position, entry in enumerate(entries):
+            key = hash(entry)
+            existing = index.get(key)
+            if existing is None:
+                index[key] = position
+            elif isinstance(existing, list):
+                existing.append(position)
+            else:
+                index[key] = [existing, position]
+        return index
+
+    def nearest(self, entry: str, position: int | None) -> int | None:
+        """Return the index of ``entry`` closest to ``position``.
+
+        Playlists often hold the same file more than once; picking the copy
+        nearest the current track is what a user selecting it usually means.
+        """
+        found = self.indices(entry)
+        if not found:
+            return None
+        if position is None:
+            return found[0]
+        return min(found, key=lambda index: (abs(index - position), index))
@@ -1,18 +1,18 @@
 from __future__ import annotations
 
-import json
-from datetime import datetime
+from abc import abstractmethod
 from typing import Any, Callable
 
-from homeassistant.components import mqtt
-from homeassistant.components.mqtt.models import ReceiveMessage
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    RestoreSensor,
+    SensorDeviceClass,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_NAME
+from homeassistant.const import CONF_NAME, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.util import dt as dt_util
 
 from .const import (
     CONF_AVAILABILITY_TOPIC,
@@ -26,6 +26,10 @@ from .const import (
     DEFAULT_STATE_TOPIC,
     DOMAIN,
 )
+from .coordinator import LATENCY, ONLINE, PARSE_ERROR, WinampCoordinator
+
+# State fields summarised by the debug sensor; the playlist is left out.
+_SUMMARY_FIELDS = ("status", "title", "volume", "available")
 
 
 async def async_setup_entry(
@@ -41,11 +45,12 @@ async def async_setup_entry(
     availability_topic: str = data.get(
         CONF_AVAILABILITY_TOPIC, DEFAULT_AVAILABILITY_TOPIC
     ).strip("/")
+    coordinator: WinampCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
     async_add_entities(
         [
             AvailabilityDebugSensor(
-                hass,
+                coordinator,
                 name,
                 base_topic,
                 availability_topic,
@@ -53,7 +58,15 @@ async def async_setup_entry(
                 state_topic,
             ),
             StateDebugSensor(
-                hass,
+                coordinator,
+                name,
+                base_topic,
+                availability_topic,
+                command_topic,
+                state_topic,
+            ),
+            CommandLatencySensor(
+                coordinator,
                 name,
                 base_topic,
                 availability_topic,
@@ -64,19 +77,21 @@ async def async_setup_entry(
     )
 
 
-class BaseDebugSensor(SensorEntity):
+class BaseDebugSensor(RestoreSensor):
     _attr_should_poll = False
+    # Coordinator fields this sensor shows.
+    _fields: tuple[str, ...] = ()
 
     def __init__(
         self,
-        hass: HomeAssistant,
+        coordinator: WinampCoordinator,
         name: str,
         base_topic: str,
         availability_topic: str,
         command_topic: str,
         state_topic: str,
     ) -> None:
-        self.hass = hass
+        self._coordinator = coordinator
         self._attr_name = name
         self._base_topic = base_topic
         self._availability_topic = availability_topic
@@ -88,33 +103,63 @@ class BaseDebugSensor(SensorEntity):
             model="MQTT Bridge",
             name=name,
         )
-        self._last_message_time: datetime | None = None
-        self._availability_unsub: Callable[[], None] | None = None
-        self._state_unsub: Callable[[], None] | None = None
+        self._coordinator_unsub: Callable[[], None] | None = None
+        # Value saved before a restart, shown (and marked stale) until the
+        # coordinator reports one of this sensor's fields.
+        self._stale = False
+        self._restored_value: Any = None
+
+    async def async_added_to_hass(self) -> None:
+        received = self._coordinator.snapshot.received.intersection(self._fields)
+        if not received:
+            last_data = await self.async_get_last_sensor_data()
+            if last_data is not None:
+                self._restored_value = last_data.native_value
+                self._stale = True
+        self._coordinator_unsub = self._coordinator.async_add_listener(
+            self._handle_coordinator_update, self._fields
+        )
+        if received or self._stale:
+            self.async_write_ha_state()
 
     async def async_will_remove_from_hass(self) -> None:
-        if self._availability_unsub:
-            self._availability_unsub()
-        if self._state_unsub:
-            self._state_unsub()
+        if self._coordinator_unsub:
+            self._coordinator_unsub()
+
+    @callback
+    def _handle_coordinator_update(self, changed: set[str]) -> None:
+        self._stale = False
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> Any:
+        if self._stale:
+            return self._restored_value
+        return self._current_value()
+
+    @abstractmethod
+    def _current_value(self) -> Any:
+        """Return the value from the coordinator's current snapshot."""
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         return {
+            "stale": self._stale,
             "base_topic": self._base_topic,
             "state_topic": f"{self._base_topic}/{self._state_topic}",
             "command_topic": f"{self._base_topic}/{self._command_topic}",
             "availability_topic": f"{self._base_topic}/{self._availability_topic}",
-            "last_message": self._last_message_time,
+            "last_message": self._coordinator.snapshot.last_message,
         }
 
 
 class AvailabilityDebugSensor(BaseDebugSensor):
     _attr_icon = "mdi:lan-connect"
+    _fields = (ONLINE,)
 
     def __init__(
         self,
-        hass: HomeAssistant,
+        coordinator: WinampCoordinator,
         name: str,
         base_topic: str,
         availability_topic: str,
@@ -122,36 +167,21 @@ class AvailabilityDebugSensor(BaseDebugSensor):
         state_topic: str,
     ) -> None:
         super().__init__(
-            hass, name, base_topic, availability_topic, command_topic, state_topic
+            coordinator, name, base_topic, availability_topic, command_topic, state_topic
         )
-        self._availability_online = False
         self._attr_name = f"{name} MQTT Availability"
 
-    async def async_added_to_hass(self) -> None:
-        self._availability_unsub = await mqtt.async_subscribe(
-            self.hass,
-            f"{self._base_topic}/{self._availability_topic}",
-            self._handle_availability,
-        )
-
-    @property
-    def native_value(self) -> str:
-        return "online" if self._availability_online else "offline"
-
-    @callback
-    def _handle_availability(self, msg: ReceiveMessage) -> None:
-        payload = _payload_to_str(msg.payload)
-        self._availability_online = payload.strip().lower() == "online"
-        self._last_message_time = dt_util.utcnow()
-        self.async_write_ha_state()
+    def _current_value(self) -> str:
+        return "online" if self._coordinator.snapshot.online else "offline"
 
 
 class StateDebugSensor(BaseDebugSensor):
     _attr_icon = "mdi:message-text"
+    _fields = (*_SUMMARY_FIELDS, PARSE_ERROR)
 
     def __init__(
         self,
-        hass: HomeAssistant,
+        coordinator: WinampCoordinator,
         name: str,
         base_topic: str,
         availability_topic: str,
@@ -159,80 +189,59 @@ class StateDebugSensor(BaseDebugSensor):
         state_topic: str,
     ) -> None:
         super().__init__(
-            hass, name, base_topic, availability_topic, command_topic, state_topic
+            coordinator, name, base_topic, availability_topic, command_topic, state_topic
         )
         self._attr_name = f"{name} MQTT State"
-        self._status: str | None = None
-        self._last_payload: str | None = None
-        self._last_title: str | None = None
-        self._last_volume: float | None = None
-        self._last_available: bool | None = None
-
-    async def async_added_to_hass(self) -> None:
-        self._state_unsub = await mqtt.async_subscribe(
-            self.hass,
-            f"{self._base_topic}/{self._state_topic}",
-            self._handle_state,
-        )
 
-    @property
-    def native_value(self) -> str | None:
-        return self._status or "unknown"
+    def _current_value(self) -> str | None:
+        snapshot = self._coordinator.snapshot
+        if snapshot.parse_error:
+            return "invalid_payload"
+        return snapshot.status.lower() if snapshot.status else "unknown"
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
+        snapshot = self._coordinator.snapshot
         attrs = super().extra_state_attributes
+        # Raw payloads go to the diagnostics ring buffer, not to attributes.
+        attrs.update(self._coordinator.payload_log.summary())
+        volume = snapshot.volume
         attrs.update(
             {
-                "last_payload": self._last_payload,
-                "last_title": self._last_title,
-                "last_volume": self._last_volume,
-                "reported_available": self._last_available,
+                "last_title": snapshot.title,
+                "last_volume": None if volume is None else max(0.0, min(1.0, volume / 100.0)),
+                "reported_available": snapshot.available,
             }
         )
         return attrs
 
-    @callback
-    def _handle_state(self, msg: ReceiveMessage) -> None:
-        raw = _payload_to_str(msg.payload)
-        self._last_payload = raw
-        self._last_message_time = dt_util.utcnow()
-
-        try:
-            payload = json.loads(raw)
-        except json.JSONDecodeError:
-            self._status = "invalid_payload"
-            self._last_title = None
-            self._last_volume = None
-            self._last_available = None
-            self.async_write_ha_state()
-            return
-
-        status = payload.get("status")
-        if isinstance(status, str):
-            self._status = status.lower()
-        else:
-            self._status = "unknown"
 
-        title = payload.get("title")
-        self._last_title = title if isinstance(title, str) else None
+class CommandLatencySensor(BaseDebugSensor):
+    """Median command round trip, with the tail percentiles as attributes."""
 
-        volume = payload.get("volume")
-        if isinstance(volume, (int, float)):
-            self._last_volume = max(0.0, min(1.0, float(volume) / 100.0))
-        else:
-            self._last_volume = None
+    _attr_icon = "mdi:timer-outline"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _fields = (LATENCY,)
 
-        available_value = payload.get("available")
-        if isinstance(available_value, bool):
-            self._last_available = available_value
-        else:
-            self._last_available = None
-
-        self.async_write_ha_state()
+    def __init__(
+        self,
+        coordinator: WinampCoordinator,
+        name: str,
+        base_topic: str,
+        availability_topic: str,
+        command_topic: str,
+        state_topic: str,
+    ) -> None:
+        super().__init__(
+            coordinator, name, base_topic, availability_topic, command_topic, state_topic
+        )
+        self._attr_name = f"{name} Command Latency"
 
+    def _current_value(self) -> float | None:
+        return self._coordinator.latency.summary()["p50_ms"]
 
-def _payload_to_str(payload: bytes | str) -> str:
-    if isinstance(payload, bytes):
-        return payload.decode()
-    return str(payload)
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return {"stale": self._stale, **self._coordinator.latency.summary()}
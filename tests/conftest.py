@@ -0,0 +1,86 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import winamp_mqtt_bridge as bridge  # noqa: E402
+
+
+def load_component_module(name):
+    """Import one of the integration's modules that do not need Home Assistant.
+
+    Importing them through the package would run its ``__init__``, which
+    does.
+    """
+    path = os.path.join(ROOT, "custom_components", "winhamp", name + ".py")
+    spec = importlib.util.spec_from_file_location("winhamp_" + name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class RecordingClient:
+    """Stands in for the MQTT client and keeps every publish."""
+
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.messages.append((topic, payload, retain))
+
+    def subscribe(self, topic):
+        pass
+
+    def payloads(self, topic):
+        return [
+            payload.decode() if isinstance(payload, bytes) else payload
+            for sent, payload, _ in self.messages
+            if sent == topic
+        ]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """A SimulatedBackend installed as the bridge's backend for one test."""
+    simulated = bridge.SimulatedBackend()
+    previous = bridge._backend
+    bridge.set_backend(simulated)
+    # Nothing under test should touch files or ports.
+    monkeypatch.setattr(bridge, "ARTWORK_HTTP_PORT", None)
+    monkeypatch.setattr(bridge, "STATE_SNAPSHOT_PATH", None)
+    yield simulated
+    bridge.set_backend(previous)
+
+
+@pytest.fixture
+def client():
+    return RecordingClient()
+
+
+@pytest.fixture
+def winamp_bridge(backend, client):
+    """A single-instance bridge polling a simulated Winamp with 3 tracks."""
+    backend.start(tracks=3)
+    instance = bridge.WinampMqttBridge(client=client)
+    yield instance
+    instance.closed.set()
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,74 @@
+import http.client
+import os
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+@pytest.fixture
+def store(tmp_path):
+    return bridge.ArtworkStore(directory=str(tmp_path), reader=lambda path: None)
+
+
+@pytest.fixture
+def server(store):
+    server = bridge.start_artwork_server(store, host="127.0.0.1", port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(server, path, etag=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    try:
+        connection.request("GET", path, headers={"If-None-Match": etag} if etag else {})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def test_stored_images_come_back(store):
+    digest = store.add(PNG)
+    assert digest in store
+    assert store.get(digest) == (PNG, "image/png")
+    assert store.get("0" * 16) is None
+
+
+def test_disk_reads_run_outside_the_lock(tmp_path):
+    held = []
+
+    class Recording(bridge.ArtworkStore):
+        def _read(self, name):
+            held.append(self.lock.locked())
+            return super()._read(name)
+
+    store = Recording(directory=str(tmp_path), reader=lambda path: None)
+    store.get(store.add(PNG))
+    assert held == [False]
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    store = bridge.ArtworkStore(directory=str(tmp_path), max_bytes=250, reader=lambda path: None)
+    first = store.add(PNG + b"1")
+    second = store.add(PNG + b"2")
+    store.get(first)
+    third = store.add(PNG + b"3")
+
+    assert first in store and third in store
+    assert second not in store
+    assert sorted(os.listdir(tmp_path)) == sorted([first + ".png", third + ".png"])
+
+
+def test_conditional_get_only_for_known_images(store, server):
+    digest = store.add(PNG)
+    etag = '"%s-orig"' % digest
+
+    assert fetch(server, "/art/" + digest) == (200, PNG)
+    assert fetch(server, "/art/" + digest, etag)[0] == 304
+
+    unknown = "0123456789abcdef"
+    assert fetch(server, "/art/" + unknown, '"%s-orig"' % unknown)[0] == 404
@@ -0,0 +1,78 @@
+import time
+
+import winamp_mqtt_bridge as bridge
+
+
+def test_commands_drive_the_simulated_player(backend):
+    winamp = backend.start(tracks=3)
+    hwnd = bridge.find_winamp_hwnd()
+    assert hwnd == winamp.hwnd
+    assert bridge.get_playback_status(hwnd) == "idle"
+
+    bridge.send_winamp_command(bridge.WA_PLAY)
+    assert bridge.get_playback_status(hwnd) == "playing"
+    bridge.send_winamp_command(bridge.WA_PAUSE)
+    assert bridge.get_playback_status(hwnd) == "paused"
+
+    bridge.send_winamp_command(bridge.WA_NEXT)
+    assert bridge.get_playlist_position(hwnd) == 1
+    assert bridge.get_title_from_window(hwnd) == "2. 00002 - Track 2"
+    assert bridge.set_playlist_position(hwnd, 2)
+    assert bridge.get_playlist_position(hwnd) == 2
+    assert bridge.get_playback_status(hwnd) == "playing"
+
+    bridge.set_volume_percent(40)
+    assert bridge.get_volume_percent(hwnd) == 40
+
+
+def test_playlist_entries_are_read_from_process_memory(backend):
+    winamp = backend.start(tracks=5)
+    process = backend.open_process(winamp.pid)
+    backend.reset_counters()
+
+    address, path = bridge._read_playlist_entry(winamp.hwnd, process, 3)
+    assert [address, path] == winamp.playlist[3]
+    assert backend.calls["read_memory"] >= 1
+    assert backend.bytes_read >= len(path.encode("utf-16-le"))
+
+
+def test_reads_fail_once_the_process_is_gone(backend):
+    winamp = backend.start(tracks=1)
+    process = backend.open_process(winamp.pid)
+    backend.stop(winamp)
+
+    assert bridge.find_winamp_hwnd() is None
+    assert bridge._read_process_string(process, winamp.playlist[0][0], wide=True) is None
+
+
+def test_scripted_mutations_apply_one_step_per_advance(backend):
+    winamp = backend.start(tracks=2)
+    backend.script([
+        lambda w: w.add_tracks(3),
+        lambda w: w.remove_track(0),
+    ])
+
+    assert backend.advance()
+    assert len(winamp.playlist) == 5
+    assert backend.advance()
+    assert len(winamp.playlist) == 4
+    assert not backend.advance()
+
+
+def test_latency_is_added_to_every_call(backend):
+    winamp = backend.start()
+    backend.latency = 0.02
+    started = time.monotonic()
+    for _ in range(3):
+        backend.is_window(winamp.hwnd)
+    assert time.monotonic() - started >= 0.06
+    assert backend.calls["is_window"] == 3
+
+
+def test_later_polls_only_message_the_window(winamp_bridge, backend):
+    assert winamp_bridge.poll_once(slow=True)
+    backend.reset_counters()
+    assert winamp_bridge.poll_once(slow=False)
+    assert backend.calls["send_message"] > 0
+    assert "find_window" not in backend.calls
+    assert "open_process" not in backend.calls
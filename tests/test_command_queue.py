@@ -0,0 +1,50 @@
+import threading
+
+import winamp_mqtt_bridge as bridge
+
+
+def drain(queue):
+    items = []
+    while queue.pending():
+        cmd, payload, _, ids = queue.get(timeout=0)
+        items.append((cmd, payload, ids))
+    return items
+
+
+def test_latest_volume_wins_and_moves_to_the_end():
+    queue = bridge.CommandQueue()
+    queue.put("volume", "10", "a")
+    queue.put("next", "")
+    queue.put("volume", "20", "b")
+    queue.put("volume", "30")
+
+    assert drain(queue) == [("next", "", []), ("volume", "30", ["a", "b"])]
+    assert queue.stats() == {"received": 4, "coalesced": 2, "executed": 2, "pending": 0}
+
+
+def test_other_commands_keep_their_order():
+    queue = bridge.CommandQueue()
+    for cmd in ("next", "next", "prev", "play"):
+        queue.put(cmd, "")
+    assert [cmd for cmd, _, _ in drain(queue)] == ["next", "next", "prev", "play"]
+
+
+def test_a_command_queued_after_the_previous_ran_is_not_coalesced():
+    queue = bridge.CommandQueue()
+    queue.put("seek", "10")
+    assert drain(queue) == [("seek", "10", [])]
+    queue.put("seek", "20")
+    assert drain(queue) == [("seek", "20", [])]
+    assert queue.counters["coalesced"] == 0
+
+
+def test_get_times_out_and_wakes_on_put():
+    queue = bridge.CommandQueue(coalesce=())
+    assert queue.get(timeout=0.01) is None
+
+    got = []
+    worker = threading.Thread(target=lambda: got.append(queue.get(timeout=5)))
+    worker.start()
+    queue.put("stop", "")
+    worker.join(5)
+    assert got[0][0] == "stop"
@@ -0,0 +1,59 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import winamp_mqtt_bridge as bridge
+
+
+def run_command(instance, command, payload=""):
+    """Queue one command and run the worker until it has executed."""
+    topic = instance.base_topic + "/cmnd/" + command
+    instance.on_message(None, None, SimpleNamespace(topic=topic, payload=payload.encode()))
+    worker = threading.Thread(target=instance.command_worker, daemon=True)
+    worker.start()
+    deadline = time.monotonic() + 5
+    while instance.commands.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    instance.closed.set()
+    worker.join(timeout=5)
+    instance.closed.clear()
+
+
+def poll_due(instance):
+    """Run one iteration of publish_state_loop without waiting."""
+    fast, slow = instance.scheduler.due()
+    if fast:
+        instance.poll_once(slow)
+    return fast, slow
+
+
+def states(client, instance):
+    return [json.loads(p) for p in client.payloads(instance.base_topic + "/state")]
+
+
+def test_command_triggers_an_immediate_full_poll(winamp_bridge, client):
+    poll_due(winamp_bridge)
+    winamp_bridge.wake.clear()
+    assert winamp_bridge.scheduler.due() == (False, False)
+
+    run_command(winamp_bridge, "next")
+    assert winamp_bridge.wake.is_set()
+    assert poll_due(winamp_bridge) == (True, True)
+    assert states(client, winamp_bridge)[-1]["title"].startswith("2. ")
+
+
+def test_volume_only_refreshes_the_fast_tier(winamp_bridge, client):
+    poll_due(winamp_bridge)
+    run_command(winamp_bridge, "volume", "40")
+    assert poll_due(winamp_bridge) == (True, False)
+    assert states(client, winamp_bridge)[-1]["volume"] == 40
+
+
+def test_refresh_does_not_republish_unchanged_state(winamp_bridge, client):
+    poll_due(winamp_bridge)
+    run_command(winamp_bridge, "play")
+    poll_due(winamp_bridge)
+    run_command(winamp_bridge, "play")
+    assert poll_due(winamp_bridge)[0]
+    assert [state["status"] for state in states(client, winamp_bridge)] == ["idle", "playing"]
@@ -0,0 +1,62 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import winamp_mqtt_bridge as bridge
+
+
+def send(instance, command, payload):
+    topic = instance.base_topic + "/cmnd/" + command
+    instance.on_message(None, None, SimpleNamespace(topic=topic, payload=payload.encode()))
+
+
+def run_commands(instance):
+    """Run the command worker until the queued commands are done."""
+    worker = threading.Thread(target=instance.command_worker, daemon=True)
+    worker.start()
+    deadline = time.monotonic() + 5
+    while instance.commands.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    instance.closed.set()
+    worker.join(timeout=5)
+    instance.closed.clear()
+
+
+def test_parse_command_payload():
+    assert bridge.parse_command_payload("50") == ("50", None)
+    envelope = json.dumps({"id": "abc", "ts": 1.0, "value": " 50 "})
+    assert bridge.parse_command_payload(envelope) == ("50", "abc")
+    assert bridge.parse_command_payload('{"value": 1}') == ('{"value": 1}', None)
+
+
+def test_acks_are_published_once_and_only_for_finished_commands(winamp_bridge, client):
+    acks_topic = winamp_bridge.base_topic + "/acks"
+    winamp_bridge.poll_once(slow=True)
+    assert client.payloads(acks_topic) == []
+
+    send(winamp_bridge, "volume", json.dumps({"id": "c1", "ts": 0, "value": "40"}))
+    run_commands(winamp_bridge)
+    winamp_bridge.poll_once(slow=True)
+    assert client.payloads(acks_topic) == ['["c1"]']
+
+    # Later polls, changed or not, publish no acks again.
+    winamp_bridge.poll_once(slow=True)
+    send(winamp_bridge, "volume", "60")
+    run_commands(winamp_bridge)
+    winamp_bridge.poll_once(slow=True)
+    assert client.payloads(acks_topic) == ['["c1"]']
+
+
+def test_acks_stay_out_of_the_state_topics(winamp_bridge, client, monkeypatch):
+    monkeypatch.setattr(bridge, "STATE_PUBLISH_MODE", "split")
+    send(winamp_bridge, "play", json.dumps({"id": "c2", "ts": 0, "value": ""}))
+    run_commands(winamp_bridge)
+    winamp_bridge.poll_once(slow=True)
+    state_topics = [
+        topic for topic, _, _ in client.messages
+        if topic.startswith(winamp_bridge.base_topic + "/state/")
+    ]
+    assert state_topics
+    assert winamp_bridge.base_topic + "/state/acks" not in state_topics
+    assert client.payloads(winamp_bridge.base_topic + "/acks") == ['["c2"]']
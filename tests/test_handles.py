@@ -0,0 +1,97 @@
+import os
+
+import winamp_mqtt_bridge as bridge
+
+
+def exe(directory):
+    return os.path.join(os.sep, directory, "winamp.exe")
+
+
+def test_lookups_reuse_the_cached_window(backend):
+    winamp = backend.start(exe_path=exe("Winamp"))
+    handles = bridge.WinampHandleManager(backend)
+
+    assert handles.hwnd() == winamp.hwnd
+    assert handles.pid() == winamp.pid
+    assert handles.exe_dir() == os.path.join(os.sep, "Winamp")
+    backend.reset_counters()
+
+    for _ in range(5):
+        assert handles.hwnd() == winamp.hwnd
+    assert handles.process() is not None
+    assert "find_window" not in backend.calls
+    assert "open_process" not in backend.calls
+
+
+def test_restart_is_looked_up_again(backend):
+    first = backend.start(exe_path=exe("Winamp"))
+    handles = bridge.WinampHandleManager(backend)
+    process = handles.process()
+    assert handles.exe_dir() == os.path.join(os.sep, "Winamp")
+
+    backend.stop(first)
+    assert handles.hwnd() is None
+    assert handles.pid() is None
+    assert handles.process() is None
+    assert handles.exe_dir() is None
+    # The stale process handle was closed on the way.
+    assert process not in backend.handles
+
+    second = backend.start(exe_path=exe("Winamp 5.9"))
+    assert handles.hwnd() == second.hwnd
+    assert handles.pid() == second.pid
+    assert handles.exe_dir() == os.path.join(os.sep, "Winamp 5.9")
+
+
+def test_recycled_window_handle_is_not_trusted(backend):
+    first = backend.start()
+    handles = bridge.WinampHandleManager(backend)
+    assert handles.pid() == first.pid
+
+    # Another process now owns the same window handle.
+    backend.stop(first)
+    impostor = bridge.SimulatedWinamp(first.hwnd, first.pid + 100, backend.exe_path, 0)
+    backend.instances[impostor.hwnd] = impostor
+
+    assert handles.hwnd() == impostor.hwnd
+    assert handles.pid() == impostor.pid
+
+
+def test_invalidate_forces_a_new_search(backend):
+    backend.start()
+    handles = bridge.WinampHandleManager(backend)
+    handles.hwnd()
+    backend.reset_counters()
+
+    handles.invalidate()
+    handles.hwnd()
+    assert backend.calls["find_window"] == 1
+
+
+def test_attached_manager_follows_only_its_window(backend):
+    kitchen = backend.start(exe_path=exe("Kitchen"))
+    study = backend.start(exe_path=exe("Study"))
+    handles = bridge.WinampHandleManager(backend, window=study.hwnd)
+    assert handles.hwnd() == study.hwnd
+
+    # A restarted Winamp is not picked up on its own, even with another
+    # window of the same class still open.
+    backend.stop(study)
+    assert handles.hwnd() is None
+    assert backend.is_window(kitchen.hwnd)
+
+    restarted = backend.start(exe_path=exe("Study"))
+    assert handles.hwnd() is None
+    handles.attach(restarted.hwnd)
+    assert handles.hwnd() == restarted.hwnd
+    assert handles.exe_dir() == os.path.join(os.sep, "Study")
+
+
+def test_set_backend_drops_the_global_handles(backend):
+    winamp = backend.start()
+    assert bridge.handles.hwnd() == winamp.hwnd
+
+    replacement = bridge.SimulatedBackend()
+    other = replacement.start()
+    bridge.set_backend(replacement)
+    assert bridge.handles.hwnd() == other.hwnd
@@ -0,0 +1,47 @@
+from conftest import load_component_module
+
+latency = load_component_module("latency")
+
+
+def test_percentiles_use_the_nearest_rank(clock):
+    tracker = latency.LatencyTracker(clock=clock)
+    for ms in range(1, 101):
+        correlation_id = tracker.start("volume")
+        clock.advance(ms / 1000)
+        assert tracker.acknowledge([correlation_id])
+
+    assert round(tracker.percentile(50)) == 50
+    assert round(tracker.percentile(99)) == 99
+    summary = tracker.summary()
+    assert summary["p90_ms"] == 90.0
+    assert summary["samples"] == summary["acknowledged"] == 100
+    assert summary["last_ms"] == 100.0
+    assert summary["last_command"] == "volume"
+
+
+def test_window_keeps_the_latest_round_trips(clock):
+    tracker = latency.LatencyTracker(window=3, clock=clock)
+    for ms in (500, 10, 20, 30):
+        correlation_id = tracker.start("play")
+        clock.advance(ms / 1000)
+        tracker.acknowledge([correlation_id])
+    assert round(tracker.percentile(100)) == 30
+
+
+def test_unknown_and_repeated_ids_are_ignored(clock):
+    tracker = latency.LatencyTracker(clock=clock)
+    correlation_id = tracker.start("next")
+    assert not tracker.acknowledge(["someone-else", 42])
+    assert tracker.acknowledge([correlation_id])
+    assert not tracker.acknowledge([correlation_id])
+    assert tracker.acknowledged == 1
+
+
+def test_unacknowledged_commands_expire_as_lost(clock):
+    tracker = latency.LatencyTracker(timeout=60, clock=clock)
+    correlation_id = tracker.start("stop")
+    clock.advance(61)
+    summary = tracker.summary()
+    assert summary["lost"] == 1 and summary["pending"] == 0
+    assert summary["p50_ms"] is None
+    assert not tracker.acknowledge([correlation_id])
@@ -0,0 +1,89 @@
+import http.client
+import re
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    fresh = bridge.BridgeMetrics()
+    monkeypatch.setattr(bridge, "metrics", fresh)
+    return fresh
+
+
+def sample(text, name, **labels):
+    """Return the value of one series in rendered metrics, or None."""
+    wanted = ",".join('%s="%s"' % item for item in labels.items())
+    pattern = r"^%s(?:\{%s\})? (\S+)$" % (re.escape(name), re.escape(wanted))
+    match = re.search(pattern, text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_histogram_renders_cumulative_buckets():
+    metric = bridge.Metric("histogram", "demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    series = metric.labels("read")
+    for value in (0.05, 0.5, 0.7, 5.0):
+        series.observe(value)
+    lines = []
+    metric.render(lines)
+
+    assert lines == [
+        "# HELP demo_seconds Demo.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="read",le="0.1"} 1',
+        'demo_seconds_bucket{stage="read",le="1.0"} 3',
+        'demo_seconds_bucket{stage="read",le="+Inf"} 4',
+        'demo_seconds_sum{stage="read"} 6.25',
+        'demo_seconds_count{stage="read"} 4',
+    ]
+
+
+def test_labels_returns_the_same_series():
+    metric = bridge.Metric("counter", "demo_total", "Demo.", ("topic",))
+    metric.labels("state").inc()
+    metric.labels("state").inc(2)
+    assert metric.labels("state").value == 3
+
+
+def test_poll_records_messages_reads_stages_and_publishes(metrics, backend, winamp_bridge):
+    winamp_bridge.poll_once(slow=True)
+    text = metrics.render()
+    instance = winamp_bridge.base_topic
+
+    assert sample(text, "winamp_sendmessage_total", message="IPC_ISPLAYING") >= 1
+    assert sample(text, "winamp_memory_reads_total") >= 1
+    assert sample(text, "winamp_memory_read_bytes_total") == backend.bytes_read
+    assert sample(text, "winamp_poll_seconds_count", instance=instance, tier="slow") == 1
+    assert sample(text, "winamp_poll_stage_seconds_count", instance=instance, stage="status") == 1
+    assert sample(text, "winamp_mqtt_publish_total", instance=instance, topic="state") == 1
+    assert sample(text, "winamp_mqtt_publish_bytes_total", instance=instance, topic="state") > 0
+
+
+def test_timed_out_messages_count_as_failures(metrics, backend, winamp_bridge, monkeypatch):
+    monkeypatch.setattr(bridge, "SEND_MESSAGE_TIMEOUT_MS", 10)
+    backend.instances[winamp_bridge.handles.hwnd()].hung = True
+    assert not winamp_bridge.poll_once(slow=False)
+    assert sample(metrics.render(), "winamp_sendmessage_failures_total",
+                  message="IPC_GETLISTLENGTH") == 1
+
+
+def test_metrics_endpoint(metrics):
+    metrics.memory_read(10)
+    server = bridge.start_metrics_server(host="127.0.0.1", port=0)
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+        connection.request("GET", "/metrics")
+        response = connection.getresponse()
+        assert response.status == 200
+        assert sample(response.read().decode(), "winamp_memory_read_bytes_total") == 10
+
+        connection.request("GET", "/other")
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 404
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,139 @@
+import os
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+KITCHEN = os.path.join(os.sep, "Kitchen", "winamp.exe")
+STUDY = os.path.join(os.sep, "Study", "winamp.exe")
+
+
+@pytest.fixture
+def multi(backend, client, clock):
+    instance = bridge.MultiInstanceBridge(client=client, workers=2, hung_after=5.0, clock=clock)
+    yield instance
+    for _, winamp_bridge in instance.snapshot():
+        winamp_bridge.closed.set()
+    for winamp in backend.instances.values():
+        winamp.hung = False
+    instance.pool.shutdown(wait=True)
+
+
+def finish_polls(multi):
+    for future, _ in list(multi.running.values()):
+        future.result(timeout=5)
+
+
+def test_scan_names_instances_by_directory(backend, multi):
+    backend.start(exe_path=KITCHEN)
+    backend.start(exe_path=STUDY)
+    backend.start(exe_path=STUDY)
+    multi.scan()
+    assert sorted(multi.instances) == ["kitchen", "study", "study-2"]
+    assert multi.instances["kitchen"].base_topic == "winamp/kitchen"
+
+
+def test_hung_instance_is_reported_and_recovers(backend, multi, client, clock, monkeypatch):
+    # Block while hung instead of timing out, so the poll stays in flight.
+    monkeypatch.setattr(bridge, "SEND_MESSAGE_TIMEOUT_MS", None)
+    kitchen = backend.start(exe_path=KITCHEN)
+    backend.start(exe_path=STUDY)
+    multi.scan()
+    finish_polls(multi)
+    multi.poll_due()
+    finish_polls(multi)
+    multi.poll_due()
+
+    kitchen.hung = True
+    multi.instances["kitchen"].scheduler.trigger()
+    multi.instances["study"].scheduler.trigger()
+    multi.poll_due()
+    multi.running["study"][0].result(timeout=5)
+    clock.advance(5.0)
+    multi.poll_due()
+    assert multi.hung == {"kitchen"}
+    assert client.payloads("winamp/kitchen/availability")[-1] == "offline"
+    # The other instance keeps being polled meanwhile.
+    multi.instances["study"].scheduler.trigger()
+    multi.poll_due()
+    multi.running["study"][0].result(timeout=5)
+
+    kitchen.hung = False
+    finish_polls(multi)
+    multi.poll_due()
+    assert multi.hung == set()
+    assert client.payloads("winamp/kitchen/availability")[-1] == "online"
+
+
+def test_timed_out_polls_report_the_instance_offline(backend, multi, client, clock):
+    # The default SEND_MESSAGE_TIMEOUT_MS: each poll of the frozen Winamp
+    # fails and finishes well before hung_after.
+    kitchen = backend.start(exe_path=KITCHEN)
+    multi.scan()
+    finish_polls(multi)
+    multi.poll_due()
+    finish_polls(multi)
+    multi.poll_due()
+
+    kitchen.hung = True
+    instance = multi.instances["kitchen"]
+    instance.scheduler.trigger()
+    multi.poll_due()
+    finish_polls(multi)
+    clock.advance(1.0)
+    multi.poll_due()
+    assert multi.hung == set()
+    assert "kitchen" in multi.silent_since
+
+    instance.scheduler.trigger()
+    multi.poll_due()
+    finish_polls(multi)
+    clock.advance(5.0)
+    multi.poll_due()
+    assert multi.hung == {"kitchen"}
+    assert client.payloads("winamp/kitchen/availability")[-1] == "offline"
+
+    kitchen.hung = False
+    instance.scheduler.trigger()
+    multi.poll_due()
+    finish_polls(multi)
+    multi.poll_due()
+    assert multi.hung == set()
+    assert client.payloads("winamp/kitchen/availability")[-1] == "online"
+
+
+def test_restarted_winamp_gets_its_instance_back(backend, multi):
+    kitchen = backend.start(exe_path=KITCHEN)
+    multi.scan()
+    instance = multi.instances["kitchen"]
+    finish_polls(multi)
+    multi.poll_due()
+    finish_polls(multi)
+
+    backend.stop(kitchen)
+    instance.scheduler.trigger()
+    multi.poll_due()
+    # The poll has finished but poll_due has not collected it yet.
+    finish_polls(multi)
+    assert "kitchen" in multi.running
+
+    restarted = backend.start(exe_path=KITCHEN)
+    multi.scan()
+    assert sorted(multi.instances) == ["kitchen"]
+    assert instance.handles.hwnd() == restarted.hwnd
+
+
+def test_instance_in_a_running_poll_is_not_taken_over(backend, multi, monkeypatch):
+    monkeypatch.setattr(bridge, "SEND_MESSAGE_TIMEOUT_MS", None)
+    kitchen = backend.start(exe_path=KITCHEN)
+    multi.scan()
+    finish_polls(multi)
+    multi.poll_due()
+    finish_polls(multi)
+
+    kitchen.hung = True
+    multi.instances["kitchen"].scheduler.trigger()
+    multi.poll_due()
+    backend.start(exe_path=KITCHEN)
+    multi.scan()
+    assert sorted(multi.instances) == ["kitchen", "kitchen-2"]
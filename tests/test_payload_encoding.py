@@ -0,0 +1,78 @@
+import json
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+from conftest import load_component_module
+
+codec = load_component_module("codec")
+
+PATHS = ["C:\\Music\\Album %d\\%02d - Track.mp3" % (n % 3, n) for n in range(40)]
+PATHS += ["D:/Podcasts/episode.mp3", "no directory.mp3", "C:\\Musík\\ünïcode ♫.flac"]
+STATE = {"status": "playing", "volume": 80, "title": "Track", "playlist": PATHS}
+
+
+@pytest.mark.parametrize("encoding", bridge.PAYLOAD_ENCODINGS)
+@pytest.mark.parametrize("obj", [STATE, PATHS, {"status": "idle"}, {"playlist": []}])
+def test_integration_decodes_what_the_bridge_encodes(encoding, obj):
+    assert codec.decode_payload(bridge.encode_payload(obj, encoding)) == obj
+
+
+@pytest.mark.parametrize("encoding", ["zlib", "prefix"])
+def test_large_payloads_are_compressed(encoding):
+    payload = bridge.encode_payload(STATE, encoding)
+    assert payload[:2] == b"\0" + bridge.PAYLOAD_FORMATS[encoding]
+    assert len(payload) < len(json.dumps(STATE))
+    assert codec.is_encoded(payload)
+
+
+def test_small_payloads_stay_plain_json():
+    payload = bridge.encode_payload({"status": "idle"}, "prefix")
+    assert payload == json.dumps({"status": "idle"})
+    assert not codec.is_encoded(payload)
+    assert codec.decode_payload(payload.encode()) == {"status": "idle"}
+
+
+def test_prefix_table_stores_each_directory_once():
+    [dirs, refs, names] = bridge.prefix_encode(PATHS)[bridge.PREFIX_KEY]
+    assert len(dirs) == len(set(dirs)) == 6
+    assert [dirs[ref] + name for ref, name in zip(refs, names)] == PATHS
+
+
+@pytest.mark.parametrize("payload", [
+    b"\0X" + b"body",
+    b"\0Z" + b"not zlib",
+    b"\0P" + zlib.compress(b'{"$paths": [[], [0], ["a"]]}'),
+    b"{not json",
+])
+def test_undecodable_payloads_raise_value_error(payload):
+    with pytest.raises(ValueError):
+        codec.decode_payload(payload)
+    assert codec.describe(payload)
+
+
+def test_client_negotiates_the_first_encoding_it_accepts(backend, winamp_bridge, client,
+                                                         monkeypatch):
+    monkeypatch.setattr(bridge, "PAYLOAD_ENCODING", "auto")
+    backend.instances[winamp_bridge.handles.hwnd()].add_tracks(40)
+    winamp_bridge.poll_once(slow=True)
+    topic = winamp_bridge.base_topic + "/state"
+
+    accepted = ",".join(codec.ACCEPTED_ENCODINGS)
+    assert bridge.choose_encoding(accepted) == "prefix"
+    assert bridge.choose_encoding("brotli, ZLIB") == "zlib"
+    assert bridge.choose_encoding("brotli") == "json"
+
+    winamp_bridge.on_message(None, None, SimpleNamespace(
+        topic=winamp_bridge.base_topic + "/cmnd/encoding", payload=accepted.encode()))
+    winamp_bridge.poll_once(slow=True)
+
+    # The unchanged state is republished in the new encoding.
+    [before, after] = [payload for sent, payload, _ in client.messages if sent == topic]
+    assert not codec.is_encoded(before)
+    assert after[:2] == b"\0P"
+    assert codec.decode_payload(after) == json.loads(before)
+    capabilities = json.loads(client.payloads(winamp_bridge.base_topic + "/capabilities")[-1])
+    assert capabilities["encoding"] == "prefix"
@@ -0,0 +1,72 @@
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+
+@pytest.fixture
+def winamp(backend):
+    return backend.start(tracks=50)
+
+
+def paths(winamp):
+    return [path for _, path in winamp.playlist]
+
+
+def sync(cache, backend, winamp):
+    process = backend.open_process(winamp.pid)
+    backend.reset_counters()
+    return cache.sync(winamp.hwnd, process, len(winamp.playlist), winamp.position)
+
+
+def test_first_sync_reads_every_entry(backend, winamp):
+    cache = bridge.PlaylistCache(samples=8)
+    assert sync(cache, backend, winamp) == paths(winamp)
+
+
+def test_unchanged_playlist_is_reused_after_a_fingerprint_check(backend, winamp):
+    cache = bridge.PlaylistCache(samples=8)
+    items = sync(cache, backend, winamp)
+
+    assert sync(cache, backend, winamp) is items
+    # Only the first, last and current entries are read back.
+    assert backend.calls["read_memory"] <= 3
+
+
+def test_appended_tracks_only_read_the_tail(backend, winamp):
+    cache = bridge.PlaylistCache(samples=8)
+    sync(cache, backend, winamp)
+
+    winamp.add_tracks(5)
+    assert sync(cache, backend, winamp) == paths(winamp)
+    assert backend.calls["read_memory"] <= 3 + 5
+
+
+def test_edits_are_picked_up_by_pointer(backend, winamp):
+    cache = bridge.PlaylistCache(samples=8)
+    sync(cache, backend, winamp)
+
+    winamp.replace_track(0)
+    winamp.move_track(10, 20)
+    winamp.remove_track(30)
+    assert sync(cache, backend, winamp) == paths(winamp)
+    # Entries whose pointer is known are not read again.
+    assert backend.calls["read_memory"] < 10
+
+
+def test_rotating_window_catches_a_change_in_the_middle(backend, winamp):
+    cache = bridge.PlaylistCache(samples=8)
+    sync(cache, backend, winamp)
+
+    winamp.replace_track(25)
+    for _ in range(50 // 8 + 1):
+        items = sync(cache, backend, winamp)
+    assert items == paths(winamp)
+
+
+def test_a_new_window_starts_over(backend, winamp):
+    cache = bridge.PlaylistCache(samples=8)
+    sync(cache, backend, winamp)
+
+    backend.stop(winamp)
+    restarted = backend.start(tracks=3)
+    assert sync(cache, backend, restarted) == paths(restarted)
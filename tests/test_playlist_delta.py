@@ -0,0 +1,102 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+
+def apply(items, ops):
+    """Replay delta operations the way a client would."""
+    items = list(items)
+    for op in ops:
+        if op["op"] == "insert":
+            items[op["index"]:op["index"]] = op["items"]
+        elif op["op"] == "remove":
+            del items[op["index"]:op["index"] + op["count"]]
+        elif op["op"] == "move":
+            items.insert(op["to"], items.pop(op["from"]))
+        elif op["op"] == "replace":
+            items[op["index"]:op["index"] + op["count"]] = op["items"]
+    return items
+
+
+@pytest.mark.parametrize("old, new, ops", [
+    (["a", "b"], ["a", "b"], []),
+    (["a", "b"], ["a", "x", "y", "b"], [{"op": "insert", "index": 1, "items": ["x", "y"]}]),
+    (["a", "b", "c"], ["a"], [{"op": "remove", "index": 1, "count": 2}]),
+    (["a", "b", "c", "d"], ["a", "c", "d", "b"], [{"op": "move", "from": 1, "to": 3}]),
+    (["a", "b", "c", "d"], ["a", "d", "b", "c"], [{"op": "move", "from": 3, "to": 1}]),
+    (["a", "b", "c"], ["a", "x", "c"],
+     [{"op": "replace", "index": 1, "count": 1, "items": ["x"]}]),
+])
+def test_diff_playlist(old, new, ops):
+    assert bridge.diff_playlist(old, new) == ops
+    assert apply(old, ops) == new
+
+
+@pytest.fixture
+def delta(monkeypatch):
+    monkeypatch.setattr(bridge, "PLAYLIST_MODE", "delta")
+
+
+def published(client, topic):
+    return [json.loads(payload) for payload in client.payloads(topic)]
+
+
+def playlist(backend, winamp_bridge):
+    return [path for _, path in backend.instances[winamp_bridge.handles.hwnd()].playlist]
+
+
+def test_deltas_follow_the_snapshot(backend, winamp_bridge, client, delta):
+    base = winamp_bridge.base_topic
+    winamp = backend.instances[winamp_bridge.handles.hwnd()]
+    winamp_bridge.poll_once(slow=True)
+
+    [snapshot] = published(client, base + "/playlist/snapshot")
+    assert snapshot["items"] == playlist(backend, winamp_bridge)
+    assert "playlist" not in published(client, base + "/state")[0]
+
+    items, seq = snapshot["items"], snapshot["seq"]
+    for edit in (lambda: winamp.add_tracks(2, index=1), lambda: winamp.move_track(0, 3),
+                 lambda: winamp.remove_track(2), lambda: winamp.replace_track(0)):
+        edit()
+        winamp_bridge.poll_once(slow=True)
+        message = published(client, base + "/playlist/delta")[-1]
+        assert message["epoch"] == snapshot["epoch"]
+        assert message["seq"] == seq + 1
+        items, seq = apply(items, message["ops"]), message["seq"]
+        assert items == playlist(backend, winamp_bridge)
+        assert message["length"] == len(items)
+
+    # Nothing changed: no delta and no snapshot.
+    count = len(client.messages)
+    winamp_bridge.poll_once(slow=True)
+    assert [topic for topic, _, _ in client.messages[count:] if "/playlist/" in topic] == []
+
+
+def test_resync_request_republishes_the_snapshot(backend, winamp_bridge, client, delta):
+    base = winamp_bridge.base_topic
+    winamp_bridge.poll_once(slow=True)
+    backend.instances[winamp_bridge.handles.hwnd()].add_tracks(1)
+    winamp_bridge.poll_once(slow=True)
+
+    winamp_bridge.on_message(None, None, SimpleNamespace(
+        topic=base + "/cmnd/playlist_resync", payload=b""))
+    assert winamp_bridge.commands.pending() == 0
+    winamp_bridge.poll_once(slow=True)
+
+    snapshots = published(client, base + "/playlist/snapshot")
+    assert len(snapshots) == 2
+    assert snapshots[-1]["items"] == playlist(backend, winamp_bridge)
+    assert snapshots[-1]["seq"] == published(client, base + "/playlist/delta")[-1]["seq"]
+    assert all(retain for topic, _, retain in client.messages
+               if topic == base + "/playlist/snapshot")
+
+
+def test_snapshot_is_repeated_after_the_interval(backend, winamp_bridge, client, delta,
+                                                 monkeypatch):
+    monkeypatch.setattr(bridge, "PLAYLIST_SNAPSHOT_INTERVAL_SEC", 0)
+    winamp_bridge.poll_once(slow=True)
+    winamp_bridge.poll_once(slow=True)
+    assert len(client.payloads(winamp_bridge.base_topic + "/playlist/snapshot")) == 2
@@ -0,0 +1,64 @@
+import os
+
+import winamp_mqtt_bridge as bridge
+
+
+def write(path, data, mtime=None):
+    with open(path, "wb") as fh:
+        fh.write(data)
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return str(path)
+
+
+def test_parse_skips_comments_and_reads_extinf_on_demand(tmp_path):
+    path = write(tmp_path / "Winamp.m3u8", (
+        "\ufeff#EXTM3U\r\n"
+        "#EXTINF:215,Artist - Song\r\n"
+        "  C:\\Music\\song.mp3  \r\n"
+        "\r\n"
+        "C:\\Music\\plain.mp3\r\n"
+    ).encode("utf-8"))
+
+    parsed = bridge.parse_playlist_file(path, limit=None)
+    assert parsed.items == ["C:\\Music\\song.mp3", "C:\\Music\\plain.mp3"]
+    assert parsed.total == 2
+    assert parsed.extinf() == {"C:\\Music\\song.mp3": "#EXTINF:215,Artist - Song"}
+
+
+def test_limit_keeps_the_total(tmp_path):
+    path = write(tmp_path / "Winamp.m3u8", b"a.mp3\nb.mp3\nc.mp3\n")
+    parsed = bridge.parse_playlist_file(path, limit=2)
+    assert parsed.items == ["a.mp3", "b.mp3"]
+    assert parsed.total == 3
+
+
+def test_ansi_playlist_uses_one_codec_for_the_whole_file(tmp_path):
+    utf8 = write(tmp_path / "utf8.m3u", "Café.mp3\nNaïve.mp3\n".encode("utf-8"))
+    assert bridge.parse_playlist_file(utf8, limit=None).items == ["Café.mp3", "Naïve.mp3"]
+
+    # Valid UTF-8 at the start, but not as a whole: every line is cp1252.
+    data = "Café.mp3\n".encode("utf-8") + "Naïve.mp3\n".encode("cp1252")
+    ansi = write(tmp_path / "ansi.m3u", data)
+    assert bridge.parse_playlist_file(ansi, limit=None).items == ["CafÃ©.mp3", "Naïve.mp3"]
+
+
+def test_extinf_of_a_changed_file_is_empty(tmp_path):
+    path = write(tmp_path / "Winamp.m3u8", b"#EXTINF:1,One\none.mp3\n", mtime=10**18)
+    parsed = bridge.parse_playlist_file(path, limit=None)
+    write(path, b"#EXTINF:2,Two\ntwo.mp3\n", mtime=2 * 10**18)
+    assert parsed.extinf() == {}
+
+
+def test_reader_parses_unchanged_files_once(tmp_path, backend, monkeypatch):
+    path = write(tmp_path / "Winamp.m3u8", b"one.mp3\ntwo.mp3\n", mtime=10**18)
+    monkeypatch.setattr(bridge, "PLAYLIST_PATH", path)
+    reader = bridge.PlaylistFileReader()
+
+    assert reader.read(2) == ["one.mp3", "two.mp3"]
+    assert reader.read(2) == ["one.mp3", "two.mp3"]
+    assert reader.parsed == 1
+
+    write(path, b"one.mp3\ntwo.mp3\nthree.mp3\n", mtime=2 * 10**18)
+    assert reader.read(3) == ["one.mp3", "two.mp3", "three.mp3"]
+    assert reader.parsed == 2
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+
+@pytest.fixture
+def paged(monkeypatch, backend, client):
+    monkeypatch.setattr(bridge, "PLAYLIST_MODE", "paged")
+    monkeypatch.setattr(bridge, "PLAYLIST_PAGE_SIZE", 4)
+    monkeypatch.setattr(bridge, "MAX_PLAYLIST_ITEMS", 5)
+    winamp = backend.start(tracks=10)
+    instance = bridge.WinampMqttBridge(client=client)
+    yield instance, winamp
+    instance.closed.set()
+
+
+def page_topics(client, instance, start=0):
+    prefix = instance.base_topic + "/playlist/page/"
+    return [topic[len(prefix):] for topic, _, _ in client.messages[start:]
+            if topic.startswith(prefix)]
+
+
+def manifests(client, instance):
+    return [json.loads(p) for p in client.payloads(instance.base_topic + "/playlist/manifest")]
+
+
+def test_pages_cover_the_whole_playlist(paged, client):
+    instance, winamp = paged
+    instance.poll_once(slow=True)
+
+    items = []
+    for number in range(3):
+        [payload] = client.payloads("%s/playlist/page/%d" % (instance.base_topic, number))
+        page = json.loads(payload)
+        assert page["page"] == number and page["start"] == 4 * number
+        items += page["items"]
+    # MAX_PLAYLIST_ITEMS does not cut the playlist short.
+    assert items == [path for _, path in winamp.playlist]
+
+    [manifest] = manifests(client, instance)
+    assert manifest["length"] == 10
+    assert manifest["page_size"] == 4
+    assert len(manifest["pages"]) == 3
+    assert "playlist" not in json.loads(client.payloads(instance.base_topic + "/state")[0])
+    assert all(retain for topic, _, retain in client.messages if "/playlist/" in topic)
+
+
+def test_only_changed_pages_are_republished(paged, client):
+    instance, winamp = paged
+    instance.poll_once(slow=True)
+    first = manifests(client, instance)[0]
+
+    count = len(client.messages)
+    instance.poll_once(slow=True)
+    assert page_topics(client, instance, count) == []
+    assert len(manifests(client, instance)) == 1
+
+    winamp.replace_track(5)
+    instance.poll_once(slow=True)
+    assert page_topics(client, instance, count) == ["1"]
+    second = manifests(client, instance)[-1]
+    assert second["pages"][0] == first["pages"][0]
+    assert second["pages"][1] != first["pages"][1]
+    assert second["hash"] != first["hash"]
+
+
+def test_pages_past_the_end_are_cleared(paged, client):
+    instance, winamp = paged
+    instance.poll_once(slow=True)
+    for _ in range(7):
+        winamp.remove_track(0)
+
+    count = len(client.messages)
+    instance.poll_once(slow=True)
+    cleared = [(topic, payload) for topic, payload, _ in client.messages[count:]
+               if topic.endswith(("/page/1", "/page/2"))]
+    assert cleared == [
+        (instance.base_topic + "/playlist/page/1", None),
+        (instance.base_topic + "/playlist/page/2", None),
+    ]
+    assert manifests(client, instance)[-1]["length"] == 3
+
+
+def test_resync_republishes_every_page(paged, client):
+    instance, _ = paged
+    instance.poll_once(slow=True)
+    instance.snapshot_requested.set()
+
+    count = len(client.messages)
+    instance.poll_once(slow=True)
+    assert page_topics(client, instance, count) == ["0", "1", "2"]
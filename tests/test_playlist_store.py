@@ -0,0 +1,65 @@
+from conftest import load_component_module
+
+PlaylistStore = load_component_module("playlist").PlaylistStore
+
+ENTRIES = ["C:\\a.mp3", "C:\\b.mp3", "C:\\a.mp3", "C:\\c.mp3", "C:\\a.mp3"]
+
+
+def test_reads_entries_and_slices():
+    store = PlaylistStore(ENTRIES)
+    assert len(store) == 5
+    assert store[1] == "C:\\b.mp3"
+    assert store[-1] == "C:\\a.mp3"
+    assert store.slice(1, 3) == ["C:\\b.mp3", "C:\\a.mp3"]
+    assert store.slice(4, 10) == ["C:\\a.mp3"]
+    assert store.to_list() == ENTRIES
+
+
+def test_packing_keeps_the_content():
+    store = PlaylistStore(ENTRIES)
+    store.pack()
+    assert store.to_list() == ENTRIES
+    assert store[3] == "C:\\c.mp3"
+    assert store.slice(0, 2) == ["C:\\a.mp3", "C:\\b.mp3"]
+
+
+def test_duplicates_are_all_found_and_the_nearest_wins():
+    store = PlaylistStore(ENTRIES)
+    assert store.indices("C:\\a.mp3") == [0, 2, 4]
+    assert store.indices("C:\\missing.mp3") == []
+    assert store.nearest("C:\\a.mp3", None) == 0
+    assert store.nearest("C:\\a.mp3", 3) == 2
+    assert store.nearest("C:\\a.mp3", 5) == 4
+    assert store.nearest("C:\\b.mp3", 4) == 1
+
+
+def test_replace_reports_changes_only():
+    store = PlaylistStore(ENTRIES)
+    version = store.version
+    assert store.replace(list(ENTRIES)) is False
+    store.pack()
+    assert store.replace(list(ENTRIES)) is False
+    assert store.version == version
+
+    assert store.replace(ENTRIES[:-1]) is True
+    assert store.version == version + 1
+    assert store.indices("C:\\a.mp3") == [0, 2]
+
+
+def test_matching_digest_skips_the_comparison():
+    store = PlaylistStore()
+    assert store.replace(ENTRIES, digest="abc") is True
+    assert store.replace(["different"], digest="abc") is False
+    assert store.to_list() == ENTRIES
+
+
+def test_edits_in_place_are_seen_by_lookups():
+    store = PlaylistStore(ENTRIES)
+    store.pack()
+    assert store.indices("C:\\c.mp3") == [3]
+
+    store.edit().insert(0, "C:\\new.mp3")
+    assert store.indices("C:\\c.mp3") == [4]
+    del store.edit()[1]
+    assert store.to_list() == ["C:\\new.mp3", "C:\\b.mp3", "C:\\a.mp3", "C:\\c.mp3", "C:\\a.mp3"]
+    assert store.nearest("C:\\a.mp3", 4) == 4
@@ -0,0 +1,107 @@
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+
+@pytest.fixture
+def scheduler(clock, monkeypatch):
+    monkeypatch.setattr(bridge, "POST_COMMAND_FOLLOWUP_SEC", 0.5)
+    return bridge.PollScheduler(
+        clock=clock,
+        fast_interval=1.0,
+        slow_interval=10.0,
+        boost_interval=0.25,
+        boost_duration=3.0,
+        idle_max_interval=8.0,
+    )
+
+
+def poll(scheduler, status, transition=False):
+    """Poll whatever is due, as the bridge loop does; return (fast, slow, interval)."""
+    fast, slow = scheduler.due()
+    interval = scheduler.record(status, slow, transition) if fast else None
+    return fast, slow, interval
+
+
+def test_first_poll_reads_both_tiers(scheduler):
+    assert scheduler.due() == (True, True)
+
+
+def test_slow_tier_is_due_every_slow_interval(scheduler, clock):
+    assert poll(scheduler, "playing") == (True, True, 1.0)
+
+    for _ in range(9):
+        clock.advance(1.0)
+        assert poll(scheduler, "playing") == (True, False, 1.0)
+    clock.advance(1.0)
+    assert poll(scheduler, "playing") == (True, True, 1.0)
+
+
+def test_nothing_is_due_between_polls(scheduler, clock):
+    poll(scheduler, "playing")
+    clock.advance(0.4)
+    assert scheduler.due() == (False, False)
+    assert scheduler.next_delay() == pytest.approx(0.6)
+
+
+def test_idle_polls_back_off_up_to_the_maximum(scheduler, clock):
+    intervals = []
+    for _ in range(6):
+        _, _, interval = poll(scheduler, "idle")
+        intervals.append(interval)
+        clock.advance(interval)
+    assert intervals == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+
+    # Playback resets the backoff.
+    assert poll(scheduler, "playing")[2] == 1.0
+    clock.advance(1.0)
+    assert poll(scheduler, "paused")[2] == 1.0
+
+
+def test_trigger_polls_now_and_boosts(scheduler, clock):
+    poll(scheduler, "idle")
+    clock.advance(0.1)
+
+    scheduler.trigger(slow=False, followup=None)
+    assert scheduler.next_delay() == 0.0
+    assert poll(scheduler, "idle") == (True, False, 0.25)
+
+    # Boosted until boost_duration has passed, then back to normal.
+    clock.advance(2.8)
+    assert poll(scheduler, "idle")[2] == 0.25
+    clock.advance(0.25)
+    assert poll(scheduler, "idle")[2] == 1.0
+
+
+def test_slow_trigger_wins_over_a_later_fast_one(scheduler):
+    poll(scheduler, "playing")
+    scheduler.trigger(slow=True, followup=None)
+    scheduler.trigger(slow=False, followup=None)
+    assert scheduler.due() == (True, True)
+
+
+def test_followup_reads_the_slow_tier_once(scheduler, clock):
+    poll(scheduler, "playing")
+    scheduler.trigger(slow=False, followup=0.5)
+    assert poll(scheduler, "playing") == (True, False, 0.25)
+
+    clock.advance(0.25)
+    assert poll(scheduler, "playing") == (True, False, 0.25)
+    clock.advance(0.25)
+    assert poll(scheduler, "playing") == (True, True, 0.25)
+    clock.advance(0.25)
+    assert poll(scheduler, "playing") == (True, False, 0.25)
+
+
+def test_transition_boosts_and_schedules_a_followup(scheduler, clock):
+    for _ in range(3):
+        _, _, interval = poll(scheduler, "idle")
+        clock.advance(interval)
+    assert scheduler.idle_interval == 8.0
+
+    assert poll(scheduler, "playing", transition=True) == (True, False, 0.25)
+    assert scheduler.idle_interval == 1.0
+    clock.advance(0.25)
+    poll(scheduler, "playing")
+    clock.advance(0.25)
+    assert poll(scheduler, "playing")[1] is True
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+
+def published(client, topic):
+    return [json.loads(payload) for payload in client.payloads(topic)]
+
+
+@pytest.fixture
+def split(monkeypatch):
+    monkeypatch.setattr(bridge, "STATE_PUBLISH_MODE", "split")
+
+
+def test_split_mode_publishes_only_changed_fields(backend, winamp_bridge, client, split):
+    base = winamp_bridge.base_topic
+    winamp_bridge.poll_once(slow=True)
+    assert published(client, base + "/state/status") == ["idle"]
+    assert published(client, base + "/state/volume") == [78]
+    assert client.payloads(base + "/state") == []
+
+    client.messages.clear()
+    winamp_bridge.poll_once(slow=True)
+    assert [topic for topic, _, _ in client.messages if "/state/" in topic] == []
+
+    client.messages.clear()
+    backend.instances[winamp_bridge.handles.hwnd()].volume = 255
+    winamp_bridge.poll_once(slow=True)
+    assert [topic for topic, _, _ in client.messages if "/state/" in topic] == [
+        base + "/state/volume"
+    ]
+    assert published(client, base + "/state/volume") == [100]
+
+
+def test_field_topics_are_retained(winamp_bridge, client, split):
+    winamp_bridge.poll_once(slow=True)
+    assert all(retain for topic, _, retain in client.messages if "/state/" in topic)
+
+
+def test_combined_mode_publishes_one_state_only_when_it_changed(backend, winamp_bridge, client):
+    topic = winamp_bridge.base_topic + "/state"
+    winamp_bridge.poll_once(slow=True)
+    winamp_bridge.poll_once(slow=True)
+    states = published(client, topic)
+    assert len(states) == 1
+    assert states[0]["status"] == "idle"
+    assert [name for name, _, _ in client.messages if name.startswith(topic + "/")] == []
+
+    backend.instances[winamp_bridge.handles.hwnd()].status = 1
+    winamp_bridge.poll_once(slow=True)
+    assert published(client, topic)[-1]["status"] == "playing"
@@ -0,0 +1,77 @@
+import pytest
+
+import winamp_mqtt_bridge as bridge
+
+PAGE = bridge.PAGE_SIZE
+
+
+@pytest.fixture
+def winamp(backend):
+    return backend.start()
+
+
+@pytest.fixture
+def process(backend, winamp):
+    return backend.open_process(winamp.pid)
+
+
+@pytest.fixture
+def reader(backend):
+    return bridge.RemoteStringReader(backend)
+
+
+def put(winamp, address, text, wide=True):
+    data = text.encode("utf-16-le" if wide else "latin-1") + (b"\0\0" if wide else b"\0")
+    winamp.write_memory(address, data)
+    return address
+
+
+def test_short_string_costs_one_read(backend, winamp, process, reader):
+    address = winamp.allocate_string("C:\\Music\\song.mp3")
+    backend.reset_counters()
+    assert reader.read(process, address, wide=True) == "C:\\Music\\song.mp3"
+    assert backend.calls["read_memory"] == 1
+    assert backend.bytes_read <= reader.first_read
+
+
+def test_read_stops_before_an_unmapped_page(winamp, process, reader):
+    # The string ends a few bytes before a page nobody mapped.
+    base = 40 * PAGE
+    address = put(winamp, base + PAGE - 12, "abcde")
+    assert base + PAGE not in winamp.pages
+    assert reader.read(process, address, wide=True) == "abcde"
+
+
+def test_long_string_spans_pages(backend, winamp, process, reader):
+    text = "x" * 700
+    address = put(winamp, 50 * PAGE + PAGE - 101, text)
+    backend.reset_counters()
+    assert reader.read(process, address, wide=True) == text
+    assert backend.calls["read_memory"] >= 2
+
+
+def test_wide_terminator_on_an_odd_offset_is_not_the_end(winamp, process, reader):
+    # "\u0100\u0001" encodes as 00 01 01 00: a NUL pair straddling code units.
+    address = put(winamp, 60 * PAGE, "\u0100\u0001z")
+    assert reader.read(process, address, wide=True) == "\u0100\u0001z"
+
+
+def test_ansi_and_truncated_strings(winamp, process):
+    reader = bridge.RemoteStringReader(max_bytes=64, first_read=16)
+    assert reader.read(process, put(winamp, 70 * PAGE, "plain.mp3", wide=False)) == "plain.mp3"
+    assert reader.read(process, put(winamp, 71 * PAGE, "y" * 100, wide=False)) == "y" * 64
+
+
+def test_unreadable_addresses_give_none(process, reader):
+    assert reader.read(process, 0) is None
+    assert reader.read(process, 90 * PAGE) is None
+
+
+def test_read_many_shares_page_reads(backend, winamp, process, reader):
+    paths = ["C:\\Music\\%02d.mp3" % n for n in range(20)]
+    addresses = [winamp.allocate_string(path) for path in paths]
+    backend.reset_counters()
+
+    shuffled = addresses[::-1] + [0]
+    assert reader.read_many(process, shuffled, wide=True) == paths[::-1] + [None]
+    assert backend.calls["read_memory"] <= 2
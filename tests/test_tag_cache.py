@@ -0,0 +1,41 @@
+import winamp_mqtt_bridge as bridge
+
+
+def test_files_are_parsed_outside_the_lock(tmp_path):
+    song = tmp_path / "song.mp3"
+    song.write_bytes(b"\0" * 16)
+    locked = []
+
+    def reader(path):
+        locked.append(cache.lock.locked())
+        return {"title": "Song"}
+
+    cache = bridge.TagCache(path=None, reader=reader)
+    assert cache.get(str(song)) == {"title": "Song"}
+    assert cache.get(str(song)) == {"title": "Song"}
+    assert locked == [False]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_slow_poll_publishes_before_warming_the_tag_cache(backend, client, tmp_path):
+    backend.start(tracks=5).status = 1
+    events = []
+
+    class Tags(bridge.TagCache):
+        def prefetch(self, paths, limit=bridge.TAG_PREFETCH_PER_POLL):
+            events.append("prefetch")
+
+        def flush(self):
+            events.append("flush")
+
+    publish = client.publish
+
+    def recording_publish(topic, payload=None, qos=0, retain=False):
+        if topic == "winamp/state":
+            events.append("state")
+        publish(topic, payload, qos, retain)
+
+    client.publish = recording_publish
+    winamp_bridge = bridge.WinampMqttBridge(client=client, tags=Tags(path=None))
+    winamp_bridge.poll_state(True)
+    assert events == ["state", "prefetch", "flush"]
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+from conftest import FakeClock
+
+
+@pytest.fixture
+def wall():
+    return FakeClock(now=1_700_000_000.0)
+
+
+@pytest.fixture
+def timeline(clock, wall):
+    return bridge.PlaybackTimeline(clock=clock, wall_clock=wall, tolerance=1.5)
+
+
+def advance(clock, wall, seconds):
+    clock.advance(seconds)
+    wall.advance(seconds)
+
+
+def test_steady_playback_keeps_the_anchor(timeline, clock, wall):
+    first = timeline.update("playing", 0, 10.0, 200.0)
+    assert first == {"elapsed": 10.0, "duration": 200.0, "elapsed_at": 1_700_000_000.0}
+
+    for _ in range(5):
+        advance(clock, wall, 1.0)
+        elapsed = 10.0 + (clock() - 1000.0) + 0.2
+        assert timeline.update("playing", 0, elapsed, 200.0) is first
+
+
+def test_seek_and_track_change_take_a_new_anchor(timeline, clock, wall):
+    timeline.update("playing", 0, 10.0, 200.0)
+    advance(clock, wall, 1.0)
+    seeked = timeline.update("playing", 0, 60.0, 200.0)
+    assert seeked["elapsed"] == 60.0
+    assert seeked["elapsed_at"] == wall()
+
+    advance(clock, wall, 1.0)
+    changed = timeline.update("playing", 1, 1.0, 180.0)
+    assert changed == {"elapsed": 1.0, "duration": 180.0, "elapsed_at": wall()}
+
+
+def test_paused_position_must_not_move(timeline, clock, wall):
+    paused = timeline.update("paused", 0, 30.0, 200.0)
+    advance(clock, wall, 10.0)
+    assert timeline.update("paused", 0, 30.0, 200.0) is paused
+    assert timeline.update("paused", 0, 35.0, 200.0)["elapsed"] == 35.0
+
+
+def test_stopped_has_no_position(timeline):
+    assert timeline.update("idle", 0, None, None) == {
+        "elapsed": None, "duration": None, "elapsed_at": None,
+    }
+
+
+def test_restore_keeps_fields_that_still_hold(timeline, clock, wall):
+    fields = {"elapsed": 20.0, "duration": 200.0, "elapsed_at": wall() - 5.0}
+    timeline.restore("playing", 0, fields)
+    assert timeline.update("playing", 0, 25.3, 200.0) == fields
+    assert timeline.update("playing", 0, 90.0, 200.0)["elapsed"] == 90.0
+
+
+def test_bridge_publishes_the_timeline(backend, winamp_bridge, client):
+    backend.instances[winamp_bridge.handles.hwnd()].handle_message(
+        bridge.WM_COMMAND, bridge.WA_PLAY, 0)
+    winamp_bridge.poll_once(slow=True)
+    state = json.loads(client.payloads(winamp_bridge.base_topic + "/state")[-1])
+    assert state["elapsed"] is not None and state["elapsed"] < 5
+    assert state["duration"] >= 120
+    assert state["elapsed_at"] is not None
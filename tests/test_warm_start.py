@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+import winamp_mqtt_bridge as bridge
+from conftest import RecordingClient
+
+
+def test_load_returns_what_was_written(tmp_path, clock):
+    snapshot = bridge.WarmStartFile(str(tmp_path / "state.json"), interval=30, clock=clock)
+    assert snapshot.load() is None
+
+    document = {"version": bridge.WarmStartFile.VERSION, "state": {"volume": 50}}
+    assert snapshot.write(document)
+    assert snapshot.load() == document
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_writes_are_rate_limited(tmp_path, clock):
+    snapshot = bridge.WarmStartFile(str(tmp_path / "state.json"), interval=30, clock=clock)
+    assert snapshot.due()
+    snapshot.write({"version": 1})
+    assert not snapshot.due()
+    clock.advance(30)
+    assert snapshot.due()
+
+
+@pytest.mark.parametrize("content", ["{not json", '{"version": 0}', "[1]"])
+def test_unusable_snapshots_are_ignored(tmp_path, content):
+    path = tmp_path / "state.json"
+    path.write_text(content)
+    assert bridge.WarmStartFile(str(path)).load() is None
+
+
+def test_failed_write_keeps_the_previous_snapshot(tmp_path):
+    snapshot = bridge.WarmStartFile(str(tmp_path / "state.json"), interval=0)
+    snapshot.write({"version": 1, "state": {}})
+    assert not snapshot.write({"version": 1, "state": object()})
+    assert snapshot.load() == {"version": 1, "state": {}}
+
+
+def start_bridge(client, path):
+    return bridge.WinampMqttBridge(
+        client=client, warm_start=bridge.WarmStartFile(path, interval=0))
+
+
+def test_restart_publishes_the_snapshot_and_reuses_the_playlist(backend, tmp_path):
+    path = str(tmp_path / "state.json")
+    winamp = backend.start(tracks=50)
+    first = start_bridge(RecordingClient(), path)
+    first.poll_once(slow=True)
+    first.closed.set()
+    assert json.load(open(path))["playlist"] == [p for _, p in winamp.playlist]
+
+    client = RecordingClient()
+    second = start_bridge(client, path)
+    second.publish_restored_state()
+    topic = second.base_topic + "/state"
+    [restored] = [json.loads(p) for p in client.payloads(topic)]
+    assert restored["playlist"] == [p for _, p in winamp.playlist]
+    assert restored["volume"] == 78
+
+    backend.reset_counters()
+    second.poll_once(slow=True)
+    # The seeded playlist cache only checks its fingerprint, and the
+    # unchanged state is not published again.
+    assert backend.calls["read_memory"] <= 3
+    assert len(client.payloads(topic)) == 1
+    second.closed.set()
+
+
+def test_snapshot_of_another_process_does_not_seed_the_cache(backend, tmp_path):
+    path = str(tmp_path / "state.json")
+    backend.start(tracks=20)
+    first = start_bridge(RecordingClient(), path)
+    first.poll_once(slow=True)
+    first.closed.set()
+
+    backend.stop()
+    winamp = backend.start(tracks=5)
+    client = RecordingClient()
+    second = start_bridge(client, path)
+    assert second.playlist_cache.hwnd is None
+
+    second.publish_restored_state()
+    second.poll_once(slow=True)
+    latest = json.loads(client.payloads(second.base_topic + "/state")[-1])
+    assert latest["playlist"] == [p for _, p in winamp.playlist]
+    second.closed.set()
@@ -3,13 +3,39 @@ import json
 import logging
 import threading
 import os
+import bisect
+import collections
+import concurrent.futures
+import ctypes
+import functools
+import hashlib
+import io
+import re
+import socket
+import sqlite3
+import struct
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-import win32gui
-import win32api
-import win32con
-import win32process
 import paho.mqtt.client as mqtt
 
+try:
+    import win32gui
+    import win32api
+    import win32process
+except ImportError:  # not on Windows; only SimulatedBackend is usable
+    win32gui = win32api = win32process = None
+
+try:
+    import mutagen
+except ImportError:  # MP3 and FLAC tags are parsed without it
+    mutagen = None
+
+try:
+    from PIL import Image
+except ImportError:  # artwork is served at its original size
+    Image = None
+
 # --- CONFIG -----------------------------------------------------------------
 
 MQTT_HOST = "192.168.1.11"   # <-- change to your MQTT broker IP
@@ -25,16 +51,170 @@ BASE_TOPIC = "winamp"        # will use winamp/state and winamp/cmnd/...
 # playlist next to winamp.exe or only emit the ANSI Winamp.m3u variant. We try
 # all known locations and pick the most recently modified file.
 PLAYLIST_PATH = os.path.join(os.environ.get("APPDATA", ""), "Winamp", "Winamp.m3u8")
-MAX_PLAYLIST_ITEMS = 500
+MAX_PLAYLIST_ITEMS = 500          # ignored when PLAYLIST_MODE is "paged"
+# Parsed playlist files are cached by path, size and mtime, and candidate
+# locations that do not exist are only looked at again every
+# PLAYLIST_CANDIDATE_RESCAN_SEC.
+PLAYLIST_CANDIDATE_RESCAN_SEC = 60.0
+PLAYLIST_FINGERPRINT_SAMPLES = 32  # playlist pointers re-checked per poll
+
+# Polling is tiered: cheap fields (status, volume, playlist position and
+# length) are read every FAST_POLL_INTERVAL_SEC while playing, the title and
+# playlist every SLOW_POLL_INTERVAL_SEC or as soon as a cheap field shows a
+# transition. Commands and transitions switch to BOOST_POLL_INTERVAL_SEC for
+# BOOST_DURATION_SEC; while Winamp is paused, stopped or not running the
+# interval doubles on every quiet poll up to IDLE_POLL_INTERVAL_MAX_SEC.
+FAST_POLL_INTERVAL_SEC = 1.0
+SLOW_POLL_INTERVAL_SEC = 10.0
+BOOST_POLL_INTERVAL_SEC = 0.25
+BOOST_DURATION_SEC = 3.0
+# After a command the bridge re-polls (and publishes) at once, then polls the
+# title and playlist once more this many seconds later for late updates.
+POST_COMMAND_FOLLOWUP_SEC = 0.75
+IDLE_POLL_INTERVAL_MAX_SEC = 30.0
+
+# How state reaches MQTT:
+#   "combined" - one JSON document on winamp/state (default, legacy)
+#   "split"    - each field on its own retained topic, winamp/state/<field>,
+#                published only when that field changes
+#   "both"     - publish both forms (handy while migrating consumers)
+STATE_PUBLISH_MODE = "combined"
+STATE_FIELDS = (
+    "available", "status", "title", "volume", "position", "playlist",
+    "elapsed", "duration", "elapsed_at", "tags", "art",
+)
 
-POLL_INTERVAL_SEC = 2        # how often to publish state
+# Elapsed time is only republished when it jumps (seek, track change, pause,
+# resume) by more than this many seconds from where steady playback would
+# have put it; clients interpolate in between.
+POSITION_DRIFT_TOLERANCE_SEC = 1.5
+
+# How the playlist reaches MQTT:
+#   "inline" - as the "playlist" field of the state (default)
+#   "delta"  - numbered insert/remove/move/replace operations on
+#              winamp/playlist/delta, plus a retained full snapshot on
+#              winamp/playlist/snapshot at startup, every
+#              PLAYLIST_SNAPSHOT_INTERVAL_SEC and whenever a client asks for a
+#              resync via winamp/cmnd/playlist_resync
+#   "paged"  - retained pages of PLAYLIST_PAGE_SIZE entries on
+#              winamp/playlist/page/<n> plus a retained manifest on
+#              winamp/playlist/manifest listing each page's hash; only pages
+#              whose content changed are republished. MAX_PLAYLIST_ITEMS does
+#              not apply in this mode.
+PLAYLIST_MODE = "inline"
+PLAYLIST_SNAPSHOT_INTERVAL_SEC = 300
+PLAYLIST_PAGE_SIZE = 500
+
+# How state and playlist payloads are encoded:
+#   "json"   - plain JSON (default)
+#   "zlib"   - zlib-compressed JSON
+#   "prefix" - zlib-compressed JSON with playlist paths split into a table of
+#              shared directories plus one (directory, file name) pair each
+#   "auto"   - plain JSON until a client asks for one of the above on
+#              winamp/cmnd/encoding (e.g. "prefix,zlib,json")
+# Encoded payloads start with a NUL byte and a format byte, which plain JSON
+# never does, so subscribers can tell them apart. Payloads shorter than
+# PAYLOAD_COMPRESS_MIN_BYTES are always sent as plain JSON. The supported
+# encodings and the active one are announced on the retained
+# winamp/capabilities topic.
+PAYLOAD_ENCODING = "json"
+PAYLOAD_COMPRESS_MIN_BYTES = 256
+PAYLOAD_ZLIB_LEVEL = 6
+
+# Artist/album/title/track/duration tags of the current track are published in
+# the "tags" state field. Parsed tags are kept in an LRU of TAG_CACHE_ENTRIES
+# and in an SQLite file at TAG_CACHE_PATH (None to keep them in memory only),
+# keyed by path, size and mtime, so a file is only parsed again after it
+# changes. Every slow poll also warms the cache with up to
+# TAG_PREFETCH_PER_POLL playlist entries.
+TAG_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "winamp_tags.sqlite")
+TAG_CACHE_ENTRIES = 2048
+TAG_PREFETCH_PER_POLL = 50
+
+# Warm start: the last published state, the playlist cache's fingerprint
+# (window, process id and entry pointers), the playlist file last matched and
+# winamp.exe's directory are kept in a JSON snapshot at STATE_SNAPSHOT_PATH
+# (one file per instance with MULTI_INSTANCE; None to turn it off). On start
+# the snapshot is published before the first poll and becomes the base that
+# poll is compared against, and while the same Winamp process is still
+# running its playlist is not read over IPC again. The file is replaced
+# atomically, at most every STATE_SNAPSHOT_INTERVAL_SEC seconds and only
+# when the state changed.
+STATE_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "winamp_state.json")
+STATE_SNAPSHOT_INTERVAL_SEC = 30.0
+
+# Album art (embedded in MP3/FLAC files or a cover/folder image next to them)
+# is served over HTTP at <ARTWORK_PUBLIC_URL>/art/<hash>/<size>, where the
+# hash is taken from the image content, and announced in the "art" state
+# field. With Pillow installed each image is also scaled down to
+# ARTWORK_SIZES (on first request). Images and thumbnails live in
+# ARTWORK_CACHE_DIR, trimmed to ARTWORK_CACHE_MAX_BYTES. Set
+# ARTWORK_HTTP_PORT to None to turn this off.
+ARTWORK_HTTP_HOST = "0.0.0.0"
+ARTWORK_HTTP_PORT = 8765
+ARTWORK_PUBLIC_URL = None    # default: http://<this host's name>:<port>
+ARTWORK_SIZES = (96, 300, 600)
+ARTWORK_DEFAULT_SIZE = 300   # size used for the published URL
+ARTWORK_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artwork_cache")
+ARTWORK_CACHE_MAX_BYTES = 64 * 1024 * 1024
+ARTWORK_FOLDER_NAMES = ("cover.jpg", "folder.jpg", "front.jpg", "album.jpg",
+                        "cover.png", "folder.png", "front.png")
+
+# Several Winamp instances on one host (e.g. one per zone, with "Allow
+# multiple instances" enabled): with MULTI_INSTANCE every Winamp window gets
+# its own namespace, winamp/<id>/state, winamp/<id>/cmnd/... and so on. <id>
+# comes from INSTANCE_IDS (directory of winamp.exe -> id) or else from the
+# name of that directory, numbered (-2, -3, ...) when instances share it. All
+# instances share one MQTT connection; POLL_WORKERS threads poll them
+# concurrently, and the windows are enumerated again every
+# INSTANCE_SCAN_INTERVAL_SEC. An instance whose poll is still running after
+# INSTANCE_HUNG_AFTER_SEC is reported offline without holding up the others.
+# The instances are listed on the retained winamp/instances topic.
+MULTI_INSTANCE = False
+INSTANCE_IDS = {}
+POLL_WORKERS = 4
+INSTANCE_SCAN_INTERVAL_SEC = 5.0
+INSTANCE_HUNG_AFTER_SEC = 10.0
+
+# A plain SendMessage to a hung Winamp blocks until it responds again. With a
+# timeout (milliseconds; None for plain SendMessage) the call fails instead
+# and that poll or command is abandoned.
+SEND_MESSAGE_TIMEOUT_MS = 2000
+
+# Prometheus metrics (poll stage timings, SendMessage and memory-read counts,
+# MQTT traffic, command latency, playlist-file fallbacks) are served in the
+# text exposition format at http://<host>:<METRICS_HTTP_PORT>/metrics. Set
+# METRICS_HTTP_PORT to None to turn this off.
+METRICS_HTTP_HOST = "0.0.0.0"
+METRICS_HTTP_PORT = 9765
+
+# Commands the bridge executes (winamp/cmnd/<command>).
+COMMANDS = ("play", "pause", "stop", "next", "prev", "toggle", "vol_up", "vol_down",
+            "volume", "play_index", "seek")
+
+# Commands that only touch fast-tier fields; they skip the immediate
+# title/playlist re-read and the follow-up poll.
+FAST_TIER_COMMANDS = ("volume", "vol_up", "vol_down", "seek")
+
+# Commands where only the latest value matters. While one is still queued a
+# newer one replaces it (e.g. a burst of volume messages from a slider drag);
+# everything else runs once per message, in order.
+COALESCED_COMMANDS = ("volume", "play_index", "seek")
 
 # --- WINAMP CONSTANTS -------------------------------------------------------
 
 WINAMP_CLASS = "Winamp v1.x"
 
-WM_COMMAND = win32con.WM_COMMAND
-WM_WA_IPC = win32con.WM_USER  # Winamp’s IPC base :contentReference[oaicite:1]{index=1}
+WM_COMMAND = 0x0111       # win32con.WM_COMMAND
+WM_WA_IPC = 0x0400        # win32con.WM_USER, Winamp’s IPC base :contentReference[oaicite:1]{index=1}
+
+PAGE_SIZE = 4096          # remote reads never cross a page boundary
+
+# OpenProcess access rights needed to read playlist strings
+PROCESS_QUERY_INFORMATION = 0x0400
+PROCESS_VM_READ = 0x0010
+
+SMTO_ABORTIFHUNG = 0x0002  # SendMessageTimeout: give up on a hung window
 
 # WM_COMMAND playback IDs (documented Winamp API)
 WA_PREV  = 40044
@@ -45,6 +225,8 @@ WA_NEXT  = 40048          # :contentReference[oaicite:2]{index=2}
 
 # IPC codes
 IPC_ISPLAYING = 104       # 1=playing, 3=paused, 0=stopped :contentReference[oaicite:3]{index=3}
+IPC_GETOUTPUTTIME = 105   # wParam 0: position (ms), 1: length (s), 2: length (ms)
+IPC_JUMPTOTIME = 106      # wParam: position (ms); 0=ok, -1=not playing, 1=past end
 IPC_SETVOLUME = 122       # 0–255; -666 returns current volume :contentReference[oaicite:4]{index=4}
 IPC_SETPLAYLISTPOS = 121
 IPC_GETLISTLENGTH = 124
@@ -62,36 +244,867 @@ logging.basicConfig(
 )
 
 
-def find_winamp_hwnd():
-    """Find Winamp main window handle."""
-    hwnd = win32gui.FindWindow(WINAMP_CLASS, None)
-    return hwnd or None
+# --- METRICS ----------------------------------------------------------------
+
+# Seconds; suits both single SendMessage calls and whole playlist reads.
+METRIC_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                  0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label for each message the bridge sends: the IPC code's name, or the window
+# message for anything that is not WM_WA_IPC.
+MESSAGE_NAMES = {
+    value: name for name, value in globals().items()
+    if name.startswith("IPC_") and isinstance(value, int)
+}
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _CounterValue:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.counts):
+                self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    """A counter or histogram with a fixed set of label names.
+
+    ``labels(*values)`` returns the series for those label values, created
+    on first use; hot paths can keep the returned object.
+    """
+
+    def __init__(self, kind, name, documentation, labelnames=(), buckets=METRIC_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        series = self.series.get(values)
+        if series is None:
+            with self._lock:
+                series = self.series.get(values)
+                if series is None:
+                    series = (
+                        _CounterValue() if self.kind == "counter"
+                        else _HistogramValue(self.buckets)
+                    )
+                    self.series[values] = series
+        return series
+
+    def render(self, lines):
+        lines.append("# HELP %s %s" % (self.name, self.documentation))
+        lines.append("# TYPE %s %s" % (self.name, self.kind))
+        with self._lock:
+            series = sorted(self.series.items())
+        for values, value in series:
+            labels = ['%s="%s"' % (name, _label_value(v))
+                      for name, v in zip(self.labelnames, values)]
+            if self.kind == "counter":
+                lines.append("%s%s %s" % (self.name, _labels(labels), value.value))
+                continue
+            with value._lock:
+                counts, total, count = list(value.counts), value.sum, value.count
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append("%s_bucket%s %d" % (
+                    self.name, _labels(labels + ['le="%r"' % bound]), cumulative))
+            lines.append("%s_bucket%s %d" % (self.name, _labels(labels + ['le="+Inf"']), count))
+            lines.append("%s_sum%s %r" % (self.name, _labels(labels), total))
+            lines.append("%s_count%s %d" % (self.name, _labels(labels), count))
+
+
+def _labels(pairs):
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class BridgeMetrics:
+    """Every metric the bridge records, rendered for ``/metrics``."""
+
+    def __init__(self):
+        self.poll_stage_seconds = Metric(
+            "histogram", "winamp_poll_stage_seconds",
+            "Time spent in each stage of a poll cycle.", ("instance", "stage"))
+        self.poll_seconds = Metric(
+            "histogram", "winamp_poll_seconds",
+            "Duration of a whole poll cycle, by tier.", ("instance", "tier"))
+        self.messages = Metric(
+            "counter", "winamp_sendmessage_total",
+            "SendMessage calls to Winamp, by IPC code.", ("message",))
+        self.message_failures = Metric(
+            "counter", "winamp_sendmessage_failures_total",
+            "SendMessage calls that failed or timed out.", ("message",))
+        self.memory_reads = Metric(
+            "counter", "winamp_memory_reads_total",
+            "ReadProcessMemory calls.")
+        self.memory_read_bytes = Metric(
+            "counter", "winamp_memory_read_bytes_total",
+            "Bytes read from Winamp's process memory.")
+        self.memory_read_failures = Metric(
+            "counter", "winamp_memory_read_failures_total",
+            "ReadProcessMemory calls that failed.")
+        self.playlist_disk_fallbacks = Metric(
+            "counter", "winamp_playlist_disk_fallbacks_total",
+            "Slow polls that read the playlist file because IPC returned nothing.",
+            ("instance",))
+        self.publishes = Metric(
+            "counter", "winamp_mqtt_publish_total",
+            "MQTT messages published, by topic.", ("instance", "topic"))
+        self.publish_bytes = Metric(
+            "counter", "winamp_mqtt_publish_bytes_total",
+            "MQTT payload bytes published, by topic.", ("instance", "topic"))
+        self.command_seconds = Metric(
+            "histogram", "winamp_command_seconds",
+            "Time from receiving a command to having executed it.", ("instance", "command"))
+
+        # Hot paths: one series per message name and for memory reads.
+        self._message_series = {}
+        self._reads = self.memory_reads.labels()
+        self._read_bytes = self.memory_read_bytes.labels()
+        self._read_failures = self.memory_read_failures.labels()
+
+    def message(self, msg, lparam):
+        """Return ``(calls, failures)`` series for a message to Winamp."""
+        key = lparam if msg == WM_WA_IPC else -msg
+        series = self._message_series.get(key)
+        if series is None:
+            if msg == WM_WA_IPC:
+                name = MESSAGE_NAMES.get(lparam, "IPC_%d" % lparam)
+            else:
+                name = "WM_COMMAND" if msg == WM_COMMAND else "WM_%#x" % msg
+            series = self._message_series[key] = (
+                self.messages.labels(name), self.message_failures.labels(name)
+            )
+        return series
+
+    def memory_read(self, count):
+        self._reads.inc()
+        self._read_bytes.inc(count)
+
+    def memory_read_failed(self):
+        self._read_failures.inc()
+
+    def render(self):
+        lines = []
+        for metric in vars(self).values():
+            if isinstance(metric, Metric):
+                metric.render(lines)
+        return "\n".join(lines) + "\n"
+
+
+metrics = BridgeMetrics()
+
+
+class StageTimer:
+    """``with timer:`` observes the block's duration in a histogram series.
+
+    Not reentrant; each poll stage of an instance has its own timer.
+    """
+
+    __slots__ = ("series", "started")
+
+    def __init__(self, series):
+        self.series = series
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.series.observe(time.perf_counter() - self.started)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve ``/metrics`` in the Prometheus text exposition format."""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug("metrics http: " + format, *args)
+
+
+def start_metrics_server(host=METRICS_HTTP_HOST, port=METRICS_HTTP_PORT):
+    """Serve ``/metrics`` from a daemon thread; return the server or None."""
+    if port is None:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    except OSError:
+        logging.exception("Could not start the metrics server on port %s", port)
+        return None
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="winamp-metrics", daemon=True
+    ).start()
+    return server
+
+
+# --- WINAMP BACKENDS / HANDLES ---------------------------------------------
+
+class Win32Backend:
+    """Window, IPC and process access through pywin32.
+
+    This is the only place the bridge talks to Win32; SimulatedBackend
+    implements the same methods for hosts without Winamp.
+    """
+
+    def find_window(self, class_name):
+        return win32gui.FindWindow(class_name, None) or None
+
+    def enum_windows(self, class_name):
+        """Return every top-level window of ``class_name``."""
+        found = []
+
+        def collect(hwnd, _):
+            if win32gui.GetClassName(hwnd) == class_name:
+                found.append(hwnd)
+            return True
+
+        win32gui.EnumWindows(collect, None)
+        return found
+
+    def is_window(self, hwnd):
+        return bool(win32gui.IsWindow(hwnd))
+
+    def get_window_pid(self, hwnd):
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def open_process(self, pid):
+        return win32api.OpenProcess(
+            PROCESS_QUERY_INFORMATION | PROCESS_VM_READ, False, pid
+        )
+
+    def close_handle(self, handle):
+        win32api.CloseHandle(handle)
+
+    def send_message(self, hwnd, msg, wparam, lparam):
+        if SEND_MESSAGE_TIMEOUT_MS is None:
+            return win32api.SendMessage(hwnd, msg, wparam, lparam)
+        result = ctypes.c_size_t()
+        if not _user32().SendMessageTimeoutW(
+            hwnd, msg, wparam, lparam, SMTO_ABORTIFHUNG, SEND_MESSAGE_TIMEOUT_MS,
+            ctypes.byref(result),
+        ):
+            raise TimeoutError("Winamp window %s did not answer message %#x" % (hwnd, msg))
+        # LRESULT is signed; Winamp answers -1 for "unavailable".
+        return ctypes.c_ssize_t(result.value).value
+
+    def get_window_text(self, hwnd):
+        return win32gui.GetWindowText(hwnd)
+
+    def get_module_path(self, process):
+        return win32process.GetModuleFileNameEx(process, 0)
+
+    def read_memory(self, process, address, view):
+        """Read ``len(view)`` bytes at ``address`` straight into ``view``.
+
+        pywin32's ReadProcessMemory returns a fresh bytes object per call, so
+        this goes through kernel32 directly to fill the caller's buffer.
+        """
+        size = len(view)
+        target = (ctypes.c_char * size).from_buffer(view)
+        read = ctypes.c_size_t()
+        if not _kernel32().ReadProcessMemory(
+            int(process), address, target, size, ctypes.byref(read)
+        ):
+            raise ctypes.WinError()
+        return read.value
+
+
+@functools.lru_cache(maxsize=None)
+def _kernel32():
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.ReadProcessMemory.argtypes = (
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        ctypes.c_void_p,
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_size_t),
+    )
+    kernel32.ReadProcessMemory.restype = ctypes.c_int
+    return kernel32
+
+
+@functools.lru_cache(maxsize=None)
+def _user32():
+    user32 = ctypes.WinDLL("user32", use_last_error=True)
+    user32.SendMessageTimeoutW.argtypes = (
+        ctypes.c_void_p,
+        ctypes.c_uint,
+        ctypes.c_size_t,
+        ctypes.c_ssize_t,
+        ctypes.c_uint,
+        ctypes.c_uint,
+        ctypes.POINTER(ctypes.c_size_t),
+    )
+    user32.SendMessageTimeoutW.restype = ctypes.c_ssize_t
+    return user32
+
+
+SIMULATED_HEAP_BASE = 0x02000000
+
+
+class SimulatedWinamp:
+    """One simulated Winamp instance: window, process memory and player state.
+
+    Playlist paths live in a page-granular fake address space, allocated
+    back to back like Winamp's own heap, so the bridge reads them through
+    the same pointer-and-memory path it uses against the real player.
+    """
+
+    def __init__(self, hwnd, pid, exe_path, tracks=0):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.exe_path = exe_path
+        self.status = 0           # IPC_ISPLAYING: 1 playing, 3 paused, 0 stopped
+        self.volume = 200         # 0-255
+        self.position = 0
+        self.elapsed_ms = 0       # position when playback last started/paused
+        self._resumed_at = None   # monotonic time playback (re)started
+        self.playlist = []        # [address, path] per entry
+        self.pages = {}           # page number -> bytearray(PAGE_SIZE)
+        self._heap = SIMULATED_HEAP_BASE
+        self._ansi_buffer = None
+        self._track_counter = 0
+        self.hung = False         # window stops answering messages
+        self.add_tracks(tracks)
+
+    # --- memory -----------------------------------------------------------
+
+    def write_memory(self, address, data):
+        offset = 0
+        while offset < len(data):
+            page, start = divmod(address + offset, PAGE_SIZE)
+            chunk = min(PAGE_SIZE - start, len(data) - offset)
+            buf = self.pages.setdefault(page, bytearray(PAGE_SIZE))
+            buf[start:start + chunk] = data[offset:offset + chunk]
+            offset += chunk
+
+    def read_memory(self, address, view):
+        # Like ReadProcessMemory, a read touching an unmapped page fails as a
+        # whole instead of returning a partial copy.
+        size = len(view)
+        offset = 0
+        while offset < size:
+            page, start = divmod(address + offset, PAGE_SIZE)
+            buf = self.pages.get(page)
+            if buf is None:
+                raise OSError("partial copy at 0x%x" % (address + offset))
+            chunk = min(PAGE_SIZE - start, size - offset)
+            view[offset:offset + chunk] = buf[start:start + chunk]
+            offset += chunk
+        return size
+
+    def allocate_string(self, text, wide=True):
+        data = text.encode("utf-16-le" if wide else "latin-1", "replace")
+        data += b"\x00\x00" if wide else b"\x00"
+        address = self._heap
+        self.write_memory(address, data)
+        self._heap += len(data) + (-len(data) % 8)
+        return address
+
+    # --- playlist ---------------------------------------------------------
+
+    def make_path(self):
+        self._track_counter += 1
+        number = self._track_counter
+        return "C:\\Music\\Artist %03d\\Album %02d\\%05d - Track %d.mp3" % (
+            number % 997, number % 13, number, number,
+        )
+
+    def add_tracks(self, count, index=None):
+        entries = [[self.allocate_string(path), path] for path in
+                   (self.make_path() for _ in range(count))]
+        if index is None:
+            self.playlist.extend(entries)
+        else:
+            self.playlist[index:index] = entries
+
+    def remove_track(self, index):
+        del self.playlist[index]
+        if self.position >= len(self.playlist):
+            self.position = max(0, len(self.playlist) - 1)
+
+    def move_track(self, source, target):
+        self.playlist.insert(target, self.playlist.pop(source))
+
+    def replace_track(self, index, path=None):
+        path = path or self.make_path()
+        self.playlist[index] = [self.allocate_string(path), path]
+
+    def track_length_ms(self):
+        if not self.playlist:
+            return -1
+        # Deterministic pseudo-random lengths between 2 and 6 minutes.
+        return 120_000 + (self.playlist[self.position][0] * 7919) % 240_000
+
+    def output_time_ms(self):
+        if self.status == 0:
+            return -1
+        elapsed = self.elapsed_ms
+        if self.status == 1 and self._resumed_at is not None:
+            elapsed += int((time.monotonic() - self._resumed_at) * 1000)
+        return min(elapsed, self.track_length_ms())
+
+    def _set_status(self, status):
+        if status == self.status:
+            return
+        if status == 0:
+            self.elapsed_ms = 0
+        else:
+            self.elapsed_ms = max(0, self.output_time_ms())
+        self._resumed_at = time.monotonic() if status == 1 else None
+        self.status = status
+
+    def _change_track(self, position):
+        self.position = position
+        self.elapsed_ms = 0
+        self._resumed_at = time.monotonic() if self.status == 1 else None
+
+    def window_text(self):
+        if not self.playlist:
+            return "Winamp"
+        path = self.playlist[self.position][1]
+        name = os.path.splitext(path.replace("\\", "/").rsplit("/", 1)[-1])[0]
+        return "%d. %s - Winamp" % (self.position + 1, name)
+
+    # --- messages ---------------------------------------------------------
+
+    def handle_message(self, msg, wparam, lparam):
+        if msg == WM_COMMAND:
+            self._handle_command(wparam)
+            return 0
+        if msg != WM_WA_IPC:
+            return 0
+
+        length = len(self.playlist)
+        if lparam == IPC_ISPLAYING:
+            return self.status
+        if lparam == IPC_GETOUTPUTTIME:
+            if wparam == 0:
+                return self.output_time_ms()
+            length = self.track_length_ms()
+            return length if wparam == 2 or length < 0 else length // 1000
+        if lparam == IPC_JUMPTOTIME:
+            if self.status == 0:
+                return -1
+            if wparam >= self.track_length_ms():
+                return 1
+            self.elapsed_ms = wparam
+            self._resumed_at = time.monotonic() if self.status == 1 else None
+            return 0
+        if lparam == IPC_SETVOLUME:
+            if wparam == -666:
+                return self.volume
+            self.volume = max(0, min(255, wparam))
+            return 0
+        if lparam == IPC_GETLISTLENGTH:
+            return length
+        if lparam == IPC_GETLISTPOS:
+            return self.position
+        if lparam == IPC_SETPLAYLISTPOS:
+            if 0 <= wparam < length:
+                self._change_track(wparam)
+            return 0
+        if lparam == IPC_GETPLAYLISTFILEW:
+            return self.playlist[wparam][0] if 0 <= wparam < length else 0
+        if lparam == IPC_GETPLAYLISTFILE:
+            if not 0 <= wparam < length:
+                return 0
+            # Winamp hands out ANSI names through one shared buffer.
+            if self._ansi_buffer is None:
+                self._ansi_buffer = self._heap
+                self._heap += 1024
+            data = self.playlist[wparam][1].encode("latin-1", "replace")[:1023] + b"\x00"
+            self.write_memory(self._ansi_buffer, data)
+            return self._ansi_buffer
+        return 0
+
+    def _handle_command(self, cmd_id):
+        length = len(self.playlist)
+        if cmd_id == WA_PLAY:
+            self._set_status(1)
+        elif cmd_id == WA_PAUSE:
+            self._set_status(3 if self.status == 1 else 1 if self.status == 3 else 0)
+        elif cmd_id == WA_STOP:
+            self._set_status(0)
+        elif cmd_id == WA_NEXT and length:
+            self._change_track((self.position + 1) % length)
+        elif cmd_id == WA_PREV and length:
+            self._change_track((self.position - 1) % length)
+
+
+class SimulatedBackend:
+    """In-process Winamp standing in for :class:`Win32Backend`.
+
+    Runs the bridge on hosts without Winamp or pywin32. ``start``/``stop``
+    model Winamp launching and exiting, ``latency`` adds a delay to every
+    backend call, ``script``/``advance`` replay playlist and player
+    mutations between polls, and ``calls`` / ``bytes_read`` count how the
+    backend was used. Several instances can run at once; setting an
+    instance's ``hung`` makes its window stop answering like a frozen
+    Winamp (messages time out after SEND_MESSAGE_TIMEOUT_MS, or block while
+    it is None).
+    """
+
+    def __init__(self, tracks=0, latency=0.0, exe_path=None):
+        self.default_tracks = tracks
+        self.latency = latency
+        self.exe_path = exe_path or os.path.join(os.sep, "Winamp", "winamp.exe")
+        self.instances = {}       # hwnd -> SimulatedWinamp
+        self.handles = {}         # process handle -> SimulatedWinamp
+        self.calls = {}
+        self.bytes_read = 0
+        self.steps = collections.deque()
+        self._next_id = 0x1000
+        self._lock = threading.Lock()   # instances may be polled concurrently
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _allocate(self):
+        with self._lock:
+            self._next_id += 4
+            return self._next_id
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.bytes_read = 0
+
+    # --- lifecycle / scripting ---------------------------------------------
+
+    def start(self, tracks=None, exe_path=None):
+        """Launch a new Winamp instance and return it."""
+        instance = SimulatedWinamp(
+            self._allocate(),
+            self._allocate(),
+            exe_path or self.exe_path,
+            self.default_tracks if tracks is None else tracks,
+        )
+        self.instances[instance.hwnd] = instance
+        return instance
+
+    def stop(self, instance=None):
+        """Close an instance (the first one by default); its handles go stale."""
+        if instance is None:
+            instance = next(iter(self.instances.values()), None)
+        if instance is not None:
+            self.instances.pop(instance.hwnd, None)
+
+    def script(self, steps):
+        """Queue mutations; each step is a callable taking a SimulatedWinamp."""
+        self.steps.extend(steps)
+
+    def advance(self, instance=None):
+        """Apply the next scripted step; return False when the script is done."""
+        if not self.steps:
+            return False
+        if instance is None:
+            instance = next(iter(self.instances.values()), None)
+        step = self.steps.popleft()
+        if instance is not None:
+            step(instance)
+        return True
+
+    # --- backend interface --------------------------------------------------
+
+    def find_window(self, class_name):
+        self._count("find_window")
+        return next(iter(self.instances), None)
+
+    def enum_windows(self, class_name):
+        self._count("enum_windows")
+        return list(self.instances)
+
+    def is_window(self, hwnd):
+        self._count("is_window")
+        return hwnd in self.instances
+
+    def get_window_pid(self, hwnd):
+        self._count("get_window_pid")
+        if hwnd not in self.instances:
+            raise OSError("invalid window handle")
+        return self.instances[hwnd].pid
+
+    def open_process(self, pid):
+        self._count("open_process")
+        for instance in self.instances.values():
+            if instance.pid == pid:
+                handle = self._allocate()
+                self.handles[handle] = instance
+                return handle
+        raise OSError("no such process")
+
+    def close_handle(self, handle):
+        self._count("close_handle")
+        self.handles.pop(handle, None)
+
+    def get_module_path(self, process):
+        self._count("get_module_path")
+        if process not in self.handles:
+            raise OSError("invalid process handle")
+        return self.handles[process].exe_path
+
+    def send_message(self, hwnd, msg, wparam, lparam):
+        self._count("send_message")
+        instance = self.instances.get(hwnd)
+        if instance is None:
+            return 0
+        if instance.hung:
+            self._wait_while_hung(instance)
+        return instance.handle_message(msg, wparam, lparam)
+
+    def _wait_while_hung(self, instance):
+        deadline = (
+            None if SEND_MESSAGE_TIMEOUT_MS is None
+            else time.monotonic() + SEND_MESSAGE_TIMEOUT_MS / 1000.0
+        )
+        while instance.hung:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError("Winamp window %s did not answer" % instance.hwnd)
+            time.sleep(0.01)
+
+    def get_window_text(self, hwnd):
+        self._count("get_window_text")
+        instance = self.instances.get(hwnd)
+        return instance.window_text() if instance else ""
+
+    def read_memory(self, process, address, view):
+        self._count("read_memory")
+        instance = self.handles.get(process)
+        if instance is None or instance.hwnd not in self.instances:
+            raise OSError("invalid process handle")
+        count = instance.read_memory(address, view)
+        with self._lock:
+            self.bytes_read += count
+        return count
+
+
+class WinampHandleManager:
+    """Long-lived cache of the Winamp window, PID, process handle and exe dir.
+
+    Every lookup first checks the cached window cheaply (``IsWindow`` plus a
+    PID comparison, so a recycled handle is caught too) and only runs
+    ``FindWindow`` and reopens the process after Winamp restarted. The
+    process handle and executable directory are fetched lazily on first use.
+    With ``window`` the manager follows that one window (see ``attach``)
+    instead of the first window of ``class_name``.
+    """
+
+    def __init__(self, backend=None, class_name=WINAMP_CLASS, window=None):
+        self._backend = backend
+        self.class_name = class_name
+        self.window = window
+        self._lock = threading.RLock()
+        self._hwnd = None
+        self._pid = None
+        self._process = None
+        self._exe_dir = None
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def hwnd(self):
+        """Return the Winamp window handle or None when Winamp is not running."""
+        with self._lock:
+            if self._hwnd is not None and self._is_current():
+                return self._hwnd
+            self._rebuild()
+            return self._hwnd
+
+    def pid(self):
+        with self._lock:
+            return self._pid if self.hwnd() else None
+
+    def process(self, hwnd=None):
+        """Return an open handle to the Winamp process, opening it on first use.
+
+        When ``hwnd`` is given the handle is only returned if it belongs to
+        that window.
+        """
+        with self._lock:
+            current = self.hwnd()
+            if not current or (hwnd is not None and hwnd != current):
+                return None
+            if self._process is None:
+                try:
+                    self._process = self.backend.open_process(self._pid)
+                except Exception:
+                    logging.debug("Unable to open Winamp process", exc_info=True)
+                    return None
+            return self._process
+
+    def exe_dir(self):
+        """Return the directory holding winamp.exe, or None if unknown."""
+        with self._lock:
+            if self._exe_dir is None:
+                process = self.process()
+                if process is None:
+                    return None
+                try:
+                    exe_path = self.backend.get_module_path(process)
+                except Exception:
+                    logging.debug("Unable to resolve Winamp executable path", exc_info=True)
+                    return None
+                self._exe_dir = os.path.dirname(exe_path)
+            return self._exe_dir
+
+    def invalidate(self):
+        """Forget everything; the next lookup searches for Winamp again."""
+        with self._lock:
+            self._release()
+
+    def attach(self, window):
+        """Follow ``window`` from now on (a restarted Winamp's new window)."""
+        with self._lock:
+            self._release()
+            self.window = window
+
+    def _is_current(self):
+        try:
+            return (
+                self.backend.is_window(self._hwnd)
+                and self.backend.get_window_pid(self._hwnd) == self._pid
+            )
+        except Exception:
+            return False
+
+    def _rebuild(self):
+        self._release()
+        if self.window is not None:
+            hwnd = self.window if self.backend.is_window(self.window) else None
+        else:
+            hwnd = self.backend.find_window(self.class_name)
+        if not hwnd:
+            return
+        try:
+            self._pid = self.backend.get_window_pid(hwnd)
+        except Exception:
+            logging.debug("Unable to resolve Winamp process id", exc_info=True)
+            return
+        self._hwnd = hwnd
+
+    def _release(self):
+        if self._process is not None:
+            try:
+                self.backend.close_handle(self._process)
+            except Exception:
+                logging.debug("Failed to close Winamp process handle", exc_info=True)
+        self._hwnd = None
+        self._pid = None
+        self._process = None
+        self._exe_dir = None
+
+
+_backend = None
+
+
+def send_message(hwnd, msg, wparam, lparam):
+    calls, failures = metrics.message(msg, lparam)
+    calls.inc()
+    try:
+        return get_backend().send_message(hwnd, msg, wparam, lparam)
+    except Exception:
+        failures.inc()
+        raise
 
 
-def send_winamp_command(cmd_id):
-    hwnd = find_winamp_hwnd()
+def get_backend():
+    """Return the active backend, defaulting to pywin32."""
+    global _backend
+    if _backend is None:
+        _backend = Win32Backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the backend (e.g. for a SimulatedBackend) and drop cached handles."""
+    global _backend
+    _backend = backend
+    handles.invalidate()
+
+
+handles = WinampHandleManager()
+
+# ---------------------------------------------------------------------------
+
+
+def find_winamp_hwnd(manager=None):
+    """Find Winamp main window handle (of ``manager``'s instance if given)."""
+    return (manager or handles).hwnd()
+
+
+def send_winamp_command(cmd_id, manager=None):
+    hwnd = find_winamp_hwnd(manager)
     if not hwnd:
         logging.warning("Winamp window not found for command %s", cmd_id)
         return False
-    win32api.SendMessage(hwnd, WM_COMMAND, cmd_id, 0)
+    send_message(hwnd, WM_COMMAND, cmd_id, 0)
     return True
 
 
-def set_volume_percent(percent):
-    hwnd = find_winamp_hwnd()
+def set_volume_percent(percent, manager=None):
+    hwnd = find_winamp_hwnd(manager)
     if not hwnd:
         logging.warning("Winamp window not found for volume set")
         return False
 
     percent = max(0, min(100, int(percent)))
     vol_0_255 = int(percent * 255 / 100)
-    win32api.SendMessage(hwnd, WM_WA_IPC, vol_0_255, IPC_SETVOLUME)
+    send_message(hwnd, WM_WA_IPC, vol_0_255, IPC_SETVOLUME)
     return True
 
 
 def get_volume_percent(hwnd):
     """Return volume 0–100 or None."""
-    res = win32api.SendMessage(hwnd, WM_WA_IPC, -666, IPC_SETVOLUME)
+    res = send_message(hwnd, WM_WA_IPC, -666, IPC_SETVOLUME)
     if res < 0:
         return None
     return int(res * 100 / 255)
@@ -101,7 +1114,7 @@ def get_playback_status(hwnd):
     """
     Return 'playing', 'paused', 'idle' based on IPC_ISPLAYING.
     """
-    res = win32api.SendMessage(hwnd, WM_WA_IPC, 0, IPC_ISPLAYING)
+    res = send_message(hwnd, WM_WA_IPC, 0, IPC_ISPLAYING)
     if res == 1:
         return "playing"
     elif res == 3:
@@ -115,7 +1128,7 @@ def get_title_from_window(hwnd):
     Grab Winamp window title and strip trailing ' - Winamp'.
     Typically looks like: '01. Artist - Track - Winamp'. :contentReference[oaicite:5]{index=5}
     """
-    raw = win32gui.GetWindowText(hwnd)
+    raw = get_backend().get_window_text(hwnd)
     if raw.lower().endswith(" - winamp"):
         raw = raw[:-len(" - Winamp")]
     return raw
@@ -123,247 +1136,2087 @@ def get_title_from_window(hwnd):
 
 def get_playlist_position(hwnd):
     """Return the current playlist index or None if unavailable."""
-    res = win32api.SendMessage(hwnd, WM_WA_IPC, 0, IPC_GETLISTPOS)
+    res = send_message(hwnd, WM_WA_IPC, 0, IPC_GETLISTPOS)
     if res < 0:
         return None
     return int(res)
 
 
+def get_elapsed_seconds(hwnd):
+    """Return the playback position in seconds or None when stopped."""
+    res = send_message(hwnd, WM_WA_IPC, 0, IPC_GETOUTPUTTIME)
+    if res < 0:
+        return None
+    return res / 1000.0
+
+
+def get_track_duration(hwnd):
+    """Return the current track length in seconds or None if unknown."""
+    res = send_message(hwnd, WM_WA_IPC, 2, IPC_GETOUTPUTTIME)
+    if res > 0:
+        return res / 1000.0
+    # Winamp before 5.x only reports whole seconds.
+    res = send_message(hwnd, WM_WA_IPC, 1, IPC_GETOUTPUTTIME)
+    if res > 0:
+        return float(res)
+    return None
+
+
+def seek_to_seconds(hwnd, seconds):
+    """Jump to ``seconds`` into the current track."""
+    res = send_message(hwnd, WM_WA_IPC, max(0, int(seconds * 1000)), IPC_JUMPTOTIME)
+    return res == 0
+
+
 def set_playlist_position(hwnd, position):
     """Jump to a playlist index and start playback."""
     if position is None or position < 0:
         return False
-    win32api.SendMessage(hwnd, WM_WA_IPC, int(position), IPC_SETPLAYLISTPOS)
-    send_winamp_command(WA_PLAY)
+    send_message(hwnd, WM_WA_IPC, int(position), IPC_SETPLAYLISTPOS)
+    send_message(hwnd, WM_COMMAND, WA_PLAY, 0)
     return True
 
 
-def _read_process_string(process, address, wide=False, max_bytes=4096):
-    """Read a NUL-terminated string from another process' memory."""
+def _find_terminator(buf, wide, start, end, origin):
+    """Find the string terminator in ``buf[start:end]``.
 
-    if not address:
-        return None
+    Wide strings end on a NUL code unit, so a double NUL only counts when it
+    sits on a code-unit boundary relative to the string start ``origin``.
+    """
+    if not wide:
+        return buf.find(b"\x00", start, end)
 
-    buf = b""
-    # Read in chunks until we hit the terminator or the limit
-    while len(buf) < max_bytes:
+    idx = buf.find(b"\x00\x00", start, end)
+    while idx != -1 and (idx - origin) % 2:
+        idx = buf.find(b"\x00\x00", idx + 1, end)
+    return idx
+
+
+def _decode_process_string(view, wide):
+    if wide:
         try:
-            chunk = win32process.ReadProcessMemory(
-                process, address + len(buf), 512
-            )
+            return str(view[:len(view) // 2 * 2], "utf-16-le")
+        except UnicodeDecodeError:
+            logging.debug("Failed to decode wide playlist string", exc_info=True)
+            return None
+    return str(view, "utf-8", "replace")
+
+
+class RemoteStringReader:
+    """Read NUL-terminated strings out of another process' memory.
+
+    Reads land in one preallocated buffer and stop at page boundaries, so a
+    short string usually costs a single read and a read never straddles
+    into an unmapped page (which would fail the whole ``ReadProcessMemory``
+    call). Only the bytes of each new read are searched for the terminator.
+    Not thread-safe: use one reader per thread (see ``_string_reader``).
+    """
+
+    def __init__(self, backend=None, max_bytes=4096, page_size=PAGE_SIZE, first_read=512):
+        self._backend = backend
+        self.max_bytes = max_bytes
+        self.page_size = page_size
+        self.first_read = first_read
+        self._buffer = bytearray(max_bytes)
+        self._view = memoryview(self._buffer)
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _read_chunk(self, process, address, offset, limit=None):
+        """Read from ``address`` up to the next page boundary into the buffer."""
+        size = min(self.page_size - address % self.page_size, self.max_bytes - offset)
+        if limit is not None:
+            size = min(size, limit)
+        try:
+            count = self.backend.read_memory(process, address, self._view[offset:offset + size])
+        except Exception:
+            metrics.memory_read_failed()
+            raise
+        metrics.memory_read(count)
+        return count
+
+    def read(self, process, address, wide=False):
+        """Return the string at ``address`` or None if it cannot be read."""
+        if not address:
+            return None
+        # Most paths end within the first read; finish those here and leave
+        # the loop in _read_from to the long ones.
+        try:
+            count = self._read_chunk(process, address, 0, self.first_read)
         except Exception:
             logging.debug("ReadProcessMemory failed at 0x%x", address, exc_info=True)
             return None
+        idx = _find_terminator(self._buffer, wide, 0, count, 0) if count else 0
+        if idx != -1:
+            return _decode_process_string(self._view[:idx], wide)
+        return self._read_from(process, address, wide, count)
+
+    def _read_from(self, process, address, wide, filled):
+        """Finish reading a string whose first ``filled`` bytes are buffered.
+
+        The buffered bytes are known not to hold the terminator.
+        """
+        # A wide terminator may straddle two reads.
+        search_from = filled & ~1 if wide else filled
+        length = None
+        while filled < self.max_bytes:
+            try:
+                count = self._read_chunk(process, address + filled, filled)
+            except Exception:
+                logging.debug("ReadProcessMemory failed at 0x%x", address, exc_info=True)
+                return None
+            if not count:
+                break
+
+            end = filled + count
+            idx = _find_terminator(self._buffer, wide, search_from, end, 0)
+            if idx != -1:
+                length = idx
+                break
+            filled = end
+            search_from = end & ~1 if wide else end
+
+        if length is None:
+            length = filled
+        return _decode_process_string(self._view[:length], wide)
+
+    def read_many(self, process, addresses, wide=False):
+        """Read several strings, sharing page reads between nearby addresses.
+
+        Returns a list lined up with ``addresses`` (None for unreadable ones).
+        Winamp tends to allocate playlist strings next to each other, so one
+        page-sized read usually covers several entries.
+        """
+        results = [None] * len(addresses)
+        window_start = window_end = 0
+        for address, index in sorted(
+            (address, index) for index, address in enumerate(addresses) if address
+        ):
+            if not window_start <= address < window_end:
+                try:
+                    count = self._read_chunk(process, address, 0)
+                except Exception:
+                    count = 0
+                window_start, window_end = address, address + (count or 0)
+
+            if not window_start <= address < window_end:
+                results[index] = self.read(process, address, wide)
+                window_start = window_end = 0
+                continue
+
+            offset = address - window_start
+            idx = _find_terminator(
+                self._buffer, wide, offset, window_end - window_start, offset
+            )
+            if idx != -1:
+                results[index] = _decode_process_string(self._view[offset:idx], wide)
+                continue
 
-        if not chunk:
-            break
+            # The string runs past the window: move what we have to the front
+            # of the buffer and keep reading from there.
+            tail = window_end - address
+            if offset:
+                self._buffer[:tail] = self._view[offset:offset + tail].tobytes()
+            results[index] = self._read_from(process, address, wide, tail)
+            window_start = window_end = 0
 
-        buf += chunk
+        return results
 
-        terminator = b"\x00\x00" if wide else b"\x00"
-        idx = buf.find(terminator)
-        if idx != -1:
-            buf = buf[:idx]
-            break
 
-        if len(buf) >= max_bytes:
-            break
+_reader_local = threading.local()
 
-    if wide:
-        terminator = len(buf) // 2 * 2
-        buf = buf[:terminator]
-        try:
-            return buf.decode("utf-16-le")
-        except UnicodeDecodeError:
-            logging.debug("Failed to decode wide playlist string", exc_info=True)
-            return None
 
-    try:
-        return buf.decode("utf-8", errors="replace")
-    except UnicodeDecodeError:
-        return None
+def _string_reader():
+    """Return this thread's RemoteStringReader."""
+    reader = getattr(_reader_local, "reader", None)
+    if reader is None:
+        reader = _reader_local.reader = RemoteStringReader()
+    return reader
+
+
+def _read_process_string(process, address, wide=False):
+    """Read a NUL-terminated string from another process' memory."""
+    return _string_reader().read(process, address, wide)
 
 
-def read_playlist_from_ipc(hwnd, expected_length=None):
-    """Fetch playlist entries directly from Winamp memory via IPC messages."""
+def _read_playlist_entry(hwnd, process, index, ptr=None):
+    """Return ``(pointer, entry)`` for one playlist index.
+
+    The pointer is the wide-string address Winamp hands out for the entry; it
+    is cheap to fetch (no memory read) and is what the playlist cache uses to
+    spot entries that moved or changed. Pass it in when it is already known.
+    """
+    if ptr is None:
+        ptr = send_message(hwnd, WM_WA_IPC, index, IPC_GETPLAYLISTFILEW)
+    entry = _read_process_string(process, ptr, wide=True)
+    if not entry:
+        ansi_ptr = send_message(hwnd, WM_WA_IPC, index, IPC_GETPLAYLISTFILE)
+        entry = _read_process_string(process, ansi_ptr)
+    return ptr, entry or None
+
+
+def _read_playlist_entries(hwnd, process, first_index, pointers):
+    """Read consecutive playlist entries given their wide-string pointers.
+
+    The wide strings are read as one batch; entries that fail fall back to the
+    per-entry path (which also tries the ANSI string).
+    """
+    entries = _string_reader().read_many(process, pointers, wide=True)
+    for offset, entry in enumerate(entries):
+        if not entry:
+            _, entries[offset] = _read_playlist_entry(
+                hwnd, process, first_index + offset, pointers[offset]
+            )
+    return entries
+
+
+def _contiguous_runs(indices):
+    """Yield ``(first, last)`` for each run of consecutive sorted indices."""
+    first = last = None
+    for index in indices:
+        if last is not None and index == last + 1:
+            last = index
+            continue
+        if first is not None:
+            yield first, last
+        first = last = index
+    if first is not None:
+        yield first, last
+
+
+def playlist_limit():
+    """Return how many playlist entries to read, or None for all of them."""
+    return None if PLAYLIST_MODE == "paged" else MAX_PLAYLIST_ITEMS
+
+
+class PlaylistCache:
+    """Cached copy of the Winamp playlist read over IPC.
+
+    Reading every entry costs two ``SendMessage`` calls and a
+    ``ReadProcessMemory`` round trip, so the bridge keeps the last result and
+    checks a cheap fingerprint on each poll instead: the list length, the
+    first, last and current entries (pointer and string) and the pointers of
+    a rotating window of entries, so every entry gets probed eventually
+    without reading its string. When the
+    fingerprint holds the cached list is reused as-is, when the list only grew
+    just the appended tail is read, and otherwise entry pointers are compared
+    so only entries Winamp has not seen before are read again.
+    """
+
+    def __init__(self, samples=PLAYLIST_FINGERPRINT_SAMPLES):
+        self.samples = max(1, int(samples))
+        self.reset()
+
+    def reset(self):
+        self.hwnd = None
+        self.entries = []     # decoded entry per index (None when unreadable)
+        self.pointers = []    # wide-string pointer per index
+        self.items = []       # published list (readable entries only)
+        self.position = None
+        self.version = 0
+        self.restored = False
+        self._probe_offset = 0
+
+    def restore(self, hwnd, entries, pointers):
+        """Seed the cache from a warm-start snapshot of the same Winamp process.
+
+        The next sync checks the fingerprint as usual. If it does not hold,
+        the seeded entries are dropped instead of being matched by pointer,
+        since they were not read in this run.
+        """
+        self.reset()
+        self.hwnd = hwnd
+        self.entries = entries
+        self.pointers = pointers
+        self.restored = True
+        self._publish_entries()
+
+    def sync(self, hwnd, process, length, position=None):
+        """Bring the cache up to date and return the playlist items.
+
+        The returned list is replaced, never mutated, when the playlist
+        changes, so callers can compare it by identity.
+        """
+        limit = playlist_limit()
+        length = max(0, int(length) if limit is None else min(int(length), limit))
+
+        if hwnd != self.hwnd:
+            self.reset()
+            self.hwnd = hwnd
+
+        if self.entries and self._fingerprint_matches(hwnd, process, length, position):
+            if length > len(self.entries):
+                self._read_tail(hwnd, process, length)
+        else:
+            if self.restored:
+                self.entries = []
+                self.pointers = []
+            self._resync(hwnd, process, length)
+
+        self.restored = False
+        self.position = position
+        return self.items
+
+    def _anchor_indices(self, count, position):
+        indices = {0, count - 1}
+        if position is not None and 0 <= position < count:
+            indices.add(position)
+        return sorted(indices)
+
+    def _window_indices(self, count):
+        window = min(self.samples, count)
+        start = self._probe_offset % count
+        self._probe_offset = start + window
+        return [(start + step) % count for step in range(window)]
+
+    def _fingerprint_matches(self, hwnd, process, length, position):
+        cached = len(self.entries)
+        if length < cached:
+            return False
+
+        for index in self._anchor_indices(cached, position):
+            ptr, entry = _read_playlist_entry(hwnd, process, index)
+            if ptr != self.pointers[index] or entry != self.entries[index]:
+                return False
+
+        # Edits and moves give entries new pointers, so the rotating window
+        # only compares pointers and never reads Winamp's memory.
+        for index in self._window_indices(cached):
+            if send_message(hwnd, WM_WA_IPC, index, IPC_GETPLAYLISTFILEW) != self.pointers[index]:
+                return False
+        return True
+
+    def _read_tail(self, hwnd, process, length):
+        pointers = [
+            send_message(hwnd, WM_WA_IPC, index, IPC_GETPLAYLISTFILEW)
+            for index in range(len(self.entries), length)
+        ]
+        self.entries.extend(
+            _read_playlist_entries(hwnd, process, len(self.entries), pointers)
+        )
+        self.pointers.extend(pointers)
+        self._publish_entries()
+
+    def _resync(self, hwnd, process, length):
+        pointers = [
+            send_message(hwnd, WM_WA_IPC, index, IPC_GETPLAYLISTFILEW)
+            for index in range(length)
+        ]
+
+        # Pointers only identify entries when Winamp hands out one per entry;
+        # if they repeat (shared buffer) every entry has to be read again.
+        known = {}
+        live = [ptr for ptr in self.pointers if ptr]
+        if len(live) == len(set(live)):
+            known = {
+                ptr: entry
+                for ptr, entry in zip(self.pointers, self.entries)
+                if ptr and entry
+            }
+
+        entries = [known.get(ptr) if ptr else None for ptr in pointers]
+        missing = [index for index, entry in enumerate(entries) if entry is None]
+        if missing:
+            # Batch-read the unknown entries; _read_playlist_entries only works
+            # on a contiguous range, so read them one run at a time.
+            for first, last in _contiguous_runs(missing):
+                entries[first:last + 1] = _read_playlist_entries(
+                    hwnd, process, first, pointers[first:last + 1]
+                )
+
+        self.pointers = pointers
+        if entries != self.entries:
+            self.entries = entries
+            self._publish_entries()
+
+    def _publish_entries(self):
+        self.items = [entry for entry in self.entries if entry]
+        self.version += 1
+
+
+def read_playlist_from_ipc(hwnd, expected_length=None, cache=None, position=None, manager=None):
+    """Fetch playlist entries directly from Winamp memory via IPC messages.
+
+    When a :class:`PlaylistCache` is supplied only the entries that changed
+    since the previous call are read from Winamp's memory.
+    """
 
     if expected_length is None:
-        expected_length = win32api.SendMessage(hwnd, WM_WA_IPC, 0, IPC_GETLISTLENGTH)
+        expected_length = send_message(hwnd, WM_WA_IPC, 0, IPC_GETLISTLENGTH)
     if expected_length is None or expected_length < 0:
         return []
 
-    try:
-        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        process = win32api.OpenProcess(
-            win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
-            False,
-            pid,
-        )
-    except Exception:
-        logging.debug("Unable to open Winamp process for playlist read", exc_info=True)
+    process = (manager or handles).process(hwnd)
+    if process is None:
+        logging.debug("Unable to open Winamp process for playlist read")
         return []
 
-    try:
-        items = []
-        for index in range(min(expected_length, MAX_PLAYLIST_ITEMS)):
-            ptr = win32api.SendMessage(hwnd, WM_WA_IPC, index, IPC_GETPLAYLISTFILEW)
-            entry = _read_process_string(process, ptr, wide=True)
-            if not entry:
-                ptr = win32api.SendMessage(hwnd, WM_WA_IPC, index, IPC_GETPLAYLISTFILE)
-                entry = _read_process_string(process, ptr)
+    if cache is not None:
+        return cache.sync(hwnd, process, expected_length, position)
 
-            if entry:
-                items.append(entry)
+    items = []
+    limit = playlist_limit()
+    for index in range(expected_length if limit is None else min(expected_length, limit)):
+        _, entry = _read_playlist_entry(hwnd, process, index)
+        if entry:
+            items.append(entry)
 
-        return items
-    finally:
-        win32api.CloseHandle(process)
+    return items
 
 
-def read_playlist_from_disk(expected_length=None):
-    """Return playlist entries from the best matching playlist file.
+class PlaylistFile:
+    """One parsed playlist file.
 
-    Winamp generally writes the active playlist to Winamp.m3u8, but some
-    installs still update Winamp.m3u or keep the file alongside the portable
-    executable. We sort the discovered paths by mtime (newest first) and, when
-    the bridge knows the current playlist length from Winamp IPC, prefer files
-    whose entry count matches that length. This avoids picking unrelated
-    playlists that happen to be newer than the active one.
+    ``items`` holds at most playlist_limit() entries while ``total``
+    counts all of them, so a long file can still be matched against the
+    playlist length Winamp reports. The ``#EXTINF`` lines are only needed
+    when a track's own tags cannot be read, so ``extinf()`` reads them from
+    the file on first use instead of every parse collecting them.
     """
 
-    def candidate_paths_with_mtime():
-        seen = set()
+    __slots__ = ("path", "size", "mtime_ns", "items", "total", "_extinf")
 
-        def _yield(path):
-            if not path or path in seen:
-                return
-            seen.add(path)
+    def __init__(self, path, size, mtime_ns, items, total):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.items = items
+        self.total = total
+        self._extinf = None
+
+    def extinf(self):
+        """Return a map from entries to the text of their ``#EXTINF`` line.
+
+        Empty when the file changed since it was parsed; the reader parses
+        it again on the next poll anyway.
+        """
+        if self._extinf is None:
+            extinf = {}
             try:
-                yield path, os.path.getmtime(path)
-            except FileNotFoundError:
-                return
+                with open(self.path, "rb") as fh:
+                    st = os.fstat(fh.fileno())
+                    if (st.st_size, st.st_mtime_ns) == (self.size, self.mtime_ns):
+                        extinf = _parse_extinf_lines(_read_playlist_text(fh, self.path))
+            except OSError:
+                logging.debug("Could not read #EXTINF lines from %s", self.path, exc_info=True)
+            self._extinf = extinf
+        return self._extinf
+
+
+def _read_playlist_text(fh, path):
+    """Read and decode a whole playlist file with one codec.
+
+    Winamp.m3u8 is UTF-8. Winamp.m3u is written in the ANSI code page; it
+    is still read as UTF-8 when the whole file is valid UTF-8, and as cp1252
+    otherwise, so one file is never decoded with two codecs.
+    """
+    data = fh.read()
+    if data[:3] == b"\xef\xbb\xbf":
+        data = data[3:]
+    if path.lower().endswith(".m3u"):
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            return data.decode("cp1252", errors="replace")
+    return data.decode("utf-8", errors="ignore")
 
+
+def _parse_extinf_lines(text):
+    extinf = {}
+    pending = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] == "#":
+            if line.startswith("#EXTINF:"):
+                pending = line
+            continue
+        if pending is not None:
+            extinf[line] = pending
+            pending = None
+    return extinf
+
+
+def _parse_extinf(text):
+    seconds, _, title = text.partition(",")
+    try:
+        duration = float(seconds)
+    except ValueError:
+        duration = None
+    return (duration if duration and duration > 0 else None, title.strip() or None)
+
+
+def parse_playlist_file(path, limit=None):
+    """Parse an M3U/M3U8 file into a PlaylistFile.
+
+    Blank and comment lines are skipped; ``#EXTINF`` lines are read later,
+    see PlaylistFile.extinf.
+    """
+    if limit is None:
+        limit = playlist_limit()
+    with open(path, "rb") as fh:
+        st = os.fstat(fh.fileno())
+        text = _read_playlist_text(fh, path)
+
+    # One comprehension instead of a loop body per line: this is most of
+    # the parse on a long playlist.
+    items = [line for line in map(str.strip, text.splitlines()) if line and line[0] != "#"]
+    total = len(items)
+    if limit is not None and total > limit:
+        del items[limit:]
+    return PlaylistFile(path, st.st_size, st.st_mtime_ns, items, total)
+
+
+class PlaylistFileReader:
+    """Find and parse Winamp's playlist files, re-parsing only changed ones.
+
+    Winamp generally writes the active playlist to Winamp.m3u8, but some
+    installs still update Winamp.m3u or keep the file alongside the portable
+    executable. Candidates are sorted by mtime (newest first), after the
+    file picked last time (``resolved``), and, when the bridge knows the
+    current playlist length from Winamp IPC, files whose entry count matches
+    that length are preferred. This avoids picking unrelated playlists that
+    happen to be newer than the active one, and parsing them to find out.
+    """
+
+    def __init__(self, clock=time.monotonic, rescan_interval=PLAYLIST_CANDIDATE_RESCAN_SEC,
+                 manager=None, shared_locations=True):
+        self.clock = clock
+        self.rescan_interval = rescan_interval
+        # With several Winamp instances the AppData playlist (and the
+        # override) could belong to any of them; only the one next to the
+        # instance's own winamp.exe is used then.
+        self.manager = manager
+        self.shared_locations = shared_locations
+        self.files = {}            # path -> PlaylistFile
+        self.missing = {}          # path -> time to look for it again
+        self._candidates_key = None
+        self._candidates = []
+        self.parsed = 0
+        self.resolved = None       # path the last read returned entries from
+        self.known_exe_dir = None  # used while the manager cannot tell
+
+    def restore(self, resolved, exe_dir):
+        """Take the picked file and exe directory over from a warm-start snapshot."""
+        self.resolved = resolved
+        self.known_exe_dir = exe_dir
+
+    def candidates(self):
+        """Return the candidate paths; rebuilt only when their inputs change."""
         # Caller may override via env var (useful for debugging/testing)
-        override = os.environ.get("WINAMP_PLAYLIST_PATH")
-        if override:
-            yield from _yield(override)
-
-        # Default AppData location (UTF-8)
-        if PLAYLIST_PATH:
-            yield from _yield(PLAYLIST_PATH)
-            yield from _yield(os.path.splitext(PLAYLIST_PATH)[0] + ".m3u")
-
-        # Portable installs often keep the playlist next to winamp.exe
-        hwnd = find_winamp_hwnd()
-        if hwnd:
-            process = None
+        exe_dir = (self.manager or handles).exe_dir() or self.known_exe_dir
+        if self.shared_locations:
+            key = (os.environ.get("WINAMP_PLAYLIST_PATH"), PLAYLIST_PATH, exe_dir)
+        else:
+            key = (None, None, exe_dir)
+        if key != self._candidates_key:
+            override, default, winamp_dir = key
+            paths = []
+            if override:
+                paths.append(override)
+            # Default AppData location (UTF-8)
+            if default:
+                paths += [default, os.path.splitext(default)[0] + ".m3u"]
+            # Portable installs often keep the playlist next to winamp.exe
+            if winamp_dir:
+                paths += [os.path.join(winamp_dir, "Winamp.m3u8"),
+                          os.path.join(winamp_dir, "Winamp.m3u")]
+            self._candidates = list(dict.fromkeys(paths))
+            self._candidates_key = key
+            self.missing.clear()
+        return self._candidates
+
+    def _stat_candidates(self):
+        now = self.clock()
+        found = []
+        for path in self.candidates():
+            if self.missing.get(path, 0) > now:
+                continue
             try:
-                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                process = win32api.OpenProcess(
-                    win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ,
-                    False,
-                    pid,
-                )
-                exe_path = win32process.GetModuleFileNameEx(process, 0)
-                winamp_dir = os.path.dirname(exe_path)
-                yield from _yield(os.path.join(winamp_dir, "Winamp.m3u8"))
-                yield from _yield(os.path.join(winamp_dir, "Winamp.m3u"))
-            except Exception:
-                logging.debug("Unable to resolve Winamp executable path", exc_info=True)
-            finally:
-                if process:
-                    win32api.CloseHandle(process)
-
-    def read_playlist(path):
+                st = os.stat(path)
+            except OSError:
+                self.missing[path] = now + self.rescan_interval
+                self.files.pop(path, None)
+                continue
+            self.missing.pop(path, None)
+            found.append((path, st))
+        return found
+
+    def load(self, path, st):
+        """Return the parsed file, parsing it only if it changed."""
+        cached = self.files.get(path)
+        if cached is not None and (cached.size, cached.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            return cached
         try:
-            with open(path, "r", encoding="utf-8", errors="ignore") as fh:
-                items = []
-                for line in fh:
-                    line = line.strip()
-                    if not line or line.startswith("#"):
-                        continue
-                    items.append(line)
-                    if len(items) >= MAX_PLAYLIST_ITEMS:
-                        break
-                return items
+            parsed = parse_playlist_file(path)
         except Exception:
             logging.exception("Could not read playlist from %s", path)
+            self.files.pop(path, None)
             return None
+        self.parsed += 1
+        self.files[path] = parsed
+        return parsed
+
+    def read(self, expected_length=None):
+        candidates = sorted(
+            self._stat_candidates(), key=lambda x: (x[0] != self.resolved, -x[1].st_mtime)
+        )
+        if not candidates:
+            logging.debug("No playlist file found in expected locations")
+            return []
+
+        fallback = None
+        for path, st in candidates:
+            parsed = self.load(path, st)
+            if parsed is None:
+                continue
+            if fallback is None:
+                fallback = path, parsed.items
+
+            if expected_length is None or parsed.total == expected_length:
+                self.resolved = path
+                return parsed.items
+
+        if fallback is None:
+            return []
+        self.resolved = fallback[0]
+        return fallback[1]
+
+    def extinf(self, entry):
+        """Return ``(duration, title)`` for ``entry`` from any cached file."""
+        for parsed in self.files.values():
+            info = parsed.extinf().get(entry)
+            if info is not None:
+                return _parse_extinf(info[8:])
+        return None
+
+
+playlist_files = PlaylistFileReader()
+
+
+def read_playlist_from_disk(expected_length=None):
+    """Return playlist entries from the best matching playlist file."""
+    return playlist_files.read(expected_length)
+
 
-    candidates = sorted(candidate_paths_with_mtime(), key=lambda x: x[1], reverse=True)
-    if not candidates:
-        logging.debug("No playlist file found in expected locations")
+def diff_playlist(old, new):
+    """Return the operations that turn playlist ``old`` into ``new``.
+
+    The common prefix and suffix are trimmed and the remaining span becomes a
+    single insert, remove, move (one entry dragged to another slot) or
+    replace operation, which covers the edits Winamp's playlist editor makes
+    between two polls.
+    """
+    if old is new:
         return []
 
-    fallback = None
-    for path, _ in candidates:
-        items = read_playlist(path)
-        if items is None:
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    if start == len(old) == len(new):
+        return []
+
+    end = 0
+    while end < limit - start and old[-1 - end] == new[-1 - end]:
+        end += 1
+
+    old_mid = old[start:len(old) - end]
+    new_mid = new[start:len(new) - end]
+
+    if not old_mid:
+        return [{"op": "insert", "index": start, "items": new_mid}]
+    if not new_mid:
+        return [{"op": "remove", "index": start, "count": len(old_mid)}]
+    if len(old_mid) == len(new_mid) > 1:
+        last = start + len(old_mid) - 1
+        if old_mid[0] == new_mid[-1] and old_mid[1:] == new_mid[:-1]:
+            return [{"op": "move", "from": start, "to": last}]
+        if old_mid[-1] == new_mid[0] and old_mid[:-1] == new_mid[1:]:
+            return [{"op": "move", "from": last, "to": start}]
+
+    return [{"op": "replace", "index": start, "count": len(old_mid), "items": new_mid}]
+
+
+# --- PAYLOAD ENCODING -------------------------------------------------------
+
+# Encoded payloads are b"\0" + a format byte + the body. A JSON text never
+# starts with a NUL byte, so plain JSON stays readable by every subscriber.
+PAYLOAD_MARKER = b"\0"
+PAYLOAD_FORMATS = {"zlib": b"Z", "prefix": b"P"}
+PAYLOAD_ENCODINGS = ("json",) + tuple(PAYLOAD_FORMATS)
+# Key of the object that replaces a prefix-encoded list of paths.
+PREFIX_KEY = "$paths"
+# Shorter lists are left alone; the table would not pay for itself.
+PREFIX_MIN_ITEMS = 8
+
+
+def prefix_encode(items):
+    """Encode a list of paths as ``{"$paths": [dirs, refs, names]}``.
+
+    Playlists are mostly the same few directories over and over; each one
+    is stored once in ``dirs`` and entry i becomes
+    ``dirs[refs[i]] + names[i]``. The three columns are kept apart because
+    zlib compresses runs of similar values better than interleaved ones.
+    Any split point decodes back to the same path, so the cheap "last
+    backslash, else last slash" is good enough.
+    """
+    dirs = {}
+    refs = []
+    names = []
+    for item in items:
+        cut = item.rfind("\\") + 1 or item.rfind("/") + 1
+        directory = item[:cut]
+        ref = dirs.get(directory)
+        if ref is None:
+            ref = dirs[directory] = len(dirs)
+        refs.append(ref)
+        names.append(item[cut:])
+    return {PREFIX_KEY: [list(dirs), refs, names]}
+
+
+def _is_path_list(value):
+    return (
+        isinstance(value, list)
+        and len(value) >= PREFIX_MIN_ITEMS
+        and all(isinstance(item, str) for item in value)
+    )
+
+
+def _prefix_document(obj):
+    """Prefix-encode ``obj`` if it is a path list, else its path-list values."""
+    if _is_path_list(obj):
+        return prefix_encode(obj)
+    if isinstance(obj, dict) and any(_is_path_list(value) for value in obj.values()):
+        return {
+            key: prefix_encode(value) if _is_path_list(value) else value
+            for key, value in obj.items()
+        }
+    return obj
+
+
+def encode_payload(obj, encoding="json"):
+    """Serialize ``obj`` for MQTT in ``encoding`` (see PAYLOAD_ENCODING).
+
+    Returns a str for plain JSON and bytes for the binary formats. Payloads
+    below PAYLOAD_COMPRESS_MIN_BYTES stay plain JSON whatever the encoding.
+    """
+    if encoding not in PAYLOAD_FORMATS:
+        return json.dumps(obj)
+    if encoding == "prefix":
+        text = json.dumps(_prefix_document(obj), separators=(",", ":"))
+    else:
+        text = json.dumps(obj, separators=(",", ":"))
+    if len(text) < PAYLOAD_COMPRESS_MIN_BYTES:
+        return json.dumps(obj)
+    body = zlib.compress(text.encode("utf-8"), PAYLOAD_ZLIB_LEVEL)
+    return PAYLOAD_MARKER + PAYLOAD_FORMATS[encoding] + body
+
+
+def choose_encoding(accepted):
+    """Pick the first encoding in a client's comma-separated ``accepted`` list."""
+    for name in accepted.split(","):
+        name = name.strip().lower()
+        if name in PAYLOAD_ENCODINGS:
+            return name
+    return "json"
+
+
+# --- TRACK METADATA ---------------------------------------------------------
+
+TAG_KEYS = ("title", "artist", "album", "track", "duration")
+
+# ID3v2 frame ids per major version, mapped to our tag keys.
+_ID3_FRAMES = {
+    2: {"TT2": "title", "TP1": "artist", "TAL": "album", "TRK": "track", "TLE": "duration"},
+    3: {"TIT2": "title", "TPE1": "artist", "TALB": "album", "TRCK": "track", "TLEN": "duration"},
+}
+_ID3_FRAMES[4] = _ID3_FRAMES[3]
+_ID3_ENCODINGS = ("latin-1", "utf-16", "utf-16-be", "utf-8")
+
+# MPEG audio layer III bitrates (kbit/s) for MPEG-1 and MPEG-2/2.5.
+_MP3_BITRATES = (
+    (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+)
+_MP3_SAMPLE_RATES = (44100, 48000, 32000)
+
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _decode_id3_text(body):
+    if not body:
+        return None
+    encoding = _ID3_ENCODINGS[body[0]] if body[0] < len(_ID3_ENCODINGS) else "latin-1"
+    try:
+        text = body[1:].decode(encoding)
+    except UnicodeDecodeError:
+        return None
+    # Multiple values are NUL separated; the first one is enough here.
+    return text.split("\x00", 1)[0].strip() or None
+
+
+def _id3_header(fh):
+    """Read an ID3v2 header; return ``(major, flags, end, audio_start)``.
+
+    ``end`` is the offset just past the tag, ``audio_start`` additionally
+    skips the footer. Returns None when the file has no ID3v2 tag.
+    """
+    header = fh.read(10)
+    if len(header) < 10 or header[:3] != b"ID3":
+        return None
+    major, flags = header[3], header[5]
+    end = 10 + _syncsafe(header[6:10])
+    return major, flags, end, end + (10 if flags & 0x10 else 0)
+
+
+def _id3_frames(fh, major, flags, end):
+    """Yield ``(frame_id, size)`` for each frame, with ``fh`` at its body.
+
+    Whatever part of a body the caller leaves unread is skipped before the
+    next frame, so large frames (artwork) cost a seek, not a read.
+    """
+    if major not in _ID3_FRAMES or flags & 0x80:
+        # Unknown version or unsynchronised tag.
+        return
+
+    if flags & 0x40:
+        extended = fh.read(4)
+        if len(extended) < 4:
+            return
+        if major == 4:
+            fh.seek(_syncsafe(extended) - 4, os.SEEK_CUR)
+        else:
+            fh.seek(struct.unpack(">I", extended)[0], os.SEEK_CUR)
+
+    id_len, header_len = (3, 6) if major == 2 else (4, 10)
+    while fh.tell() + header_len <= end:
+        frame_header = fh.read(header_len)
+        frame_id = frame_header[:id_len]
+        if len(frame_header) < header_len or not frame_id.strip(b"\x00"):
+            break  # padding
+        if major == 2:
+            size = int.from_bytes(frame_header[3:6], "big")
+        elif major == 4:
+            size = _syncsafe(frame_header[4:8])
+        else:
+            size = struct.unpack(">I", frame_header[4:8])[0]
+
+        body = fh.tell()
+        yield frame_id.decode("latin-1"), size
+        fh.seek(body + size)
+
+
+def _read_id3v2(fh, tags):
+    """Read the wanted ID3v2 text frames; return the offset of the audio data."""
+    header = _id3_header(fh)
+    if header is None:
+        return 0
+
+    major, flags, end, audio_start = header
+    frames = _ID3_FRAMES.get(major, {})
+    for frame_id, size in _id3_frames(fh, major, flags, end):
+        key = frames.get(frame_id)
+        if key is None or key in tags:
             continue
-        if fallback is None:
-            fallback = items
 
-        if expected_length is None or len(items) == expected_length:
-            return items
+        value = _decode_id3_text(fh.read(size))
+        if value is None:
+            continue
+        if key == "track":
+            value = _parse_track_number(value)
+        elif key == "duration":
+            value = int(value) / 1000.0 if value.isdigit() else None
+        if value is not None:
+            tags[key] = value
+
+    return audio_start
+
+
+def _read_id3v1(fh, tags):
+    fh.seek(-128, os.SEEK_END)
+    data = fh.read(128)
+    if data[:3] != b"TAG":
+        return False
+    for key, start, stop in (("title", 3, 33), ("artist", 33, 63), ("album", 63, 93)):
+        value = data[start:stop].split(b"\x00", 1)[0].decode("latin-1").strip()
+        if value and key not in tags:
+            tags[key] = value
+    # ID3v1.1 keeps the track number in the last byte of the comment.
+    if data[125] == 0 and data[126] and "track" not in tags:
+        tags["track"] = data[126]
+    return True
+
+
+def _mp3_duration(fh, audio_start, file_size, has_id3v1):
+    """Work out the duration from the first frame (Xing/Info or CBR)."""
+    fh.seek(audio_start)
+    data = fh.read(4096)
+    for offset in range(len(data) - 4):
+        if data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+            continue
+        b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+        version = (b1 >> 3) & 0x03   # 3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5
+        layer = (b1 >> 1) & 0x03     # 1: layer III
+        bitrate_index = b2 >> 4
+        rate_index = (b2 >> 2) & 0x03
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+
+        mpeg1 = version == 3
+        sample_rate = _MP3_SAMPLE_RATES[rate_index] >> (0 if mpeg1 else 1 if version == 2 else 2)
+        samples_per_frame = 1152 if mpeg1 else 576
+        mono = (b3 >> 6) == 3
+        side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+
+        xing = offset + 4 + side_info
+        if data[xing:xing + 4] in (b"Xing", b"Info") and len(data) >= xing + 12:
+            if struct.unpack(">I", data[xing + 4:xing + 8])[0] & 0x01:
+                frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+                return frames * samples_per_frame / sample_rate
+
+        bitrate = _MP3_BITRATES[0 if mpeg1 else 1][bitrate_index] * 1000
+        audio_bytes = file_size - audio_start - offset - (128 if has_id3v1 else 0)
+        return max(0, audio_bytes) * 8 / bitrate
+    return None
+
+
+def _read_mp3_tags(fh, file_size):
+    tags = {}
+    audio_start = _read_id3v2(fh, tags)
+    has_id3v1 = file_size >= 128 and _read_id3v1(fh, tags)
+    if "duration" not in tags:
+        duration = _mp3_duration(fh, audio_start, file_size, has_id3v1)
+        if duration:
+            tags["duration"] = round(duration, 1)
+    return tags
+
+
+def _flac_blocks(fh):
+    """Yield ``(block_type, length)`` per FLAC metadata block, ``fh`` at its body."""
+    if fh.read(4) != b"fLaC":
+        return
+    last = False
+    while not last:
+        header = fh.read(4)
+        if len(header) < 4:
+            break
+        last = bool(header[0] & 0x80)
+        length = int.from_bytes(header[1:4], "big")
+        body = fh.tell()
+        yield header[0] & 0x7F, length
+        fh.seek(body + length)
+
+
+def _read_flac_tags(fh, file_size):
+    tags = {}
+    names = {"TITLE": "title", "ARTIST": "artist", "ALBUM": "album", "TRACKNUMBER": "track"}
+    for block_type, length in _flac_blocks(fh):
+        if block_type == 0 and length >= 18:      # STREAMINFO
+            info = fh.read(length)
+            packed = int.from_bytes(info[10:18], "big")
+            sample_rate = packed >> 44
+            total_samples = packed & 0xFFFFFFFFF
+            if sample_rate and total_samples:
+                tags["duration"] = round(total_samples / sample_rate, 1)
+        elif block_type == 4:                     # VORBIS_COMMENT
+            block = fh.read(length)
+            vendor_len = struct.unpack_from("<I", block, 0)[0]
+            pos = 4 + vendor_len
+            count = struct.unpack_from("<I", block, pos)[0]
+            pos += 4
+            for _ in range(count):
+                size = struct.unpack_from("<I", block, pos)[0]
+                comment = block[pos + 4:pos + 4 + size].decode("utf-8", errors="replace")
+                pos += 4 + size
+                name, _, value = comment.partition("=")
+                key = names.get(name.upper())
+                if key and key not in tags and value:
+                    tags[key] = _parse_track_number(value) if key == "track" else value
+    return tags
+
+
+def _read_mutagen_tags(path):
+    audio = mutagen.File(path, easy=True)
+    if audio is None:
+        return {}
+    tags = {}
+    for key, name in (("title", "title"), ("artist", "artist"), ("album", "album"),
+                      ("track", "tracknumber")):
+        values = (audio.tags or {}).get(name)
+        if values:
+            tags[key] = _parse_track_number(values[0]) if key == "track" else values[0]
+    length = getattr(audio.info, "length", None)
+    if length:
+        tags["duration"] = round(length, 1)
+    return tags
+
+
+def _parse_track_number(value):
+    # "3", "03" or "3/12"
+    number = str(value).split("/", 1)[0].strip()
+    return int(number) if number.isdigit() else None
+
+
+_TAG_READERS = {".mp3": _read_mp3_tags, ".flac": _read_flac_tags}
+
+
+def read_tags(path):
+    """Return the tags found in ``path`` (keys from TAG_KEYS) or None.
+
+    MP3 (ID3v2/ID3v1 plus the first frame header for the duration) and FLAC
+    are parsed by seeking through the headers, skipping artwork and other
+    large blocks; other formats go through mutagen when it is installed.
+    """
+    reader = _TAG_READERS.get(os.path.splitext(path)[1].lower())
+    try:
+        if reader is not None:
+            with open(path, "rb") as fh:
+                tags = reader(fh, os.fstat(fh.fileno()).st_size)
+        elif mutagen is not None:
+            tags = _read_mutagen_tags(path)
+        else:
+            return None
+    except Exception:
+        logging.debug("Could not read tags from %s", path, exc_info=True)
+        return None
+
+    return {key: tags.get(key) for key in TAG_KEYS}
+
+
+class TagCache:
+    """Tags per file: an in-memory LRU in front of an SQLite table.
+
+    Entries are keyed by path and validated against the file's size and
+    mtime, so edited files are parsed again and everything else is parsed
+    once, across restarts too. Files without readable tags are cached as
+    None so they are not retried either.
+    """
+
+    def __init__(self, path=TAG_CACHE_PATH, capacity=TAG_CACHE_ENTRIES, reader=read_tags):
+        self.path = path
+        self.capacity = capacity
+        self.reader = reader
+        self.entries = collections.OrderedDict()   # path -> (size, mtime_ns, tags)
+        self.lock = threading.Lock()
+        self.db = None
+        self.dirty = False
+        self.prefetch_cursor = 0
+        self.hits = self.misses = 0
+
+    def _connect(self):
+        if self.db is None and self.path:
+            try:
+                self.db = sqlite3.connect(self.path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS tags ("
+                    "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, tags TEXT)"
+                )
+            except sqlite3.Error:
+                logging.warning("Tag cache %s unavailable; keeping tags in memory", self.path)
+                self.path = None
+                self.db = None
+        return self.db
+
+    def get(self, path):
+        """Return the tags for ``path``, parsing the file only when needed."""
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        stamp = (st.st_size, st.st_mtime_ns)
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[:2] == stamp:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+
+            found, tags = self._load(path, stamp)
+            if found:
+                self.hits += 1
+                self._remember(path, stamp, tags)
+                return tags
+            self.misses += 1
+
+        # Parse without the lock, so lookups from other threads (the poll
+        # publishing the current track's tags) do not wait on file I/O.
+        tags = self.reader(path)
+        with self.lock:
+            self._store(path, stamp, tags)
+            self._remember(path, stamp, tags)
+        return tags
+
+    def _remember(self, path, stamp, tags):
+        self.entries[path] = stamp + (tags,)
+        self.entries.move_to_end(path)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def _load(self, path, stamp):
+        db = self._connect()
+        if db is None:
+            return False, None
+        row = db.execute(
+            "SELECT size, mtime, tags FROM tags WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or tuple(row[:2]) != stamp:
+            return False, None
+        return True, json.loads(row[2])
+
+    def _store(self, path, stamp, tags):
+        db = self._connect()
+        if db is None:
+            return
+        db.execute(
+            "INSERT OR REPLACE INTO tags (path, size, mtime, tags) VALUES (?, ?, ?, ?)",
+            (path,) + stamp + (json.dumps(tags),),
+        )
+        self.dirty = True
+
+    def prefetch(self, paths, limit=TAG_PREFETCH_PER_POLL):
+        """Look up the next ``limit`` entries of ``paths``, round robin."""
+        if not paths:
+            return
+        count = min(limit, len(paths))
+        start = self.prefetch_cursor % len(paths)
+        for offset in range(count):
+            self.get(paths[(start + offset) % len(paths)])
+        self.prefetch_cursor = start + count
+
+    def flush(self):
+        """Commit tags parsed since the last flush."""
+        with self.lock:
+            if self.dirty and self.db is not None:
+                self.db.commit()
+            self.dirty = False
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+
+# --- ARTWORK ----------------------------------------------------------------
+
+_IMAGE_TYPES = (
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF8", "image/gif", ".gif"),
+    (b"BM", "image/bmp", ".bmp"),
+)
+_IMAGE_EXTENSIONS = tuple(ext for _, _, ext in _IMAGE_TYPES) + (".webp",)
+
+
+def _image_type(data):
+    """Return ``(content_type, extension)`` sniffed from the image bytes."""
+    for magic, content_type, extension in _IMAGE_TYPES:
+        if data.startswith(magic):
+            return content_type, extension
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+def _skip_id3_string(body, pos, encoding):
+    """Return the offset just past a NUL-terminated string at ``pos``."""
+    if encoding in (1, 2):
+        # UTF-16: the terminator is a NUL code unit at an even offset.
+        while pos + 1 < len(body) and body[pos:pos + 2] != b"\x00\x00":
+            pos += 2
+        return pos + 2
+    end = body.find(b"\x00", pos)
+    return len(body) if end == -1 else end + 1
+
+
+def _embedded_mp3_art(fh):
+    header = _id3_header(fh)
+    if header is None:
+        return None
+
+    major, flags, end, _ = header
+    frame_name = "PIC" if major == 2 else "APIC"
+    found = None
+    for frame_id, size in _id3_frames(fh, major, flags, end):
+        if frame_id != frame_name:
+            continue
+        body = fh.read(size)
+        if len(body) < 4:
+            continue
+        encoding = body[0]
+        if major == 2:
+            pos = 4                       # encoding, 3-char format
+        else:
+            pos = _skip_id3_string(body, 1, 0)
+        picture_type = body[pos] if pos < len(body) else 0
+        pos = _skip_id3_string(body, pos + 1, encoding)
+        data = body[pos:]
+        if picture_type == 3:             # front cover
+            return data
+        found = found or data
+    return found
+
+
+def _embedded_flac_art(fh):
+    found = None
+    for block_type, length in _flac_blocks(fh):
+        if block_type != 6:               # PICTURE
+            continue
+        block = fh.read(length)
+        picture_type, mime_len = struct.unpack_from(">II", block, 0)
+        pos = 8 + mime_len
+        desc_len = struct.unpack_from(">I", block, pos)[0]
+        pos += 4 + desc_len + 16          # description, width/height/depth/colours
+        data_len = struct.unpack_from(">I", block, pos)[0]
+        data = block[pos + 4:pos + 4 + data_len]
+        if picture_type == 3:
+            return data
+        found = found or data
+    return found
+
+
+_ART_READERS = {".mp3": _embedded_mp3_art, ".flac": _embedded_flac_art}
+
+
+def read_artwork(path):
+    """Return the image bytes for ``path``: embedded art, else a folder image."""
+    reader = _ART_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is not None:
+        try:
+            with open(path, "rb") as fh:
+                data = reader(fh)
+            if data and _image_type(data):
+                return data
+        except Exception:
+            logging.debug("Could not read embedded art from %s", path, exc_info=True)
+
+    folder = os.path.dirname(path)
+    for name in ARTWORK_FOLDER_NAMES:
+        candidate = os.path.join(folder, name)
+        try:
+            with open(candidate, "rb") as fh:
+                data = fh.read()
+        except OSError:
+            continue
+        if _image_type(data):
+            return data
+    return None
+
+
+class ArtworkStore:
+    """Content-addressed artwork and thumbnails in a size-bounded directory.
+
+    Originals are stored as ``<hash><ext>`` and thumbnails as
+    ``<hash>_<size>.jpg``; the least recently used files are deleted once
+    the directory grows past ``max_bytes``. Lookups per track are memoised
+    by path, size and mtime so a track's file is read once.
+    """
+
+    def __init__(self, directory=ARTWORK_CACHE_DIR, max_bytes=ARTWORK_CACHE_MAX_BYTES,
+                 sizes=ARTWORK_SIZES, reader=read_artwork):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.sizes = tuple(sizes)
+        self.reader = reader
+        self.lock = threading.Lock()
+        self.files = collections.OrderedDict()    # file name -> bytes, LRU first
+        self.total_bytes = 0
+        self.track_art = collections.OrderedDict()  # (path, size, mtime) -> hash
+        self._scan()
+
+    def _scan(self):
+        try:
+            entries = sorted(os.scandir(self.directory), key=lambda e: e.stat().st_mtime)
+        except FileNotFoundError:
+            return  # created on first write
+        except OSError:
+            logging.warning("Artwork cache %s unavailable", self.directory)
+            return
+        for entry in entries:
+            if entry.is_file():
+                self.files[entry.name] = entry.stat().st_size
+                self.total_bytes += self.files[entry.name]
+
+    def for_track(self, path):
+        """Return the artwork hash for ``path`` or None."""
+        try:
+            st = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        key = (path, st.st_size, st.st_mtime_ns)
+
+        with self.lock:
+            if key in self.track_art:
+                digest = self.track_art[key]
+                self.track_art.move_to_end(key)
+                if digest is None or self._original_name(digest):
+                    return digest
+
+        data = self.reader(path)
+        digest = self.add(data) if data else None
+        with self.lock:
+            self.track_art[key] = digest
+            while len(self.track_art) > 256:
+                self.track_art.popitem(last=False)
+        return digest
+
+    def add(self, data):
+        """Store original image bytes; return their content hash."""
+        digest = hashlib.sha1(data).hexdigest()[:16]
+        if digest not in self:
+            self._write(digest + _image_type(data)[1], data)
+        return digest
+
+    def __contains__(self, digest):
+        with self.lock:
+            return self._original_name(digest) is not None
+
+    def get(self, digest, size=None):
+        """Return ``(bytes, content_type)`` for an image or None.
+
+        ``size`` picks the smallest configured thumbnail that is at least
+        that large; thumbnails are made on first use when Pillow is around.
+        The lock only guards the file table: disk reads and scaling run
+        outside it, so one request making a thumbnail does not hold up the
+        others.
+        """
+        with self.lock:
+            original = self._original_name(digest)
+            if original is None:
+                return None
+            name, scale_to = original, None
+            if size is not None and Image is not None:
+                fits = [s for s in self.sizes if s >= size] or [max(self.sizes)]
+                thumbnail = "%s_%d.jpg" % (digest, min(fits))
+                if thumbnail in self.files:
+                    name = thumbnail
+                else:
+                    scale_to = min(fits)
+
+        data = self._read(name)
+        if data is not None and scale_to is not None:
+            scaled = self._scale(data, scale_to, original)
+            if scaled is not None:
+                self._write(thumbnail, scaled)
+                data = scaled
+        if data is None:
+            return None
+        return data, _image_type(data)[0]
+
+    def _original_name(self, digest):
+        for extension in _IMAGE_EXTENSIONS:
+            if digest + extension in self.files:
+                return digest + extension
+        return None
+
+    def _scale(self, data, size, original):
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image = image.convert("RGB")
+                image.thumbnail((size, size))
+                out = io.BytesIO()
+                image.save(out, "JPEG", quality=85)
+        except Exception:
+            logging.debug("Could not scale %s", original, exc_info=True)
+            return None
+        return out.getvalue()
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name), "rb") as fh:
+                data = fh.read()
+        except OSError:
+            with self.lock:
+                self.total_bytes -= self.files.pop(name, 0)
+            return None
+        with self.lock:
+            if name in self.files:
+                self.files.move_to_end(name)
+        return data
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        # Two requests may make the same thumbnail at once; each writes its
+        # own temporary file.
+        temporary = "%s.%d.tmp" % (path, threading.get_ident())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, "wb") as fh:
+                fh.write(data)
+            os.replace(temporary, path)
+        except OSError:
+            logging.warning("Could not write %s", path)
+            return
+        with self.lock:
+            self.total_bytes += len(data) - self.files.pop(name, 0)
+            self.files[name] = len(data)
+            evicted = self._evict(keep=name)
+        for old in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def _evict(self, keep):
+        """Drop the least recently used files from the table; return their names."""
+        evicted = []
+        for name in list(self.files):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            self.total_bytes -= self.files.pop(name)
+            evicted.append(name)
+        return evicted
+
+
+class ArtworkRequestHandler(BaseHTTPRequestHandler):
+    """Serve ``/art/<hash>[/<size>]`` from the server's ArtworkStore."""
+
+    path_pattern = re.compile(r"^/art/([0-9a-f]{16})(?:/(\d+|orig))?$")
+
+    def do_GET(self):
+        match = self.path_pattern.match(self.path.split("?", 1)[0])
+        if not match:
+            self.send_error(404)
+            return
+
+        digest, size = match.groups()
+        size = None if size in (None, "orig") else int(size)
+        etag = '"%s-%s"' % (digest, size or "orig")
+        if etag in self.headers.get("If-None-Match", "") and digest in self.server.store:
+            # The URL is content addressed, so a matching ETag is always fresh.
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        image = self.server.store.get(digest, size)
+        if image is None:
+            self.send_error(404)
+            return
+
+        data, content_type = image
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug("artwork http: " + format, *args)
+
+
+def start_artwork_server(store, host=ARTWORK_HTTP_HOST, port=ARTWORK_HTTP_PORT):
+    """Serve ``store`` over HTTP from a daemon thread; return the server."""
+    server = ThreadingHTTPServer((host, port), ArtworkRequestHandler)
+    server.daemon_threads = True
+    server.store = store
+    threading.Thread(
+        target=server.serve_forever, name="winamp-artwork", daemon=True
+    ).start()
+    return server
+
+
+def artwork_base_url(port=ARTWORK_HTTP_PORT):
+    return (ARTWORK_PUBLIC_URL or "http://%s:%d" % (socket.gethostname(), port)).rstrip("/")
+
+
+def serve_artwork(store):
+    """Start serving ``store``; return the public base URL, or None."""
+    if store is None:
+        return None
+    try:
+        start_artwork_server(store)
+    except OSError:
+        logging.exception("Could not start the artwork server on port %s", ARTWORK_HTTP_PORT)
+        return None
+    return artwork_base_url()
+
+
+# --- WARM START -------------------------------------------------------------
+
+
+class WarmStartFile:
+    """One instance's warm-start snapshot, kept as a JSON file.
+
+    Writes go to a temporary file that then replaces the snapshot, so a
+    crash mid-write leaves the previous one intact, and happen at most once
+    per ``interval`` seconds.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path, interval=STATE_SNAPSHOT_INTERVAL_SEC, clock=time.monotonic):
+        self.path = path
+        self.interval = interval
+        self.clock = clock
+        self.next_write = 0.0
+        self.writes = 0
+
+    def load(self):
+        """Return the saved document, or None if there is no usable one."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                document = json.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logging.warning("Ignoring unreadable state snapshot %s", self.path)
+            return None
+        if not isinstance(document, dict) or document.get("version") != self.VERSION:
+            return None
+        return document
+
+    def due(self):
+        return self.clock() >= self.next_write
+
+    def write(self, document):
+        self.next_write = self.clock() + self.interval
+        temporary = self.path + ".tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as fh:
+                json.dump(document, fh, separators=(",", ":"))
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(temporary, self.path)
+        except (OSError, TypeError, ValueError):
+            logging.warning("Could not write state snapshot %s", self.path, exc_info=True)
+            return False
+        self.writes += 1
+        return True
+
+
+def warm_start_path(name=None):
+    """Return the snapshot file of the instance ``name`` (None: single instance)."""
+    if not STATE_SNAPSHOT_PATH or name is None:
+        return STATE_SNAPSHOT_PATH
+    root, ext = os.path.splitext(STATE_SNAPSHOT_PATH)
+    return "%s.%s%s" % (root, name, ext)
+
+# ---------------------------------------------------------------------------
 
-    return fallback or []
+
+class PlaybackTimeline:
+    """Turn polled elapsed times into sparse ``elapsed``/``elapsed_at`` updates.
+
+    Keeps an anchor (elapsed seconds plus the monotonic and wall-clock time
+    it was sampled) and predicts where playback should be now. A new anchor
+    is only taken on a discontinuity: status, track or duration changed, or
+    the polled position is more than ``tolerance`` away from the prediction
+    (a seek). Between anchors the published fields stay identical, so the
+    usual change detection publishes nothing. The wall-clock time is what
+    gets published, since subscribers run on other hosts.
+    """
+
+    def __init__(
+        self,
+        clock=time.monotonic,
+        wall_clock=time.time,
+        tolerance=POSITION_DRIFT_TOLERANCE_SEC,
+    ):
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self):
+        self.anchor = None     # (elapsed, monotonic, status, track, duration)
+        self.fields = {"elapsed": None, "duration": None, "elapsed_at": None}
+
+    def update(self, status, track, elapsed, duration):
+        """Feed one poll; return the fields to publish."""
+        now = self.clock()
+        if self.anchor is not None and not self._discontinuity(
+            now, status, track, elapsed, duration
+        ):
+            return self.fields
+
+        duration = None if duration is None else round(duration, 1)
+        self.anchor = (elapsed, now, status, track, duration)
+        self.fields = {
+            "elapsed": None if elapsed is None else round(elapsed, 1),
+            "duration": duration,
+            "elapsed_at": None if elapsed is None else round(self.wall_clock(), 3),
+        }
+        return self.fields
+
+    def restore(self, status, track, fields):
+        """Resume from published ``fields`` (a warm start) instead of re-anchoring.
+
+        The next update keeps them as long as playback carried on as they
+        predict, so a restart does not republish the elapsed time.
+        """
+        elapsed, elapsed_at = fields.get("elapsed"), fields.get("elapsed_at")
+        if elapsed is None or elapsed_at is None:
+            return
+        since = max(0.0, self.wall_clock() - elapsed_at)
+        self.anchor = (elapsed, self.clock() - since, status, track, fields.get("duration"))
+        self.fields = {key: fields.get(key) for key in ("elapsed", "duration", "elapsed_at")}
+
+    def _discontinuity(self, now, status, track, elapsed, duration):
+        anchor_elapsed, anchor_time, anchor_status, anchor_track, anchor_duration = self.anchor
+        if duration is not None:
+            duration = round(duration, 1)
+        if (status, track, duration) != (anchor_status, anchor_track, anchor_duration):
+            return True
+        if elapsed is None or anchor_elapsed is None:
+            return elapsed is not anchor_elapsed
+
+        expected = anchor_elapsed
+        if status == "playing":
+            expected += now - anchor_time
+        return abs(elapsed - expected) > self.tolerance
+
+
+class PollScheduler:
+    """Decide when the bridge polls Winamp and which tier of fields to read.
+
+    The "fast" tier holds fields that cost a single ``SendMessage``; the
+    "slow" tier (window title, playlist) is due every
+    ``slow_interval`` or right after a transition or command. All timing
+    goes through ``clock`` so decisions can be replayed deterministically.
+    """
+
+    def __init__(
+        self,
+        clock=time.monotonic,
+        fast_interval=FAST_POLL_INTERVAL_SEC,
+        slow_interval=SLOW_POLL_INTERVAL_SEC,
+        boost_interval=BOOST_POLL_INTERVAL_SEC,
+        boost_duration=BOOST_DURATION_SEC,
+        idle_max_interval=IDLE_POLL_INTERVAL_MAX_SEC,
+    ):
+        self.clock = clock
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.boost_interval = boost_interval
+        self.boost_duration = boost_duration
+        self.idle_max_interval = idle_max_interval
+
+        self._lock = threading.Lock()
+        now = clock()
+        self.next_fast = now
+        self.next_slow = now
+        self.boost_until = now
+        self.idle_interval = fast_interval
+        self.followup_at = None
+        self.triggered = None     # None, "fast" or "slow": tiers forced now
+
+    def due(self):
+        """Return ``(fast, slow)``: which tiers should be polled now.
+
+        A True answer is consumed: the caller is expected to poll.
+        """
+        with self._lock:
+            now = self.clock()
+            followup = self.followup_at is not None and now >= self.followup_at
+            slow = self.triggered == "slow" or followup or now >= self.next_slow
+            fast = slow or self.triggered is not None or now >= self.next_fast
+            if fast:
+                self.triggered = None
+            if followup:
+                self.followup_at = None
+            return fast, slow
+
+    def next_delay(self):
+        """Seconds until the next tier is due (0 if one is due already)."""
+        with self._lock:
+            if self.triggered is not None:
+                return 0.0
+            deadline = min(self.next_fast, self.next_slow)
+            if self.followup_at is not None:
+                deadline = min(deadline, self.followup_at)
+            return max(0.0, deadline - self.clock())
+
+    def trigger(self, slow=True, followup=POST_COMMAND_FOLLOWUP_SEC):
+        """Poll now and keep polling quickly for a while.
+
+        ``slow`` includes the title and playlist in the immediate poll, and
+        ``followup`` (seconds, or None) schedules one more slow-tier poll for
+        changes Winamp applies late, such as the window title after a track
+        change.
+        """
+        with self._lock:
+            now = self.clock()
+            self._boost(now)
+            if slow or self.triggered == "slow":
+                self.triggered = "slow"
+            else:
+                self.triggered = "fast"
+            if followup is not None:
+                self._schedule_followup(now + followup)
+
+    def record(self, status, slow_polled, transition=False):
+        """Schedule the next polls after one finished; return the fast interval.
+
+        ``status`` is the published playback status (``playing``,
+        ``paused``, ``idle`` or ``off``); ``transition`` says the poll saw
+        the status, track or playlist length change.
+        """
+        with self._lock:
+            now = self.clock()
+            if transition:
+                self._boost(now)
+                self._schedule_followup(now + POST_COMMAND_FOLLOWUP_SEC)
+
+            if now < self.boost_until:
+                interval = self.boost_interval
+            elif status == "playing":
+                interval = self.fast_interval
+                self.idle_interval = self.fast_interval
+            else:
+                interval = self.idle_interval
+                self.idle_interval = min(self.idle_interval * 2, self.idle_max_interval)
+
+            self.next_fast = now + interval
+            if slow_polled:
+                self.next_slow = now + max(self.slow_interval, interval)
+            return interval
+
+    def _boost(self, now):
+        self.boost_until = now + self.boost_duration
+        self.idle_interval = self.fast_interval
+
+    def _schedule_followup(self, when):
+        if self.followup_at is None or when < self.followup_at:
+            self.followup_at = when
+
+
+class _QueuedCommand:
+    __slots__ = ("cmd", "payload", "received", "ids")
+
+    def __init__(self, cmd, payload, ids):
+        self.cmd = cmd
+        self.payload = payload
+        self.received = time.monotonic()
+        self.ids = ids
+
+
+def parse_command_payload(payload):
+    """Split a command payload into ``(value, correlation_id)``.
+
+    Clients that trace commands send ``{"id": ..., "ts": ..., "value": ...}``
+    instead of the bare value; the id comes back on ``acks`` once a
+    state reflecting the command has been published.
+    """
+    if not payload.startswith("{"):
+        return payload, None
+    try:
+        envelope = json.loads(payload)
+    except ValueError:
+        return payload, None
+    if not isinstance(envelope, dict) or "id" not in envelope:
+        return payload, None
+    return str(envelope.get("value", "")).strip(), str(envelope["id"])
+
+
+class CommandQueue:
+    """Commands waiting for the bridge's worker thread.
+
+    Commands listed in ``coalesce`` are latest-wins: queuing one while an
+    older one is still waiting drops the older one and appends the new value
+    at the end, so it runs after any next/prev queued in between. Other
+    commands keep their order. A coalesced command inherits the correlation
+    ids of the ones it replaced, so every id is still acknowledged.
+    ``counters`` tracks received, coalesced and executed commands.
+    """
+
+    def __init__(self, coalesce=COALESCED_COMMANDS):
+        self.coalesce = frozenset(coalesce)
+        self._cond = threading.Condition()
+        self._items = collections.deque()
+        self._latest = {}
+        self.counters = {"received": 0, "coalesced": 0, "executed": 0}
+
+    def put(self, cmd, payload, correlation_id=None):
+        with self._cond:
+            self.counters["received"] += 1
+            entry = _QueuedCommand(cmd, payload, [correlation_id] if correlation_id else [])
+            if cmd in self.coalesce:
+                previous = self._latest.get(cmd)
+                if previous is not None:
+                    self._items.remove(previous)
+                    entry.ids[:0] = previous.ids
+                    self.counters["coalesced"] += 1
+                self._latest[cmd] = entry
+            self._items.append(entry)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next ``(cmd, payload, received, ids)``, or None after ``timeout``.
+
+        ``received`` is the ``time.monotonic()`` the command was queued at and
+        ``ids`` the correlation ids it answers.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            entry = self._items.popleft()
+            if self._latest.get(entry.cmd) is entry:
+                del self._latest[entry.cmd]
+            self.counters["executed"] += 1
+            return entry.cmd, entry.payload, entry.received, entry.ids
+
+    def pending(self):
+        with self._cond:
+            return len(self._items)
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counters, pending=len(self._items))
 
 
 class WinampMqttBridge:
-    def __init__(self):
-        self.client = mqtt.Client()
-        if MQTT_USERNAME:
-            self.client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+    """Publishes one Winamp instance under ``base_topic`` and runs its commands.
 
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
+    On its own (the default) it owns the MQTT client and follows the first
+    Winamp window. MultiInstanceBridge instead creates one per window, each
+    with a ``manager`` pinned to that window, and passes in its shared
+    ``client``, ``wake`` event, tag cache and artwork store, plus a
+    per-instance ``warm_start`` file.
+    """
+
+    def __init__(self, client=None, base_topic=BASE_TOPIC, manager=None, wake=None,
+                 tags=None, artwork=None, warm_start=None):
+        if client is None:
+            client = mqtt.Client()
+            if MQTT_USERNAME:
+                client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+
+            client.on_connect = self.on_connect
+            client.on_message = self.on_message
+        self.client = client
+        self.base_topic = base_topic
+        self.handles = manager or handles
+        self.playlist_files = (
+            playlist_files if manager is None
+            else PlaylistFileReader(manager=manager, shared_locations=False)
+        )
 
         self.last_state = {}
+        self.last_fields = {}
+        self.playlist_cache = PlaylistCache()
+        self.scheduler = PollScheduler()
+        self.wake = wake or threading.Event()
+        self.commands = CommandQueue()
+        self.closed = threading.Event()
+        self.fast_fields = None
+        self.timeline = PlaybackTimeline()
+        self.tags = tags or TagCache()
+        if artwork is None and ARTWORK_HTTP_PORT:
+            artwork = ArtworkStore()
+        self.artwork = artwork
+        self.artwork_url = None
+        self.slow_fields = {"title": "", "playlist": [], "tags": None, "art": None}
+
+        # Playlist delta stream (PLAYLIST_MODE = "delta"). The epoch changes on
+        # every bridge start so clients can tell a restart from a sequence gap.
+        self.playlist_epoch = int(time.time())
+        self.playlist_seq = 0
+        self.published_playlist = None
+        self.last_snapshot_time = 0.0
+        self.snapshot_requested = threading.Event()
+
+        # Paged playlist (PLAYLIST_MODE = "paged"): the items and hash of
+        # every published page, plus the last manifest.
+        self.published_pages = []     # [(items, hash)]
+        self.published_manifest = None
+        self.paged_items = None
+
+        # Payload encoding (PAYLOAD_ENCODING). In "auto" mode a client picks
+        # one on winamp/cmnd/encoding; the poll thread switches over.
+        self.encoding = PAYLOAD_ENCODING if PAYLOAD_ENCODING in PAYLOAD_ENCODINGS else "json"
+        self.requested_encoding = None
+
+        self.stage_timers = {}        # poll stage -> StageTimer
+        self.publish_series = {}      # topic label -> (count, bytes) series
+
+        # Correlation ids of executed commands, as (id, perf_counter() when
+        # done), until a state polled after them has been published.
+        self.pending_acks = []
+        self.acks_lock = threading.Lock()
+        self.poll_started = 0.0
+
+        # Warm start (STATE_SNAPSHOT_PATH): the state loaded at startup until
+        # it has been published, and the last state written to the file.
+        if warm_start is None and manager is None and STATE_SNAPSHOT_PATH:
+            warm_start = WarmStartFile(STATE_SNAPSHOT_PATH)
+        self.warm_start = warm_start
+        self.restored_state = None
+        self.saved_state = None
+        self.restore_warm_start()
 
     # --- MQTT callbacks -----------------------------------------------------
 
     def on_connect(self, client, userdata, flags, reason_code, properties=None):
         logging.info("Connected to MQTT with result code %s", reason_code)
+        self.announce()
+
+    def announce(self):
+        """Subscribe to this instance's commands and mark it online."""
         # Command topics:
         #   winamp/cmnd/play, pause, stop, next, prev
         #   winamp/cmnd/toggle
         #   winamp/cmnd/volume (payload: 0–100)
         #   winamp/cmnd/vol_up, vol_down
-        client.subscribe(BASE_TOPIC + "/cmnd/#")
+        self.client.subscribe(self.base_topic + "/cmnd/#")
+        self.publish_capabilities()
 
         # Announce availability
-        client.publish(
-            BASE_TOPIC + "/availability",
-            "online",
+        self.publish_availability(True)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        """Publish through the MQTT client, counting messages and bytes."""
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        # Label by topic below the base, without page numbers.
+        key = topic[len(self.base_topic) + 1:]
+        series = self.publish_series.get(key)
+        if series is None:
+            label = "/".join(part for part in key.split("/") if not part.isdigit())
+            series = self.publish_series[key] = (
+                metrics.publishes.labels(self.base_topic, label),
+                metrics.publish_bytes.labels(self.base_topic, label),
+            )
+        series[0].inc()
+        series[1].inc(len(payload) if payload else 0)
+        return self.client.publish(topic, payload, qos=qos, retain=retain)
+
+    def publish_availability(self, online):
+        self.publish(
+            self.base_topic + "/availability",
+            "online" if online else "offline",
             retain=True
         )
 
     def on_message(self, client, userdata, msg):
+        # Runs on the paho network thread: never talk to Winamp here, just
+        # queue the command for command_worker.
         topic = msg.topic
         payload = msg.payload.decode(errors="ignore").strip()
         logging.info("MQTT cmd %s => %s", topic, payload)
 
-        cmd = topic[len(BASE_TOPIC + "/cmnd/"):] if topic.startswith(BASE_TOPIC + "/cmnd/") else ""
+        prefix = self.base_topic + "/cmnd/"
+        cmd = topic[len(prefix):] if topic.startswith(prefix) else ""
+        if cmd == "playlist_resync":
+            self.snapshot_requested.set()
+            self.wake.set()
+        elif cmd == "encoding":
+            if PAYLOAD_ENCODING == "auto":
+                self.requested_encoding = choose_encoding(payload)
+                self.wake.set()
+        elif cmd:
+            value, correlation_id = parse_command_payload(payload)
+            self.commands.put(cmd, value, correlation_id)
+
+    def command_worker(self):
+        """Execute queued commands one at a time, off the MQTT thread."""
+        while not self.closed.is_set():
+            queued = self.commands.get(timeout=1.0)
+            if queued is None:
+                continue
+            cmd, payload, received, ids = queued
+            try:
+                self.execute_command(cmd, payload)
+            except Exception:
+                logging.exception("Error executing command %s", cmd)
+            metrics.command_seconds.labels(
+                self.base_topic, cmd if cmd in COMMANDS else "other"
+            ).observe(time.monotonic() - received)
+            if ids:
+                done = time.perf_counter()
+                with self.acks_lock:
+                    self.pending_acks.extend((correlation_id, done) for correlation_id in ids)
+
+            self.refresh_after_command(cmd)
+
+            if not self.commands.pending():
+                self.publish_command_stats()
+
+    def refresh_after_command(self, cmd):
+        """Re-poll right away so the command's effect is published promptly.
+
+        The poll goes through the normal change detection, so nothing that
+        did not change is published again.
+        """
+        if cmd in FAST_TIER_COMMANDS:
+            self.scheduler.trigger(slow=False, followup=None)
+        else:
+            self.scheduler.trigger()
+        self.wake.set()
+
+    def publish_capabilities(self):
+        self.publish(
+            self.base_topic + "/capabilities",
+            json.dumps({
+                "encodings": list(PAYLOAD_ENCODINGS),
+                "encoding": self.encoding,
+                "negotiable": PAYLOAD_ENCODING == "auto",
+                "correlation": True,
+            }),
+            retain=True
+        )
+
+    def apply_requested_encoding(self):
+        """Switch to the encoding a client asked for and republish everything.
 
+        Retained payloads in the old encoding stay decodable, but a client
+        that asked for a new one expects to see it, so nothing is skipped as
+        unchanged.
+        """
+        encoding, self.requested_encoding = self.requested_encoding, None
+        if encoding is None or encoding == self.encoding:
+            return
+        logging.info("Switching payload encoding to %s", encoding)
+        self.encoding = encoding
+        self.last_state = {}
+        self.last_fields = {}
+        self.published_pages = []
+        self.published_manifest = None
+        self.paged_items = None
+        self.snapshot_requested.set()
+        self.publish_capabilities()
+
+    def encode(self, obj):
+        return encode_payload(obj, self.encoding)
+
+    def publish_command_stats(self):
+        self.publish(
+            self.base_topic + "/stats/commands",
+            json.dumps(self.commands.stats()),
+        )
+
+    def execute_command(self, cmd, payload):
         if cmd == "play":
-            send_winamp_command(WA_PLAY)
+            send_winamp_command(WA_PLAY, self.handles)
         elif cmd == "pause":
-            send_winamp_command(WA_PAUSE)
+            send_winamp_command(WA_PAUSE, self.handles)
         elif cmd == "stop":
-            send_winamp_command(WA_STOP)
+            send_winamp_command(WA_STOP, self.handles)
         elif cmd == "next":
-            send_winamp_command(WA_NEXT)
+            send_winamp_command(WA_NEXT, self.handles)
         elif cmd == "prev":
-            send_winamp_command(WA_PREV)
+            send_winamp_command(WA_PREV, self.handles)
         elif cmd == "toggle":
             # Simple toggle: if playing -> pause, else play
-            hwnd = find_winamp_hwnd()
+            hwnd = self.handles.hwnd()
             if hwnd:
                 state = get_playback_status(hwnd)
                 if state == "playing":
-                    send_winamp_command(WA_PAUSE)
+                    send_winamp_command(WA_PAUSE, self.handles)
                 else:
-                    send_winamp_command(WA_PLAY)
+                    send_winamp_command(WA_PLAY, self.handles)
         elif cmd == "vol_up":
             self.adjust_volume(+5)
         elif cmd == "vol_down":
@@ -371,7 +3224,7 @@ class WinampMqttBridge:
         elif cmd == "volume":
             try:
                 value = float(payload)
-                set_volume_percent(value)
+                set_volume_percent(value, self.handles)
             except ValueError:
                 logging.warning("Invalid volume payload: %r", payload)
         elif cmd == "play_index":
@@ -381,12 +3234,12 @@ class WinampMqttBridge:
                 logging.warning("Invalid play_index payload: %r", payload)
                 return
 
-            hwnd = find_winamp_hwnd()
+            hwnd = self.handles.hwnd()
             if not hwnd:
                 logging.warning("Cannot jump to playlist entry; Winamp window missing")
                 return
 
-            length = win32api.SendMessage(hwnd, WM_WA_IPC, 0, IPC_GETLISTLENGTH)
+            length = send_message(hwnd, WM_WA_IPC, 0, IPC_GETLISTLENGTH)
             if length < 0:
                 logging.warning("Winamp playlist length unavailable")
                 return
@@ -396,87 +3249,707 @@ class WinampMqttBridge:
                 return
 
             set_playlist_position(hwnd, target)
+        elif cmd == "seek":
+            try:
+                seconds = float(payload)
+            except ValueError:
+                logging.warning("Invalid seek payload: %r", payload)
+                return
+
+            hwnd = self.handles.hwnd()
+            if not hwnd:
+                logging.warning("Cannot seek; Winamp window missing")
+                return
+            if not seek_to_seconds(hwnd, seconds):
+                logging.warning("Winamp refused to seek to %.1fs", seconds)
+        else:
+            logging.warning("Unknown command %r", cmd)
 
     def adjust_volume(self, delta):
-        hwnd = find_winamp_hwnd()
+        hwnd = self.handles.hwnd()
         if not hwnd:
             return
         current = get_volume_percent(hwnd)
         if current is None:
             return
-        set_volume_percent(current + delta)
+        set_volume_percent(current + delta, self.handles)
 
     # --- State publishing loop ---------------------------------------------
 
     def publish_state_loop(self):
         while True:
-            try:
-                hwnd = find_winamp_hwnd()
-                if not hwnd:
-                    state = {
-                        "available": False,
-                        "status": "off",
-                        "title": "",
-                        "volume": None,
-                        "playlist": [],
-                        "position": None,
-                    }
-                else:
-                    status = get_playback_status(hwnd)
-                    title = get_title_from_window(hwnd)
-                    volume = get_volume_percent(hwnd)
-                    playlist_position = get_playlist_position(hwnd)
-                    playlist_length = win32api.SendMessage(hwnd, WM_WA_IPC, 0, IPC_GETLISTLENGTH)
-                    playlist_items = read_playlist_from_ipc(
-                        hwnd, playlist_length if playlist_length >= 0 else None
-                    ) or read_playlist_from_disk(
+            fast, slow = self.scheduler.due()
+            if fast:
+                self.poll_once(slow)
+
+            self.wake.wait(self.scheduler.next_delay())
+            self.wake.clear()
+
+    def poll_once(self, slow):
+        """Poll once; return False if Winamp did not answer (SendMessage timed out)."""
+        try:
+            self.poll_state(slow)
+        except TimeoutError as e:
+            # SendMessage timed out: Winamp is busy or frozen.
+            logging.warning("Winamp (%s) did not answer: %s", self.base_topic, e)
+            self.scheduler.record("off", slow)
+            return False
+        except Exception as e:
+            logging.exception("Error polling Winamp (%s): %s", self.base_topic, e)
+            self.scheduler.record("off", slow)
+        return True
+
+    def poll_state(self, slow):
+        """Poll Winamp (slow-tier fields only when ``slow``) and publish."""
+        started = self.poll_started = time.perf_counter()
+        hwnd = self.handles.hwnd()
+        if not hwnd:
+            self.playlist_cache.reset()
+            fast_fields = {"available": False, "status": "off", "volume": None, "position": None}
+            self.slow_fields = {"title": "", "playlist": [], "tags": None, "art": None}
+            timeline = self.timeline.update("off", None, None, None)
+        else:
+            with self.timed("length"):
+                playlist_length = send_message(hwnd, WM_WA_IPC, 0, IPC_GETLISTLENGTH)
+            with self.timed("status"):
+                status = get_playback_status(hwnd)   # playing|paused|idle
+            with self.timed("volume"):
+                volume = get_volume_percent(hwnd)
+            with self.timed("position"):
+                position = get_playlist_position(hwnd)
+            fast_fields = {
+                "available": True,
+                "status": status,
+                "volume": volume,
+                "position": position,
+                "length": playlist_length,
+            }
+            with self.timed("clock"):
+                elapsed = get_elapsed_seconds(hwnd)
+                duration = get_track_duration(hwnd)
+            timeline = self.timeline.update(status, position, elapsed, duration)
+
+        # A new status, track or playlist length means the title and playlist
+        # are probably stale too.
+        previous = self.fast_fields
+        transition = previous is not None and any(
+            previous.get(key) != fast_fields.get(key)
+            for key in ("available", "status", "position", "length")
+        )
+        self.fast_fields = fast_fields
+        slow = slow or transition or previous is None
+
+        if hwnd and slow:
+            playlist_length = fast_fields["length"]
+            with self.timed("playlist_ipc"):
+                playlist = read_playlist_from_ipc(
+                    hwnd,
+                    playlist_length if playlist_length >= 0 else None,
+                    cache=self.playlist_cache,
+                    position=fast_fields["position"],
+                    manager=self.handles,
+                )
+            if not playlist:
+                metrics.playlist_disk_fallbacks.labels(self.base_topic).inc()
+                with self.timed("playlist_disk"):
+                    playlist = self.playlist_files.read(
                         playlist_length if playlist_length >= 0 else None
                     )
-                    state = {
-                        "available": True,
-                        "status": status,   # playing|paused|idle
-                        "title": title,
-                        "volume": volume,
-                        "playlist": playlist_items,
-                        "position": playlist_position,
-                    }
-
-                if state != self.last_state:
-                    self.client.publish(
-                        BASE_TOPIC + "/state",
-                        json.dumps(state),
-                        retain=True
-                    )
-                    self.last_state = state
-            except Exception as e:
-                logging.exception("Error in publish_state_loop: %s", e)
+            path = self.current_track_path(hwnd, playlist, fast_fields["position"])
+            with self.timed("title"):
+                title = get_title_from_window(hwnd)
+            with self.timed("tags"):
+                tags = self.current_track_tags(path)
+            with self.timed("art"):
+                art = self.current_track_art(path)
+            self.slow_fields = {
+                "title": title,
+                "playlist": playlist,
+                "tags": tags,
+                "art": art,
+            }
+
+        state = {
+            "available": fast_fields["available"],
+            "status": fast_fields["status"],
+            "title": self.slow_fields["title"],
+            "volume": fast_fields["volume"],
+            "playlist": self.slow_fields["playlist"],
+            "position": fast_fields["position"],
+            "elapsed": timeline["elapsed"],
+            "duration": timeline["duration"],
+            "elapsed_at": timeline["elapsed_at"],
+            "tags": self.slow_fields["tags"],
+            "art": self.slow_fields["art"],
+        }
+        with self.timed("publish"):
+            self.publish_state(state)
+        if hwnd and slow:
+            # Warming the tag cache (file stats, header parses and an SQLite
+            # commit) waits until the state is out.
+            with self.timed("tag_prefetch"):
+                self.tags.prefetch(state["playlist"])
+                self.tags.flush()
+        self.save_warm_start(state)
+        metrics.poll_seconds.labels(self.base_topic, "slow" if slow else "fast").observe(
+            time.perf_counter() - started
+        )
+        self.scheduler.record(state["status"], slow, transition)
+
+    # --- Warm start ---------------------------------------------------------
+
+    def restore_warm_start(self):
+        """Load the warm-start snapshot, if any, ahead of the first poll.
 
-            time.sleep(POLL_INTERVAL_SEC)
+        The playlist cache is only seeded when the snapshot was taken from
+        the Winamp process that is running now, since its entry pointers
+        mean nothing to another one.
+        """
+        document = self.warm_start.load() if self.warm_start is not None else None
+        if document is None:
+            return
+        saved, playlist = document.get("state"), document.get("playlist")
+        if not isinstance(saved, dict) or not isinstance(playlist, list):
+            return
+        state = {field: saved.get(field) for field in STATE_FIELDS}
+        state["playlist"] = playlist
+        self.playlist_files.restore(document.get("playlist_path"), document.get("exe_dir"))
+
+        fingerprint = document.get("fingerprint")
+        hwnd = self.handles.hwnd()
+        if (
+            isinstance(fingerprint, dict)
+            and hwnd
+            and hwnd == fingerprint.get("hwnd")
+            and self.handles.pid() == fingerprint.get("pid")
+        ):
+            pointers = fingerprint.get("pointers") or []
+            gaps = set(fingerprint.get("gaps") or ())
+            if len(pointers) == len(playlist) + len(gaps):
+                items = iter(playlist)
+                entries = [None if index in gaps else next(items)
+                           for index in range(len(pointers))]
+                self.playlist_cache.restore(hwnd, entries, pointers)
+                # The first poll gets this very list back while it still holds.
+                state["playlist"] = self.playlist_cache.items
+                logging.info("Warm start: reusing %d playlist entries", len(playlist))
+
+        self.timeline.restore(state["status"], state["position"], state)
+        self.restored_state = self.saved_state = state
+
+    def publish_restored_state(self):
+        """Publish the warm-start state once, before the first poll.
+
+        It is published in full, so it also replaces whatever the broker
+        kept, and becomes what the first poll is compared against.
+        """
+        state, self.restored_state = self.restored_state, None
+        if state is None or self.fast_fields is not None:
+            return
+        self.publish_state(state)
+
+    def save_warm_start(self, state, force=False):
+        """Write ``state`` to the warm-start file when it changed and a write is due."""
+        if self.warm_start is None or state == self.saved_state:
+            return
+        if not (force or self.warm_start.due()):
+            return
+        cache = self.playlist_cache
+        playlist = state["playlist"]
+        fingerprint = None
+        if cache.hwnd and cache.items is playlist:
+            fingerprint = {
+                "hwnd": cache.hwnd,
+                "pid": self.handles.pid(),
+                "pointers": cache.pointers,
+                "gaps": [index for index, entry in enumerate(cache.entries) if not entry],
+            }
+        document = {
+            "version": WarmStartFile.VERSION,
+            "saved_at": time.time(),
+            "base_topic": self.base_topic,
+            "exe_dir": self.handles.exe_dir(),
+            "playlist_path": self.playlist_files.resolved,
+            "state": {key: value for key, value in state.items() if key != "playlist"},
+            "playlist": playlist,
+            "fingerprint": fingerprint,
+        }
+        if self.warm_start.write(document):
+            self.saved_state = state
+
+    def timed(self, stage):
+        """Return the timer for one stage of this instance's poll."""
+        timer = self.stage_timers.get(stage)
+        if timer is None:
+            timer = self.stage_timers[stage] = StageTimer(
+                metrics.poll_stage_seconds.labels(self.base_topic, stage)
+            )
+        return timer
+
+    def current_track_path(self, hwnd, playlist, position):
+        """Return the file of the track at ``position`` (None if unknown)."""
+        if position is None or position < 0:
+            return None
+        if position < len(playlist):
+            return playlist[position]
+        # Past playlist_limit(); ask Winamp for that one entry.
+        process = self.handles.process(hwnd)
+        return _read_playlist_entry(hwnd, process, position)[1] if process else None
+
+    def current_track_tags(self, path):
+        """Return the file's tags, else what the playlist file's #EXTINF says."""
+        if not path:
+            return None
+        tags = self.tags.get(path)
+        if tags is None:
+            info = self.playlist_files.extinf(path)
+            if info is not None:
+                tags = dict.fromkeys(TAG_KEYS)
+                tags["duration"], tags["title"] = info
+        return tags
+
+    def current_track_art(self, path):
+        """Return ``{"hash", "url"}`` for the track's artwork or None."""
+        if not path or self.artwork is None or self.artwork_url is None:
+            return None
+        digest = self.artwork.for_track(path)
+        if digest is None:
+            return None
+        return {
+            "hash": digest,
+            "url": "%s/art/%s/%d" % (self.artwork_url, digest, ARTWORK_DEFAULT_SIZE),
+        }
+
+    def publish_state(self, state):
+        """Publish ``state`` in the configured mode, skipping unchanged data."""
+        if self.requested_encoding is not None:
+            self.apply_requested_encoding()
+
+        if PLAYLIST_MODE == "delta":
+            state = dict(state)
+            self.publish_playlist_delta(state.pop("playlist", None) or [])
+        elif PLAYLIST_MODE == "paged":
+            state = dict(state)
+            self.publish_playlist_pages(state.pop("playlist", None) or [])
+
+        if STATE_PUBLISH_MODE in ("split", "both"):
+            self.publish_state_fields(state)
+
+        # The playlist cache hands back the same list object while the
+        # playlist is unchanged, so this comparison stays cheap.
+        if STATE_PUBLISH_MODE != "split" and state != self.last_state:
+            self.publish(
+                self.base_topic + "/state",
+                self.encode(state),
+                retain=True
+            )
+            self.last_state = state
+
+        self.publish_acks()
+
+    def publish_acks(self):
+        """Acknowledge the commands whose effect the state just published shows.
+
+        Only commands that finished before this poll started qualify; later
+        ones wait for the next poll, which refresh_after_command triggers.
+        Not retained: an ack is only meaningful to the client waiting for it.
+        """
+        with self.acks_lock:
+            if not self.pending_acks:
+                return
+            acks = [cid for cid, done in self.pending_acks if done <= self.poll_started]
+            if not acks:
+                return
+            self.pending_acks = [
+                (cid, done) for cid, done in self.pending_acks if done > self.poll_started
+            ]
+        self.publish(self.base_topic + "/acks", json.dumps(acks))
+
+    def publish_state_fields(self, state):
+        """Publish each changed field to its own retained ``state/<field>`` topic."""
+        for field in STATE_FIELDS:
+            if field not in state:
+                continue
+            value = state[field]
+            if field in self.last_fields:
+                previous = self.last_fields[field]
+                if previous is value or previous == value:
+                    continue
+
+            self.publish(
+                self.base_topic + "/state/" + field,
+                self.encode(value),
+                retain=True
+            )
+            self.last_fields[field] = value
+
+    def publish_playlist_delta(self, items):
+        """Publish playlist changes as numbered operations plus snapshots."""
+        previous = self.published_playlist
+        if previous is None:
+            self.playlist_seq += 1
+        else:
+            ops = diff_playlist(previous, items)
+            if ops:
+                self.playlist_seq += 1
+                self.publish(
+                    self.base_topic + "/playlist/delta",
+                    self.encode({
+                        "epoch": self.playlist_epoch,
+                        "seq": self.playlist_seq,
+                        "length": len(items),
+                        "ops": ops,
+                    }),
+                    qos=1,
+                )
+        self.published_playlist = items
+
+        now = time.monotonic()
+        if (
+            previous is None
+            or self.snapshot_requested.is_set()
+            or now - self.last_snapshot_time >= PLAYLIST_SNAPSHOT_INTERVAL_SEC
+        ):
+            self.snapshot_requested.clear()
+            self.last_snapshot_time = now
+            self.publish(
+                self.base_topic + "/playlist/snapshot",
+                self.encode({
+                    "epoch": self.playlist_epoch,
+                    "seq": self.playlist_seq,
+                    "items": items,
+                }),
+                qos=1,
+                retain=True
+            )
+
+    def publish_playlist_pages(self, items):
+        """Publish the playlist as retained pages plus a manifest of hashes.
+
+        Pages are encoded one at a time, so the full list never becomes one
+        payload, and a page is only encoded and republished when its entries
+        differ from the published ones.
+        """
+        if self.snapshot_requested.is_set():
+            # A client lost track; publish everything again.
+            self.snapshot_requested.clear()
+            self.published_pages = []
+            self.published_manifest = None
+        elif items is self.paged_items:
+            # The playlist cache hands back the same list while nothing changed.
+            return
+        self.paged_items = items
+
+        size = max(1, PLAYLIST_PAGE_SIZE)
+        pages = []
+        for number, start in enumerate(range(0, len(items), size)):
+            page = items[start:start + size]
+            if number < len(self.published_pages):
+                published, digest = self.published_pages[number]
+                if published == page:
+                    pages.append((published, digest))
+                    continue
+
+            payload = self.encode({"page": number, "start": start, "items": page})
+            raw = payload if isinstance(payload, bytes) else payload.encode("utf-8")
+            digest = hashlib.sha1(raw).hexdigest()[:16]
+            self.publish(
+                "%s/playlist/page/%d" % (self.base_topic, number),
+                payload,
+                qos=1,
+                retain=True
+            )
+            pages.append((page, digest))
+
+        # Clear retained pages past the new end of the playlist.
+        for number in range(len(pages), len(self.published_pages)):
+            self.publish(
+                "%s/playlist/page/%d" % (self.base_topic, number), None, qos=1, retain=True
+            )
+        self.published_pages = pages
+
+        hashes = [digest for _, digest in pages]
+        manifest = {
+            "length": len(items),
+            "page_size": size,
+            "pages": hashes,
+            "hash": hashlib.sha1("".join(hashes).encode("ascii")).hexdigest()[:16],
+        }
+        if manifest != self.published_manifest:
+            self.publish(
+                self.base_topic + "/playlist/manifest",
+                self.encode(manifest),
+                qos=1,
+                retain=True
+            )
+            self.published_manifest = manifest
 
     def run(self):
         # Start MQTT loop in background thread
         self.client.will_set(
-            BASE_TOPIC + "/availability",
+            self.base_topic + "/availability",
             "offline",
             retain=True
         )
 
         self.client.connect(MQTT_HOST, MQTT_PORT, keepalive=60)
         self.client.loop_start()
+        start_metrics_server()
+
+        threading.Thread(
+            target=self.command_worker, name="winamp-commands", daemon=True
+        ).start()
+
+        self.artwork_url = serve_artwork(self.artwork)
 
         # Mark the bridge online as soon as MQTT is connected so Home Assistant
         # can treat the media player as available. The LWT above will flip it
         # back to "offline" if the connection drops unexpectedly.
-        self.client.publish(
-            BASE_TOPIC + "/availability",
-            "online",
-            retain=True
-        )
+        self.publish_availability(True)
+        self.publish_restored_state()
 
         # Blocking state loop
         self.publish_state_loop()
 
 
+class MultiInstanceBridge:
+    """Drives every Winamp window on the host over one MQTT connection.
+
+    Each window gets a WinampMqttBridge under ``<base_topic>/<id>`` whose
+    handle manager is pinned to that window. The main loop hands instances
+    whose scheduler is due to a pool of ``workers`` threads and never
+    queues a second poll for an instance whose previous one is still
+    running, so a frozen Winamp ties up one worker, not the loop. An
+    instance that has not answered for ``hung_after`` seconds, in one poll
+    still blocked or in polls that keep timing out, is reported offline
+    until it answers again. The MQTT will on
+    ``<base_topic>/availability`` covers the bridge process as a whole.
+    """
+
+    def __init__(self, client=None, base_topic=BASE_TOPIC, workers=POLL_WORKERS,
+                 scan_interval=INSTANCE_SCAN_INTERVAL_SEC,
+                 hung_after=INSTANCE_HUNG_AFTER_SEC, clock=time.monotonic):
+        if client is None:
+            client = mqtt.Client()
+            if MQTT_USERNAME:
+                client.username_pw_set(MQTT_USERNAME, MQTT_PASSWORD)
+
+            client.on_connect = self.on_connect
+            client.on_message = self.on_message
+        self.client = client
+        self.base_topic = base_topic
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="winamp-poll"
+        )
+        self.scan_interval = scan_interval
+        self.hung_after = hung_after
+        self.clock = clock
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+        self.instances = {}          # id -> WinampMqttBridge
+        self.running = {}            # id -> (future, start time) of its poll
+        self.hung = set()
+        self.silent_since = {}       # id -> start of its first unanswered poll
+        self.next_scan = 0.0
+        self.published_instances = None
+        # Shared by all instances: tags and artwork do not depend on which
+        # Winamp plays the file, and there is one artwork HTTP server.
+        self.tags = TagCache()
+        self.artwork = ArtworkStore() if ARTWORK_HTTP_PORT else None
+        self.artwork_url = None
+
+    # --- MQTT callbacks -----------------------------------------------------
+
+    def on_connect(self, client, userdata, flags, reason_code, properties=None):
+        logging.info("Connected to MQTT with result code %s", reason_code)
+        client.publish(self.base_topic + "/availability", "online", retain=True)
+        for name, instance in self.snapshot():
+            instance.announce()
+            if name in self.hung:
+                instance.publish_availability(False)
+        self.published_instances = None
+        self.publish_instances()
+
+    def on_message(self, client, userdata, msg):
+        for _, instance in self.snapshot():
+            if msg.topic.startswith(instance.base_topic + "/cmnd/"):
+                instance.on_message(client, userdata, msg)
+                return
+
+    # --- Instances ----------------------------------------------------------
+
+    def snapshot(self):
+        """Return ``[(id, instance)]``; safe to call from any thread."""
+        with self.lock:
+            return sorted(self.instances.items())
+
+    def instance_id(self, exe_dir):
+        """Return the configured or derived id for a winamp.exe directory."""
+        if exe_dir:
+            key = os.path.normcase(os.path.normpath(exe_dir))
+            for directory, name in INSTANCE_IDS.items():
+                if os.path.normcase(os.path.normpath(directory)) == key:
+                    return name
+            name = os.path.basename(exe_dir.rstrip("\\/"))
+            slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+            if slug:
+                return slug
+        return "winamp"
+
+    def scan(self):
+        """Match Winamp windows to instances, adding instances for new ones.
+
+        A window whose id belongs to an instance that lost its window (that
+        Winamp was restarted) takes that instance over, so its topics stay
+        the same; otherwise the id gets the next free number.
+        """
+        instances = dict(self.snapshot())
+        live = {instance.handles.hwnd() for instance in instances.values()}
+        for hwnd in get_backend().enum_windows(WINAMP_CLASS):
+            if hwnd in live:
+                continue
+            manager = WinampHandleManager(window=hwnd)
+            base = self.instance_id(manager.exe_dir())
+            number = 1
+            while True:
+                name = base if number == 1 else "%s-%d" % (base, number)
+                instance = instances.get(name)
+                if instance is None:
+                    instances[name] = self.add_instance(name, manager)
+                    break
+                # A finished poll stays in ``running`` until poll_due clears it.
+                running = self.running.get(name)
+                idle = running is None or running[0].done()
+                if idle and not instance.handles.hwnd():
+                    logging.info("Winamp instance %s is back (window %s)", name, hwnd)
+                    manager.invalidate()
+                    instance.handles.attach(hwnd)
+                    break
+                number += 1
+        self.publish_instances()
+
+    def add_instance(self, name, manager):
+        instance = WinampMqttBridge(
+            client=self.client,
+            base_topic="%s/%s" % (self.base_topic, name),
+            manager=manager,
+            wake=self.wake,
+            tags=self.tags,
+            artwork=self.artwork,
+            warm_start=WarmStartFile(warm_start_path(name)) if STATE_SNAPSHOT_PATH else None,
+        )
+        instance.artwork_url = self.artwork_url
+        with self.lock:
+            self.instances[name] = instance
+        threading.Thread(
+            target=instance.command_worker, name="winamp-commands-" + name, daemon=True
+        ).start()
+        instance.announce()
+        instance.publish_restored_state()
+        logging.info("Found Winamp instance %s (window %s)", name, manager.hwnd())
+        return instance
+
+    def publish_instances(self):
+        listing = [
+            {
+                "id": name,
+                "topic": instance.base_topic,
+                "pid": instance.handles.pid(),
+                "exe_dir": instance.handles.exe_dir(),
+                "hung": name in self.hung,
+            }
+            for name, instance in self.snapshot()
+        ]
+        if listing != self.published_instances:
+            self.client.publish(
+                self.base_topic + "/instances", json.dumps(listing), retain=True
+            )
+            self.published_instances = listing
+
+    # --- Polling ------------------------------------------------------------
+
+    def poll_due(self):
+        """Start the polls that are due; return seconds until the next check."""
+        now = self.clock()
+        delay = max(0.0, self.next_scan - now)
+        changed = False
+        for name, instance in self.snapshot():
+            running = self.running.get(name)
+            if running is not None:
+                future, started = running
+                if not future.done():
+                    if name in self.hung:
+                        continue
+                    since = self.silent_since.get(name, started)
+                    if now - since >= self.hung_after:
+                        self.mark_hung(name, instance, now - since)
+                        changed = True
+                    else:
+                        delay = min(delay, since + self.hung_after - now)
+                    continue
+                del self.running[name]
+                if future.result() is False:
+                    # Timed out rather than blocked: the poll finished, but
+                    # Winamp is just as unresponsive.
+                    since = self.silent_since.setdefault(name, started)
+                    if name not in self.hung and now - since >= self.hung_after:
+                        self.mark_hung(name, instance, now - since)
+                        changed = True
+                else:
+                    self.silent_since.pop(name, None)
+                    if name in self.hung:
+                        logging.info("Winamp instance %s is answering again", name)
+                        self.hung.discard(name)
+                        instance.publish_availability(True)
+                        changed = True
+
+            fast, slow = instance.scheduler.due()
+            if fast:
+                future = self.pool.submit(instance.poll_once, slow)
+                self.running[name] = (future, now)
+                # Finished polls wake the loop to schedule the next one.
+                future.add_done_callback(lambda _: self.wake.set())
+                delay = min(delay, self.hung_after)
+            else:
+                delay = min(delay, instance.scheduler.next_delay())
+        if changed:
+            self.publish_instances()
+        return delay
+
+    def mark_hung(self, name, instance, silent_for):
+        logging.warning("Winamp instance %s has not answered for %.1fs", name, silent_for)
+        self.hung.add(name)
+        instance.publish_availability(False)
+
+    def step(self):
+        """One pass of the main loop: rescan when due, then poll."""
+        if self.clock() >= self.next_scan:
+            try:
+                self.scan()
+            except Exception:
+                logging.exception("Error enumerating Winamp windows")
+            self.next_scan = self.clock() + self.scan_interval
+        return self.poll_due()
+
+    def run(self):
+        self.client.will_set(
+            self.base_topic + "/availability",
+            "offline",
+            retain=True
+        )
+
+        self.client.connect(MQTT_HOST, MQTT_PORT, keepalive=60)
+        self.client.loop_start()
+        start_metrics_server()
+
+        self.artwork_url = serve_artwork(self.artwork)
+        self.client.publish(self.base_topic + "/availability", "online", retain=True)
+
+        while True:
+            self.wake.wait(self.step())
+            self.wake.clear()
+
+
 if __name__ == "__main__":
-    bridge = WinampMqttBridge()
+    bridge = MultiInstanceBridge() if MULTI_INSTANCE else WinampMqttBridge()
     bridge.run()